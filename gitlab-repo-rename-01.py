@@ -3,11 +3,11 @@ import os
 import sys
 import requests
 from dotenv import load_dotenv
-import time
+from rate_limiter import AdaptiveRateLimiter, install_rate_limiter
 
 OLD_BRANCH = "trunk"
 NEW_BRANCH = "main"
-REQUEST_DELAY = 0.3  # วินาทีระหว่าง API calls เพื่อไม่ให้โดน rate limit
+REQUEST_RATE = 3.0  # API calls ต่อวินาทีตอนเริ่ม ลดลงเองเมื่อ GitLab ตอบ 429/503 (และรอตาม Retry-After)
 
 load_dotenv()
 gitlab_url = os.getenv('GITLAB_URL')
@@ -24,6 +24,7 @@ session.headers.update({
     'Private-Token': gitlab_token,
     'Content-Type': 'application/json'
 })
+limiter = install_rate_limiter(session, AdaptiveRateLimiter(initial_rate=REQUEST_RATE))
 
 def get_subgroup_id(subgroup_name):
     """หา subgroup ID จากชื่อ"""
@@ -117,9 +118,9 @@ def process_group(group_name):
         print(f"\nกำลังประมวลผลโปรเจกต์: {project['name']} (ID: {project['id']})")
         if rename_branch(project['id'], project['name'], OLD_BRANCH, NEW_BRANCH):
             success_count += 1
-        time.sleep(REQUEST_DELAY)
     
     print(f"\nสรุปผลลัพธ์ '{group_name}': เปลี่ยนชื่อสำเร็จ {success_count} จาก {len(projects)} โปรเจกต์")
+    print(f"rate limit: {limiter.format_report()}")
     return True
 
 def main():
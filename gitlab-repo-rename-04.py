@@ -2,7 +2,7 @@
 import os
 import requests
 from dotenv import load_dotenv
-import time
+from rate_limiter import install_rate_limiter
 
 load_dotenv()
 gitlab_url = os.getenv('GITLAB_URL')
@@ -13,11 +13,13 @@ if not gitlab_url or not gitlab_token:
     exit(1)
 
 api = f"{gitlab_url.rstrip('/')}/api/v4"
-headers = {'Private-Token': gitlab_token}
+session = requests.Session()
+session.headers['Private-Token'] = gitlab_token
+limiter = install_rate_limiter(session)  # ปรับอัตราเองตาม 429/503 แทน sleep ตายตัว
 
 def api_call(method, endpoint, **kwargs):
     """เรียก GitLab API แบบสั้น"""
-    response = requests.request(method, f"{api}/{endpoint}", headers=headers, **kwargs)
+    response = session.request(method, f"{api}/{endpoint}", **kwargs)
     return response.json() if response.status_code < 400 else None
 
 def rename_branch(project_id, name):
@@ -25,8 +27,8 @@ def rename_branch(project_id, name):
     print(f"ประมวลผล: {name}")
     
     # เช็ค trunk และ main
-    trunk_exists = requests.get(f"{api}/projects/{project_id}/repository/branches/trunk", headers=headers).status_code == 200
-    main_exists = requests.get(f"{api}/projects/{project_id}/repository/branches/main", headers=headers).status_code == 200
+    trunk_exists = session.get(f"{api}/projects/{project_id}/repository/branches/trunk").status_code == 200
+    main_exists = session.get(f"{api}/projects/{project_id}/repository/branches/main").status_code == 200
     
     if not trunk_exists:
         print("  - ไม่มี trunk")
@@ -66,8 +68,9 @@ def main():
         return
     
     print(f"เจอ {len(projects)} projects")
-    success = sum(rename_branch(p['id'], p['name']) or time.sleep(0.3) or 0 for p in projects)
+    success = sum(rename_branch(p['id'], p['name']) for p in projects)
     print(f"\nสำเร็จ {success}/{len(projects)} projects")
+    print(f"rate limit: {limiter.format_report()}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+จำกัดอัตรา request ต่อ host แบบปรับตัวเอง (AIMD) พร้อม retry แบบ exponential backoff + jitter
+
+ใช้ร่วมกันทุก HTTP client ใน repo แทน time.sleep แบบตายตัว
+(exam scrapers, AQIAPIClient, gitlab-repo-rename-01/04)
+- แต่ละ host มีอัตราของตัวเอง เริ่มที่ initial_rate request/วินาที
+- response ปกติ  : เพิ่มอัตราทีละ increase (additive increase) ไม่เกิน max_rate
+- 429 / 503     : ลดอัตราเป็น rate * decrease (multiplicative decrease) ไม่ต่ำกว่า min_rate
+                  และหยุดส่งไปยัง host นั้นตาม Retry-After (วินาที หรือ HTTP-date) ถ้ามี
+- request ที่ล้มเหลวชั่วคราวจะ retry หลังรอแบบ exponential backoff + full jitter
+  (500/502/504 และ connection error retry เฉพาะ method ที่ส่งซ้ำได้อย่างปลอดภัย)
+- report() / format_report() บอกอัตรา request ที่เกิดขึ้นจริงของแต่ละ host
+
+วิธีใช้:
+    session = requests.Session()
+    install_rate_limiter(session)                 # session.get/post ผ่าน limiter + retry อัตโนมัติ
+    ...
+    print(shared_limiter().format_report())
+
+    status, headers, body = await request_async(aiohttp_session, "GET", url, limiter)
+"""
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+THROTTLE_STATUSES = (429, 503)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+DEFAULT_RETRIES = 4
+
+def host_of(url):
+    """host ของ URL (ถ้าส่ง host มาโดยตรงจะคืนค่าเดิม)"""
+    return urlparse(url).netloc or url
+
+def parse_retry_after(value, now=None):
+    """แปลงค่า header Retry-After (จำนวนวินาที หรือ HTTP-date) เป็นวินาที คืนค่า None ถ้าอ่านไม่ได้"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """เวลารอก่อน retry ครั้งที่ attempt (เริ่มที่ 0) แบบ exponential backoff + full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def is_retryable(method, status=None):
+    """ควร retry หรือไม่ (status=None หมายถึง connection error / timeout)"""
+    if status in THROTTLE_STATUSES:
+        # เซิร์ฟเวอร์ปฏิเสธโดยยังไม่ประมวลผล ส่งซ้ำได้ทุก method
+        return True
+    if status is not None and status not in RETRY_STATUSES:
+        return False
+    return method.upper() in IDEMPOTENT_METHODS
+
+class HostState:
+    """สถานะของ host เดียว: อัตราปัจจุบัน ช่องเวลาถัดไป และสถิติ"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_at = 0.0
+        self.paused_until = 0.0
+        self.first_at = None
+        self.last_at = None
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+
+class AdaptiveRateLimiter:
+    """จำกัดอัตรา request แยกตาม host แบบ AIMD (ใช้ได้ทั้งจาก thread และ asyncio)"""
+
+    def __init__(self, initial_rate=2.0, min_rate=0.2, max_rate=10.0, increase=0.2, decrease=0.5,
+                 backoff_base=0.5, backoff_cap=30.0):
+        """
+        Args:
+            initial_rate (float): อัตราเริ่มต้นของ host ใหม่ (request/วินาที)
+            min_rate (float): อัตราต่ำสุดหลังโดน throttle
+            max_rate (float): อัตราสูงสุดที่เพิ่มขึ้นไปได้
+            increase (float): อัตราที่เพิ่มต่อ response ปกติ 1 ครั้ง
+            decrease (float): ตัวคูณอัตราเมื่อโดน throttle
+            backoff_base (float): เวลารอของ retry ครั้งแรก (วินาที ก่อน jitter)
+            backoff_cap (float): เวลารอสูงสุดของ retry แต่ละครั้ง
+        """
+        self.initial_rate = min(max(initial_rate, min_rate), max_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _state(self, url):
+        host = host_of(url)
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.initial_rate)
+        return state
+
+    def reserve(self, url):
+        """จองช่องเวลาส่ง request ถัดไปของ host คืนค่าจำนวนวินาทีที่ต้องรอก่อนส่ง"""
+        with self.lock:
+            state = self._state(url)
+            now = time.monotonic()
+            start = max(now, state.next_at, state.paused_until)
+            state.next_at = start + 1.0 / state.rate
+            state.requests += 1
+            if state.first_at is None:
+                state.first_at = start
+            state.last_at = start
+            return start - now
+
+    def acquire(self, url):
+        """รอจนถึงช่องเวลาของ host (สำหรับโค้ดแบบ thread)"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, url):
+        """รอจนถึงช่องเวลาของ host (สำหรับ asyncio)"""
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self, url):
+        """response ปกติ: เพิ่มอัตราแบบ additive"""
+        with self.lock:
+            state = self._state(url)
+            state.rate = min(self.max_rate, state.rate + self.increase)
+
+    def on_throttle(self, url, retry_after=None):
+        """โดน throttle: ลดอัตราแบบ multiplicative และหยุด host ตาม Retry-After (วินาที)"""
+        with self.lock:
+            state = self._state(url)
+            state.rate = max(self.min_rate, state.rate * self.decrease)
+            state.throttled += 1
+            now = time.monotonic()
+            # ช่องเวลาที่จองไว้ตามอัตราเดิมเร็วเกินไปแล้ว
+            state.next_at = max(state.next_at, now + 1.0 / state.rate)
+            if retry_after:
+                state.paused_until = max(state.paused_until, now + retry_after)
+
+    def record_response(self, url, status):
+        """ปรับอัตราตาม status ของ response ที่จะไม่ retry แล้ว"""
+        if status in THROTTLE_STATUSES:
+            self.on_throttle(url)
+        elif status < 500:
+            self.on_success(url)
+
+    def on_retry(self, url, attempt, status=None, retry_after=None):
+        """
+        บันทึก request ที่ล้มเหลวชั่วคราวและจะส่งใหม่
+
+        Args:
+            attempt (int): ลำดับการลองที่ล้มเหลว (เริ่มที่ 0)
+            status (int): status ของ response (None = connection error / timeout)
+            retry_after (str): ค่า header Retry-After ถ้ามี
+
+        Returns:
+            float: จำนวนวินาทีที่ควรรอก่อนส่งใหม่ (ถ้ามี Retry-After จะรอผ่าน acquire แทน จึงคืนค่า 0)
+        """
+        pause = parse_retry_after(retry_after)
+        if status is None or status in THROTTLE_STATUSES:
+            self.on_throttle(url, pause)
+        with self.lock:
+            self._state(url).retries += 1
+        if pause is not None:
+            return 0.0
+        return backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+
+    def report(self):
+        """สถิติของแต่ละ host รวมอัตราจริง (effective_rate) ในช่วงที่มีการส่ง request"""
+        with self.lock:
+            result = {}
+            for host, state in self.hosts.items():
+                span = (state.last_at - state.first_at) if state.first_at is not None else 0.0
+                result[host] = {
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "retries": state.retries,
+                    "rate": round(state.rate, 2),
+                    "effective_rate": round((state.requests - 1) / span, 2) if span > 0 else 0.0
+                }
+            return result
+
+    def format_report(self):
+        """สรุปสถิติเป็นข้อความบรรทัดละ host"""
+        lines = [f"{host}: {r['requests']} requests | อัตราจริง {r['effective_rate']}/วินาที | "
+                 f"อัตราปัจจุบัน {r['rate']}/วินาที | throttled {r['throttled']} | retry {r['retries']}"
+                 for host, r in self.report().items()]
+        return "\n".join(lines) if lines else "ยังไม่มี request"
+
+class RateLimitedAdapter(HTTPAdapter):
+    """transport adapter ของ requests ที่ส่งทุก request ผ่าน AdaptiveRateLimiter และ retry ให้อัตโนมัติ"""
+
+    def __init__(self, limiter=None, retries=DEFAULT_RETRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter or shared_limiter()
+        self.retries = retries
+
+    def send(self, request, **kwargs):
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(request.url)
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries or not is_retryable(request.method):
+                    raise
+                time.sleep(self.limiter.on_retry(request.url, attempt))
+                continue
+            if attempt == self.retries or not is_retryable(request.method, response.status_code):
+                self.limiter.record_response(request.url, response.status_code)
+                return response
+            delay = self.limiter.on_retry(request.url, attempt, response.status_code, response.headers.get("Retry-After"))
+            response.close()
+            time.sleep(delay)
+
+def install_rate_limiter(session, limiter=None, retries=DEFAULT_RETRIES, **adapter_options):
+    """
+    ติดตั้ง limiter ให้ requests.Session (ค่าเริ่มต้นใช้ limiter ร่วมของทั้ง process) คืนค่า limiter ที่ใช้
+
+    adapter_options ส่งต่อให้ HTTPAdapter เช่น pool_connections / pool_maxsize
+    """
+    adapter = RateLimitedAdapter(limiter, retries, **adapter_options)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter.limiter
+
+async def request_async(session, method, url, limiter=None, retries=DEFAULT_RETRIES, **kwargs):
+    """
+    ส่ง request ด้วย aiohttp.ClientSession ผ่าน limiter + retry
+
+    Returns:
+        tuple: (status, headers, body เป็น bytes) ของ response สุดท้าย
+    """
+    limiter = limiter or shared_limiter()
+    transient_errors = (aiohttp.ClientError, asyncio.TimeoutError) if aiohttp else (asyncio.TimeoutError,)
+    for attempt in range(retries + 1):
+        await limiter.acquire_async(url)
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                status, headers = response.status, response.headers
+                body = await response.read()
+        except transient_errors:
+            if attempt == retries or not is_retryable(method):
+                raise
+            await asyncio.sleep(limiter.on_retry(url, attempt))
+            continue
+        if attempt == retries or not is_retryable(method, status):
+            limiter.record_response(url, status)
+            return status, headers, body
+        await asyncio.sleep(limiter.on_retry(url, attempt, status, headers.get("Retry-After")))
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+def shared_limiter():
+    """limiter ร่วมของทั้ง process ทุก client ที่ไม่ได้ระบุ limiter เองจะแบ่งโควตาต่อ host กัน"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter()
+        return _shared_limiter
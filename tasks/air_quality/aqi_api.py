@@ -5,14 +5,44 @@
 วิธีที่ 2: API Integration
 """
 
+import argparse
 import requests
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import time
+
+# rate_limiter.py อยู่ที่ root ของ repo ใช้ร่วมกับ tasks อื่นและสคริปต์ gitlab
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from rate_limiter import AdaptiveRateLimiter, install_rate_limiter
+
+from aqi_cache import resolve_cache
+from aqi_summary import aqi_level_description, aqi_level_descriptions, summarize_stations
+
+# กรอบพิกัดที่ครอบคลุมประเทศไทย (lat ใต้, lng ตะวันตก, lat เหนือ, lng ตะวันออก)
+THAILAND_BOUNDS = (5.6, 97.3, 20.5, 105.7)
+
+def tile_bounds(bounds, rows=2, cols=2):
+    """แบ่งกรอบพิกัด (lat1, lng1, lat2, lng2) เป็น rows x cols ช่อง เพื่อไม่ให้แต่ละ request ใหญ่เกินไป"""
+    lat1, lng1, lat2, lng2 = bounds
+    lat_step = (lat2 - lat1) / rows
+    lng_step = (lng2 - lng1) / cols
+    return [
+        (lat1 + r * lat_step, lng1 + c * lng_step, lat1 + (r + 1) * lat_step, lng1 + (c + 1) * lng_step)
+        for r in range(rows) for c in range(cols)
+    ]
 
 class AQIAPIClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, concurrency=8, timeout=10, max_rate=10.0, cache=None):
+        """
+        Args:
+            api_key (str): WAQI token (ค่าเริ่มต้น "demo")
+            concurrency (int): จำนวนเมือง/สถานีที่ดึงพร้อมกัน
+            timeout (float): timeout ต่อเมือง (วินาที)
+            max_rate (float): จำนวน request สูงสุดต่อวินาทีไปยัง WAQI
+            cache (ResponseCache): cache ของข้อมูลแต่ละเมือง (None = cache ร่วม, False = ไม่ใช้ cache)
+        """
         # WAQI API (World Air Quality Index)
         self.waqi_base_url = "https://api.waqi.info"
         self.api_key = api_key or "demo"  # ใช้ demo key สำหรับทดสอบ
@@ -21,6 +51,18 @@ class AQIAPIClient:
         self.air4thai_base_url = "http://air4thai.pcd.go.th/services"
         
         self.output_dir = "output"
+        # สรุป + รายละเอียดของแต่ละสถานีจากการดึงแบบ bulk ครั้งก่อน (ใช้ข้ามสถานีที่ค่ายังไม่เปลี่ยน)
+        self.station_cache_file = os.path.join(self.output_dir, "waqi_station_cache.json")
+        
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = resolve_cache(cache)
+        
+        # session แบบ keep-alive ใช้ร่วมกันทุก thread (pool ใหญ่เท่า concurrency)
+        # จำกัดอัตรา request ต่อ host แบบปรับตัวเอง (เริ่มครึ่งหนึ่งของ max_rate) และ retry เมื่อโดน 429/503
+        self.session = requests.Session()
+        self.limiter = install_rate_limiter(self.session, AdaptiveRateLimiter(initial_rate=max_rate / 2, max_rate=max_rate),
+                                            pool_connections=concurrency, pool_maxsize=concurrency)
         
         # รายชื่อเมืองหลักในประเทศไทย
         self.thai_cities = [
@@ -35,13 +77,24 @@ class AQIAPIClient:
             os.makedirs(self.output_dir)
             print(f"สร้างโฟลเดอร์ {self.output_dir} เรียบร้อยแล้ว")
     
-    def get_city_aqi_data(self, city_name):
-        """ดึงข้อมูล AQI ของเมืองผ่าน WAQI API"""
+    def get_city_aqi_data(self, city_name, timeout=None, force_refresh=False):
+        """
+        ข้อมูล AQI ของเมือง จาก cache ถ้ายังไม่หมดอายุ (ต้นทางอัปเดตรายชั่วโมง) หรือดึงใหม่ผ่าน WAQI API
+        
+        force_refresh=True ข้าม cache และดึงใหม่ทันที
+        """
+        if self.cache is None:
+            return self.fetch_city_aqi_data(city_name, timeout)
+        return self.cache.get_or_fetch("waqi", city_name, lambda: self.fetch_city_aqi_data(city_name, timeout),
+                                       force=force_refresh)
+    
+    def fetch_city_aqi_data(self, city_name, timeout=None):
+        """ดึงข้อมูล AQI ของเมืองผ่าน WAQI API (timeout ต่อเมือง ค่าเริ่มต้นใช้ self.timeout)"""
         try:
             url = f"{self.waqi_base_url}/feed/{city_name}/"
             params = {"token": self.api_key}
             
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=timeout or self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -117,9 +170,148 @@ class AQIAPIClient:
             print(f"เกิดข้อผิดพลาดในการแยกข้อมูล {city_name}: {e}")
             return None
     
-    def get_thailand_stations_data(self):
-        """ดึงข้อมูลจากสถานีต่างๆ ในประเทศไทย"""
-        print("กำลังดึงข้อมูลจากสถานีต่างๆ ในประเทศไทย...")
+    def _map_concurrent(self, function, items, concurrency=None):
+        """เรียก function(item) พร้อมกันด้วย thread pool แล้วส่ง (item, ผลลัพธ์) ออกมาตามลำดับที่เสร็จ"""
+        items = list(items)
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency or self.concurrency, len(items) or 1)))
+        try:
+            futures = {executor.submit(function, item): item for item in items}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # ผู้เรียกหยุดอ่านกลางคัน: ยกเลิกงานที่ยังไม่เริ่ม
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def iter_cities_aqi_data(self, cities=None, concurrency=None, timeout=None):
+        """
+        ดึงข้อมูลหลายเมืองพร้อมกันด้วย thread pool แล้วส่งผลออกมาทีละเมืองตามลำดับที่ดึงเสร็จ
+        
+        Args:
+            cities (list): รายชื่อเมือง/สถานี (ค่าเริ่มต้น self.thai_cities)
+            concurrency (int): จำนวนเมืองที่ดึงพร้อมกัน (ค่าเริ่มต้น self.concurrency)
+            timeout (float): timeout ต่อเมือง (ค่าเริ่มต้น self.timeout)
+        
+        Yields:
+            tuple: (ชื่อเมือง, ข้อมูลที่แยกแล้ว หรือ None ถ้าดึงไม่สำเร็จ)
+        """
+        cities = cities or self.thai_cities
+        yield from self._map_concurrent(lambda city: self.get_city_aqi_data(city, timeout), cities, concurrency)
+    
+    def get_stations_in_bounds(self, bounds):
+        """ดึงสรุปของทุกสถานีในกรอบพิกัดด้วย endpoint map/bounds (1 request) คืนค่า list หรือ None ถ้าล้มเหลว"""
+        try:
+            response = self.session.get(
+                f"{self.waqi_base_url}/map/bounds/",
+                params={"token": self.api_key, "latlng": ",".join(f"{value:.4f}" for value in bounds)},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("status") != "ok":
+                print(f"ไม่พบข้อมูลสถานีในกรอบ {bounds}: {data.get('data', 'Unknown error')}")
+                return None
+            return data.get("data", [])
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            print(f"เกิดข้อผิดพลาดในการดึงสถานีในกรอบ {bounds}: {e}")
+            return None
+    
+    def load_station_cache(self):
+        """อ่าน cache ของสถานีจากการดึงแบบ bulk ครั้งก่อน {uid: {"summary": [...], "detail": {...}}}"""
+        try:
+            with open(self.station_cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+    
+    def save_station_cache(self, cache):
+        """บันทึก cache ของสถานี (เขียนไฟล์ชั่วคราวแล้วแทนที่ เพื่อไม่ให้ไฟล์เสียถ้าหยุดกลางคัน)"""
+        os.makedirs(os.path.dirname(self.station_cache_file) or ".", exist_ok=True)
+        tmp_path = self.station_cache_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.station_cache_file)
+    
+    def get_station_detail(self, station):
+        """ดึงข้อมูลละเอียดของสถานีจาก summary ของ map/bounds ผ่าน /feed/@uid/ แล้วแยกด้วย parse_waqi_response"""
+        name = station.get("station", {}).get("name") or f"@{station['uid']}"
+        # summary เปลี่ยนแล้ว ข้อมูลใน cache จึงเก่ากว่าต้นทางแน่นอน
+        station_data = self.get_city_aqi_data(f"@{station['uid']}", force_refresh=True)
+        if station_data:
+            station_data = dict(station_data, city=name, uid=station["uid"])
+        return station_data
+    
+    def get_thailand_bulk_data(self, bounds=THAILAND_BOUNDS, tiles=(2, 2), concurrency=None):
+        """
+        ดึงทุกสถานีในกรอบพิกัดของประเทศไทยแบบ bulk
+        
+        1. ขอสรุปของสถานีทั้งหมดด้วย map/bounds ทีละช่อง (rows x cols request พร้อมกัน)
+        2. ดึงรายละเอียด (/feed/@uid/) เฉพาะสถานีที่ AQI หรือเวลาวัดเปลี่ยนจากครั้งก่อน
+           สถานีที่ไม่เปลี่ยนใช้รายละเอียดเดิมจาก cache
+        
+        Returns:
+            dict: รูปแบบเดียวกับ get_thailand_stations_data พร้อม "bulk_stats"
+        """
+        print(f"กำลังดึงสถานีทั้งหมดในกรอบ {bounds} ({tiles[0]}x{tiles[1]} ช่อง)...")
+        summaries = {}
+        failed_tiles = 0
+        for _, stations in self._map_concurrent(self.get_stations_in_bounds, tile_bounds(bounds, *tiles), concurrency):
+            if stations is None:
+                failed_tiles += 1
+                continue
+            for station in stations:
+                # สถานีที่อยู่บนขอบช่องอาจมาซ้ำ ใช้ uid เป็น key
+                summaries[str(station["uid"])] = station
+        
+        cache = self.load_station_cache()
+        stations_data = {}
+        changed = []
+        for uid, station in summaries.items():
+            summary = [station.get("aqi"), station.get("station", {}).get("time")]
+            cached = cache.get(uid)
+            if cached and cached.get("summary") == summary and cached.get("detail"):
+                stations_data[uid] = cached["detail"]
+            else:
+                changed.append(station)
+        print(f"พบ {len(summaries)} สถานี: ค่าเปลี่ยน {len(changed)} สถานี, ใช้ข้อมูลเดิม {len(stations_data)} สถานี")
+        
+        fetched = 0
+        for station, station_data in self._map_concurrent(self.get_station_detail, changed, concurrency):
+            if station_data:
+                uid = str(station["uid"])
+                stations_data[uid] = station_data
+                cache[uid] = {"summary": [station.get("aqi"), station.get("station", {}).get("time")], "detail": station_data}
+                fetched += 1
+        
+        if failed_tiles == 0:
+            # ตัดสถานีที่ไม่อยู่ในกรอบแล้วออกเฉพาะเมื่อได้ข้อมูลครบทุกช่อง
+            cache = {uid: entry for uid, entry in cache.items() if uid in summaries}
+        self.save_station_cache(cache)
+        print(f"rate limit: {self.limiter.format_report()}")
+        
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "country": "Thailand",
+            "data_source": "WAQI API (map bounds)",
+            "api_key_used": "demo" if self.api_key == "demo" else "custom",
+            "stations": [stations_data[uid] for uid in sorted(stations_data, key=int)],
+            "bulk_stats": {
+                "tiles": tiles[0] * tiles[1],
+                "failed_tiles": failed_tiles,
+                "stations": len(summaries),
+                "details_fetched": fetched,
+                "unchanged": len(summaries) - len(changed)
+            }
+        }
+    
+    def get_thailand_stations_data(self, cities=None, concurrency=None, timeout=None, on_result=None):
+        """
+        ดึงข้อมูลจากสถานีต่างๆ ในประเทศไทยพร้อมกันหลายเมือง
+        
+        on_result(city, city_data) ถูกเรียกทันทีที่แต่ละเมืองดึงเสร็จ (city_data เป็น None ถ้าไม่สำเร็จ)
+        รายการ stations ในผลลัพธ์เรียงตามลำดับของ cities
+        """
+        cities = list(cities or self.thai_cities)
+        print(f"กำลังดึงข้อมูลจากสถานีต่างๆ ในประเทศไทย ({len(cities)} เมือง, พร้อมกัน {concurrency or self.concurrency})...")
         
         thailand_data = {
             "timestamp": datetime.now().isoformat(),
@@ -129,54 +321,33 @@ class AQIAPIClient:
             "stations": []
         }
         
-        for city in self.thai_cities:
-            print(f"กำลังดึงข้อมูล {city}...")
-            city_data = self.get_city_aqi_data(city)
-            
+        results = {}
+        for city, city_data in self.iter_cities_aqi_data(cities, concurrency, timeout):
+            results[city] = city_data
             if city_data:
-                thailand_data["stations"].append(city_data)
                 print(f"✓ ดึงข้อมูล {city} สำเร็จ (AQI: {city_data.get('AQI', 'N/A')})")
             else:
                 print(f"✗ ไม่สามารถดึงข้อมูล {city} ได้")
-            
-            # หน่วงเวลาเล็กน้อยเพื่อไม่ให้ API rate limit
-            time.sleep(1)
+            if on_result:
+                on_result(city, city_data)
         
+        thailand_data["stations"] = [results[city] for city in cities if results.get(city)]
+        print(f"rate limit: {self.limiter.format_report()}")
+        if self.cache:
+            print(self.cache.summary())
         return thailand_data
     
     def get_thailand_summary(self, data):
-        """สรุปข้อมูลคุณภาพอากาศของประเทศไทย"""
+        """สรุปข้อมูลคุณภาพอากาศของประเทศไทย (สถิติคำนวณใน aqi_summary)"""
         if not data.get('stations'):
             return None
         
-        stations = data['stations']
         summary = {
             "timestamp": data['timestamp'],
             "country": "Thailand",
             "data_source": data['data_source'],
-            "total_stations": len(stations),
-            "average_AQI": None,
-            "average_PM2.5": None,
-            "average_PM10": None,
-            "average_O3": None,
-            "stations_data": stations
         }
-        
-        # คำนวณค่าเฉลี่ย
-        aqi_values = [s['AQI'] for s in stations if s.get('AQI') is not None]
-        pm25_values = [s['PM2.5'] for s in stations if s.get('PM2.5') is not None]
-        pm10_values = [s['PM10'] for s in stations if s.get('PM10') is not None]
-        o3_values = [s['O3'] for s in stations if s.get('O3') is not None]
-        
-        if aqi_values:
-            summary['average_AQI'] = round(sum(aqi_values) / len(aqi_values), 1)
-        if pm25_values:
-            summary['average_PM2.5'] = round(sum(pm25_values) / len(pm25_values), 1)
-        if pm10_values:
-            summary['average_PM10'] = round(sum(pm10_values) / len(pm10_values), 1)
-        if o3_values:
-            summary['average_O3'] = round(sum(o3_values) / len(o3_values), 1)
-        
+        summary.update(summarize_stations(data['stations']))
         return summary
     
     def save_to_json(self, data, filename="air_quality_api_data.json"):
@@ -193,23 +364,10 @@ class AQIAPIClient:
     
     def get_aqi_level_description(self, aqi):
         """แปลงค่า AQI เป็นคำอธิบาย"""
-        if aqi is None:
-            return "ไม่มีข้อมูล"
-        elif aqi <= 50:
-            return "ดี (Good)"
-        elif aqi <= 100:
-            return "ปานกลาง (Moderate)"
-        elif aqi <= 150:
-            return "ไม่ดีต่อกลุ่มเสี่ยง (Unhealthy for Sensitive Groups)"
-        elif aqi <= 200:
-            return "ไม่ดี (Unhealthy)"
-        elif aqi <= 300:
-            return "แย่มาก (Very Unhealthy)"
-        else:
-            return "อันตราย (Hazardous)"
+        return aqi_level_description(aqi, english=True)
     
-    def run(self):
-        """เรียกใช้งานโปรแกรมหลัก"""
+    def run(self, bulk=False):
+        """เรียกใช้งานโปรแกรมหลัก (bulk=True ดึงทุกสถานีในกรอบพิกัดของประเทศไทยแทนรายชื่อเมือง)"""
         print("=== โปรแกรมดึงข้อมูลคุณภาพอากาศในประเทศไทย (API) ===")
         
         if self.api_key == "demo":
@@ -220,7 +378,7 @@ class AQIAPIClient:
         self.create_output_directory()
         
         # ดึงข้อมูลจากสถานีต่างๆ
-        thailand_data = self.get_thailand_stations_data()
+        thailand_data = self.get_thailand_bulk_data() if bulk else self.get_thailand_stations_data()
         
         # สรุปข้อมูลประเทศไทย
         thailand_summary = self.get_thailand_summary(thailand_data)
@@ -239,9 +397,10 @@ class AQIAPIClient:
                 print(f"เวลาที่ดึงข้อมูล: {thailand_summary['timestamp']}")
                 
                 print("\n=== รายละเอียดแต่ละสถานี ===")
-                for station in thailand_summary['stations_data']:
-                    aqi = station.get('AQI')
-                    print(f"{station['city']}: AQI {aqi} ({self.get_aqi_level_description(aqi)})")
+                stations = thailand_summary['stations_data']
+                levels = aqi_level_descriptions([station.get('AQI') for station in stations], english=True)
+                for station, level in zip(stations, levels):
+                    print(f"{station['city']}: AQI {station.get('AQI')} ({level})")
                 
                 return True
         else:
@@ -249,10 +408,15 @@ class AQIAPIClient:
             return False
 
 def main():
+    parser = argparse.ArgumentParser(description="ดึงข้อมูลคุณภาพอากาศในประเทศไทยผ่าน WAQI API")
+    parser.add_argument("--bulk", action="store_true", help="ดึงทุกสถานีในกรอบพิกัดของประเทศไทย (map/bounds) แทนรายชื่อเมือง")
+    parser.add_argument("--concurrency", type=int, default=8, help="จำนวน request ที่ส่งพร้อมกัน")
+    args = parser.parse_args()
+    
     # สามารถใส่ API key ของคุณเองที่นี่
     # api_client = AQIAPIClient(api_key="YOUR_API_KEY_HERE")
-    api_client = AQIAPIClient()  # ใช้ demo key
-    api_client.run()
+    api_client = AQIAPIClient(concurrency=args.concurrency)  # ใช้ demo key
+    api_client.run(bulk=args.bulk)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cache ของข้อมูลคุณภาพอากาศแบบ TTL + stale-while-revalidate สำหรับ client ทุกตัวใน tasks/air_quality
+
+- key คือ (แหล่งข้อมูล, สถานี/URL) เช่น ("waqi", "Bangkok")
+- เก็บ 2 ชั้น: MemoryLRU ในหน่วยความจำ และ SQLiteCache บนดิสก์ (ใช้ข้ามการรันได้)
+  ชั้นอื่นใช้แทนได้ถ้ามี get(key) / set(key, value, fetched_at, expires_at)
+- อายุของข้อมูลตรงกับรอบอัปเดตของต้นทาง: ค่า AQI อัปเดตทุกต้นชั่วโมง (เผยแพร่ช้ากว่านั้นเล็กน้อย)
+  ข้อมูลจึงหมดอายุเมื่อถึงรอบเผยแพร่ถัดไป ไม่ใช่ TTL คงที่นับจากเวลาที่ดึง
+- ข้อมูลหมดอายุแล้วแต่ไม่เก่าเกิน max_stale: ตอบด้วยข้อมูลเดิมทันทีและดึงใหม่ใน background
+  ถ้าดึงใหม่ไม่สำเร็จจะยังใช้ข้อมูลเดิมต่อ
+
+วิธีใช้:
+    cache = ResponseCache()
+    data = cache.get_or_fetch("waqi", "Bangkok", lambda: client.fetch_city("Bangkok"))
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CACHE_PATH = os.path.join("output", "aqi_cache.sqlite")
+
+def aligned_expiry(now=None, period=3600, publish_delay=600):
+    """
+    เวลาหมดอายุ (epoch) = รอบเผยแพร่ถัดไปของต้นทาง
+
+    ต้นทางวัดค่าทุก period วินาที (ต้นชั่วโมง) และเผยแพร่หลังจากนั้น publish_delay วินาที
+    เช่น ดึงตอน 10:05 ได้ค่าของ 9:00 → หมดอายุ 10:10, ดึงตอน 10:15 → หมดอายุ 11:10
+    """
+    now = time.time() if now is None else now
+    return ((now - publish_delay) // period + 1) * period + publish_delay
+
+class MemoryLRU:
+    """cache ในหน่วยความจำ จำกัดจำนวนรายการ ทิ้งรายการที่ไม่ได้ใช้นานที่สุดก่อน"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """คืนค่า (value, fetched_at, expires_at) หรือ None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, fetched_at, expires_at):
+        with self.lock:
+            self.entries[key] = (value, fetched_at, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def close(self):
+        pass
+
+class SQLiteCache:
+    """cache บนดิสก์ด้วย SQLite (value เก็บเป็น JSON) ใช้ร่วมกันหลาย thread ได้"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value, fetched_at, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key, value, fetched_at, expires_at):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, fetched_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), fetched_at, expires_at)
+            )
+            self.conn.commit()
+
+    def purge(self, older_than):
+        """ลบรายการที่หมดอายุก่อนเวลา older_than (epoch) คืนค่าจำนวนที่ลบ"""
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM responses WHERE expires_at < ?", (older_than,))
+            self.conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class ResponseCache:
+    """cache หลายชั้น (เร็ว → ช้า) พร้อม TTL ตามรอบอัปเดตของต้นทางและ stale-while-revalidate"""
+
+    def __init__(self, backends=None, expiry_fn=aligned_expiry, max_stale=24 * 3600, refresh_workers=4):
+        """
+        Args:
+            backends (list): ชั้นของ cache เรียงจากเร็วไปช้า (ค่าเริ่มต้น MemoryLRU + SQLiteCache)
+            expiry_fn (callable): expiry_fn(now) คืนค่าเวลาหมดอายุของข้อมูลที่เพิ่งดึง
+            max_stale (float): ข้อมูลที่หมดอายุไม่เกินกี่วินาทียังตอบได้ระหว่างดึงใหม่ใน background
+            refresh_workers (int): จำนวน thread ที่ใช้ดึงข้อมูลใหม่ใน background
+        """
+        self.backends = backends if backends is not None else [MemoryLRU(), SQLiteCache()]
+        self.expiry_fn = expiry_fn
+        self.max_stale = max_stale
+        self.refresh_workers = refresh_workers
+        self.refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers)
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def lookup(self, key):
+        """หา key ทีละชั้น เจอในชั้นที่ช้ากว่าจะคัดลอกขึ้นชั้นที่เร็วกว่า คืนค่า (value, fetched_at, expires_at) หรือ None"""
+        for index, backend in enumerate(self.backends):
+            entry = backend.get(key)
+            if entry is not None:
+                for faster in self.backends[:index]:
+                    faster.set(key, *entry)
+                return entry
+        return None
+
+    def store(self, key, value, now=None):
+        now = time.time() if now is None else now
+        for backend in self.backends:
+            backend.set(key, value, now, self.expiry_fn(now))
+
+    def _fetch_and_store(self, key, fetch):
+        """เรียก fetch() แล้วเก็บผลลงทุกชั้น (None = ดึงไม่สำเร็จ ไม่เก็บ)"""
+        try:
+            value = fetch()
+        except Exception as e:
+            print(f"ดึงข้อมูลใหม่ของ {key} ไม่สำเร็จ: {e}")
+            value = None
+        if value is None:
+            self._count("errors")
+        else:
+            self.store(key, value)
+        return value
+
+    def _refresh(self, key, fetch):
+        try:
+            self._fetch_and_store(key, fetch)
+            self._count("refreshes")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def get_or_fetch(self, source, name, fetch, force=False):
+        """
+        คืนค่าข้อมูลของ (source, name) จาก cache หรือจาก fetch()
+
+        - ยังไม่หมดอายุ                 : คืนค่าจาก cache
+        - หมดอายุไม่เกิน max_stale      : คืนค่าเดิมทันที และเรียก fetch() ใน background (ครั้งเดียวต่อ key)
+        - ไม่มี/เก่าเกินไป หรือ force=True : เรียก fetch() ทันที ถ้าล้มเหลวแต่มีข้อมูลเดิมจะคืนค่าเดิม
+
+        fetch() คืนค่า None เมื่อดึงไม่สำเร็จ
+        """
+        key = f"{source}:{name}"
+        entry = None if force else self.lookup(key)
+        now = time.time()
+        if entry is not None:
+            value, _, expires_at = entry
+            if now < expires_at:
+                self._count("hits")
+                return value
+            if now - expires_at <= self.max_stale:
+                self._count("stale_hits")
+                with self.lock:
+                    start_refresh = key not in self.refreshing
+                    self.refreshing.add(key)
+                if start_refresh:
+                    self.refresh_executor.submit(self._refresh, key, fetch)
+                return value
+
+        self._count("misses")
+        value = self._fetch_and_store(key, fetch)
+        if value is None:
+            stale = entry or (self.lookup(key) if force else None)
+            return stale[0] if stale else None
+        return value
+
+    def wait(self):
+        """รอให้การดึงข้อมูลใน background ที่ค้างอยู่เสร็จ"""
+        self.refresh_executor.shutdown(wait=True)
+        self.refresh_executor = ThreadPoolExecutor(max_workers=self.refresh_workers)
+
+    def summary(self):
+        with self.lock:
+            return (f"cache hit {self.stats['hits']} | stale {self.stats['stale_hits']} | miss {self.stats['misses']} | "
+                    f"refresh {self.stats['refreshes']} | error {self.stats['errors']}")
+
+    def close(self):
+        self.refresh_executor.shutdown(wait=True)
+        for backend in self.backends:
+            backend.close()
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def default_cache():
+    """cache ร่วมของทั้ง process (MemoryLRU + SQLite ที่ output/aqi_cache.sqlite)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+def resolve_cache(cache):
+    """แปลงพารามิเตอร์ cache ของ client: None = cache ร่วม, False = ไม่ใช้ cache"""
+    if cache is False:
+        return None
+    return cache if cache is not None else default_cache()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ดึงข้อมูลจากทุกแหล่งพร้อมกันแล้วรวมเป็นไฟล์เดียว (ใช้แทนการรันทีละโปรแกรมใน run_demo.run_all)
+
+- ทุกแหล่ง (api / scraper / simple) รันพร้อมกันใน thread ของตัวเอง เวลารวมจึงเท่ากับแหล่งที่ช้าที่สุด
+  แหล่งที่เกิน timeout ถูกรายงานว่าหมดเวลาและไม่รอต่อ (thread เป็น daemon โปรแกรมจบได้ทันทีโดยไม่รอแหล่งนั้น)
+- สถานีซ้ำกันระหว่างแหล่งรวมเป็นสถานีเดียว: ชื่อเมืองตรงกันหลังปรับรูปแบบ (ตัวพิมพ์, เว้นวรรค, "จังหวัด" ฯลฯ)
+  หรือพิกัดห่างจากสถานีหลัก (ตัวที่ใช้ค่า) ของแหล่งอื่นไม่เกิน merge_radius_km
+  สถานีของแหล่งเดียวกันไม่ถูกรวมด้วยระยะ (สถานีจริงอยู่ใกล้กันได้) และแต่ละแหล่งรวมเข้าสถานีหลักได้ตัวเดียว
+- ค่าของสถานีที่ซ้ำใช้จากแหล่งที่มีลำดับความสำคัญสูงกว่า (SOURCE_PRIORITY) ทั้งชุด ไม่ผสมค่าข้ามแหล่ง
+  เพราะหน่วยต่างกัน (WAQI ให้ค่า PM เป็น AQI ย่อย, aqi.in และข้อมูลจำลองเป็น μg/m³)
+- ค่าเฉลี่ย PM2.5 / PM10 / O3 สรุปแยกตามแหล่งใน "by_source" ค่าเฉลี่ยรวมมีเฉพาะเมื่อทุกสถานีใช้หน่วยเดียวกัน
+- ผลรวมเขียนเป็น output/thailand_aqi_snapshot.json ไฟล์เดียว
+
+วิธีใช้:
+    python aqi_collector.py
+    python aqi_collector.py --sources api,simple --timeout 30
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+from aqi_daemon import SOURCES
+from aqi_spatial import StationIndex, station_location
+from aqi_summary import POLLUTANTS, aqi_level_description, summarize_stations
+
+DEFAULT_SNAPSHOT_PATH = os.path.join("output", "thailand_aqi_snapshot.json")
+SOURCE_PRIORITY = ("api", "api_bulk", "scraper", "simple")
+MERGE_RADIUS_KM = 5.0
+# หน่วยของ PM2.5 / PM10 / O3 ของแต่ละแหล่ง (AQI ใช้สเกลเดียวกันทุกแหล่ง)
+POLLUTANT_UNITS = {"api": "aqi", "api_bulk": "aqi", "scraper": "ug/m3", "simple": "ug/m3"}
+
+# คำที่ไม่ช่วยแยกเมือง ตัดออกก่อนเทียบชื่อ
+_NAME_NOISE = re.compile(r"(จังหวัด|อำเภอ|province|city|thailand|ประเทศไทย)")
+# \W นับสระ/วรรณยุกต์ไทย (combining mark) เป็นเครื่องหมาย จึงต้องยกเว้นช่วงอักษรไทยไว้
+_NON_WORD = re.compile(r"[^\w\u0E00-\u0E7F]+|_")
+
+def normalize_name(name):
+    """ชื่อเมือง/สถานีในรูปแบบที่ใช้เทียบกัน เช่น "Chiang Mai, Thailand" → "chiangmai" """
+    if not name:
+        return None
+    name = unicodedata.normalize("NFKC", str(name)).lower()
+    name = _NAME_NOISE.sub("", name)
+    return _NON_WORD.sub("", name) or None
+
+def station_keys(station):
+    """ชื่อทุกแบบของสถานีที่ใช้เทียบความซ้ำ (ชื่อภาษาอังกฤษก่อน เพราะแต่ละแหล่งตั้งชื่อภาษาไทยไม่ตรงกัน)"""
+    keys = []
+    for field in ("city_en", "city", "station_name"):
+        key = normalize_name(station.get(field))
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+def nearest_other_source(index, merged, source, lat, lon, radius_km):
+    """แถวของสถานีหลักที่ใกล้ที่สุดภายใน radius_km ที่ยังไม่มีสถานีของ source อยู่ หรือ None"""
+    k = 4
+    while True:
+        candidates = index.nearest(lat, lon, k=min(k, len(index)))
+        for candidate in candidates:
+            if candidate["distance_km"] > radius_km:
+                return None
+            row = int(candidate["station"])
+            if source not in merged[row]["sources"]:
+                return row
+        if len(candidates) >= len(index):
+            return None
+        k *= 2
+
+def merge_stations(results, priority=SOURCE_PRIORITY, merge_radius_km=MERGE_RADIUS_KM):
+    """
+    รวมสถานีจากหลายแหล่ง ตัดตัวซ้ำโดยเก็บของแหล่งที่สำคัญกว่า
+
+    Args:
+        results (dict): {ชื่อแหล่ง: รายการสถานี}
+        priority (tuple): ลำดับแหล่ง (แหล่งที่ไม่อยู่ในรายการถือว่าสำคัญน้อยที่สุด)
+        merge_radius_km (float): สถานีของแหล่งอื่นที่ห่างจากสถานีหลักไม่เกินนี้ถือเป็นสถานีเดียวกัน
+
+    Returns:
+        list: สถานีที่รวมแล้ว แต่ละตัวมี "source" (แหล่งที่ใช้ค่า) และ "sources" (ทุกแหล่งที่พบ)
+    """
+    order = sorted(results, key=lambda name: priority.index(name) if name in priority else len(priority))
+    merged = []
+    by_key = {}
+    index = StationIndex(fields=())
+    for source in order:
+        for station in results[source] or []:
+            keys = station_keys(station)
+            location = station_location(station)
+            row = next((by_key[key] for key in keys if key in by_key), None)
+            if row is None and location is not None and len(index):
+                # index เก็บเฉพาะพิกัดของสถานีหลัก จึงเทียบกับสถานีหลักเสมอ ไม่ต่อกันเป็นทอด ๆ
+                row = nearest_other_source(index, merged, source, location[1], location[2], merge_radius_km)
+            if row is not None:
+                if source not in merged[row]["sources"]:
+                    merged[row]["sources"].append(source)
+                for key in keys:
+                    by_key.setdefault(key, row)
+                continue
+
+            row = len(merged)
+            merged.append(dict(station, source=source, sources=[source]))
+            for key in keys:
+                by_key.setdefault(key, row)
+            if location is not None:
+                index.update_stations([{"station": str(row), "lat": location[1], "lon": location[2]}])
+    return merged
+
+def summarize_merged(merged):
+    """
+    สรุปสถานีที่รวมแล้ว โดยไม่เฉลี่ยค่าที่หน่วยต่างกันรวมกัน
+
+    AQI ใช้สเกลเดียวกันทุกแหล่งจึงสรุปรวมได้ ส่วน PM2.5 / PM10 / O3 สรุปแยกตามแหล่งใน "by_source"
+    และค่าเฉลี่ยรวมเป็น None เมื่อสถานีมาจากแหล่งที่หน่วยต่างกัน
+    """
+    groups = {}
+    for station in merged:
+        groups.setdefault(station["source"], []).append(station)
+    by_source = {}
+    for source, stations in groups.items():
+        units = POLLUTANT_UNITS.get(source)
+        summary = summarize_stations(stations, concentrations=units == "ug/m3")
+        del summary["stations_data"]
+        by_source[source] = {"pollutant_units": units, **summary}
+
+    summary = summarize_stations(merged)
+    units = {entry["pollutant_units"] for entry in by_source.values()}
+    if len(units) > 1:
+        for pollutant in POLLUTANTS:
+            summary[f"average_{pollutant}"] = None
+            summary["statistics"][pollutant] = None
+        summary["pollutant_units"] = "mixed"
+    else:
+        summary["pollutant_units"] = units.pop() if units else None
+    summary["by_source"] = by_source
+    return summary
+
+def collect(sources=("api", "scraper", "simple"), timeout=120.0, factories=SOURCES, priority=SOURCE_PRIORITY,
+            merge_radius_km=MERGE_RADIUS_KM):
+    """
+    ดึงทุกแหล่งพร้อมกัน แล้วรวมเป็น snapshot เดียว
+
+    Args:
+        sources (tuple): ชื่อแหล่งใน factories
+        timeout (float): เวลารอสูงสุดของทั้งชุด (วินาที)
+        factories (dict): {ชื่อแหล่ง: factory ที่คืนฟังก์ชัน poll()} แบบเดียวกับ aqi_daemon.SOURCES
+
+    Returns:
+        dict: snapshot (สรุปจาก aqi_summary + สถานะของแต่ละแหล่ง)
+    """
+    unknown = [name for name in sources if name not in factories]
+    if unknown:
+        raise ValueError(f"ไม่รู้จักแหล่งข้อมูล: {', '.join(unknown)}")
+
+    outcomes = {}
+
+    def run_source(name):
+        started_at = time.perf_counter()
+        try:
+            data = factories[name]()()
+        except Exception as e:
+            outcomes[name] = (None, e, None)
+            return
+        outcomes[name] = (data, None, time.perf_counter() - started_at)
+
+    # daemon thread: แหล่งที่หมดเวลาไม่รั้งให้ interpreter รอจนดึงเสร็จตอนจบโปรแกรม
+    # (worker ของ ThreadPoolExecutor ถูก join ตอนปิด interpreter เสมอ --timeout จึงไม่มีผล)
+    started_at = time.perf_counter()
+    threads = {name: threading.Thread(target=run_source, args=(name,), name=f"collect-{name}", daemon=True)
+               for name in sources}
+    for thread in threads.values():
+        thread.start()
+    deadline = started_at + timeout
+    for thread in threads.values():
+        thread.join(max(0.0, deadline - time.perf_counter()))
+    # คัดลอกผล ณ เส้นตาย แหล่งที่ดึงเสร็จหลังจากนี้ไม่ถูกนับ
+    finished = dict(outcomes)
+
+    results, statuses = {}, {}
+    for name in sources:
+        if name not in finished:
+            statuses[name] = {"status": "timeout", "stations": 0, "seconds": None}
+            continue
+        data, error, seconds = finished[name]
+        if error is not None:
+            statuses[name] = {"status": "error", "error": str(error), "stations": 0, "seconds": None}
+            continue
+        stations = (data or {}).get("stations") or []
+        results[name] = stations
+        statuses[name] = {"status": "ok" if stations else "empty", "stations": len(stations), "seconds": round(seconds, 2)}
+
+    merged = merge_stations(results, priority, merge_radius_km)
+    snapshot = {
+        "timestamp": datetime.now().isoformat(),
+        "country": "Thailand",
+        "elapsed_seconds": round(time.perf_counter() - started_at, 2),
+        "sources": statuses,
+        "duplicates_merged": sum(statuses[name]["stations"] for name in results) - len(merged)
+    }
+    snapshot.update(summarize_merged(merged))
+    return snapshot
+
+def save_snapshot(snapshot, path=DEFAULT_SNAPSHOT_PATH):
+    """บันทึก snapshot (เขียนไฟล์ชั่วคราวแล้วแทนที่)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+    print(f"บันทึกข้อมูลรวมลงไฟล์ {path} เรียบร้อยแล้ว")
+
+def print_snapshot(snapshot):
+    print("\n=== ผลการดึงข้อมูลแต่ละแหล่ง ===")
+    for name, status in snapshot["sources"].items():
+        seconds = f"{status['seconds']} วินาที" if status["seconds"] is not None else "-"
+        print(f"  {name:<9} {status['status']:<7} | {status['stations']:>4} สถานี | {seconds}")
+    print(f"\nรวม {snapshot['total_stations']} สถานี (ตัดซ้ำ {snapshot['duplicates_merged']}) "
+          f"ใช้เวลา {snapshot['elapsed_seconds']} วินาที")
+    if snapshot["average_AQI"] is not None:
+        print(f"AQI เฉลี่ย: {snapshot['average_AQI']} ({aqi_level_description(snapshot['average_AQI'])})")
+    for name, summary in snapshot["by_source"].items():
+        unit = "μg/m³" if summary["pollutant_units"] == "ug/m3" else "AQI ย่อย"
+        print(f"  {name:<9} {summary['total_stations']:>4} สถานี | AQI เฉลี่ย {summary['average_AQI']} | "
+              f"PM2.5 เฉลี่ย {summary['average_PM2.5']} ({unit})")
+
+def main():
+    parser = argparse.ArgumentParser(description="ดึงข้อมูลคุณภาพอากาศจากทุกแหล่งพร้อมกันแล้วรวมเป็นไฟล์เดียว")
+    parser.add_argument("--sources", default="api,scraper,simple", help=f"แหล่งข้อมูล คั่นด้วย , ({', '.join(SOURCES)})")
+    parser.add_argument("--timeout", type=float, default=120.0, help="เวลารอสูงสุด (วินาที)")
+    parser.add_argument("--output", default=DEFAULT_SNAPSHOT_PATH, help="ไฟล์ผลลัพธ์")
+    args = parser.parse_args()
+
+    sources = tuple(name.strip() for name in args.sources.split(",") if name.strip())
+    snapshot = collect(sources, args.timeout)
+    print_snapshot(snapshot)
+    save_snapshot(snapshot, args.output)
+
+if __name__ == "__main__":
+    main()
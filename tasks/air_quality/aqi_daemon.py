@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+daemon เก็บข้อมูลคุณภาพอากาศต่อเนื่อง แทนการรัน run() ทีละครั้งผ่านเมนูของ run_demo.py
+
+- แต่ละแหล่งข้อมูล (api / scraper / simple) มีรอบ poll ของตัวเอง เวลาเริ่มแต่ละรอบคำนวณจากเวลาเริ่มต้น
+  (start + k * interval) จึงไม่สะสมความคลาดเคลื่อน ถ้ารอบไหนช้าจนเลยรอบถัดไปจะข้ามรอบที่พลาดไป
+- client ทุกตัวเป็นแบบ blocking จึงรันใน thread ผ่าน asyncio.to_thread ทำให้ I/O ของหลายแหล่งทับซ้อนกันได้
+- ผลของแต่ละรอบต่อท้ายลง time series store (aqi_timeseries.py) ผ่าน queue ที่จำกัดขนาด
+  ถ้า store เขียนช้า queue จะเต็มและรอบ poll ถัดไปจะรอ (backpressure) แทนการกินหน่วยความจำเพิ่มเรื่อยๆ
+- ค่าใหม่ที่ store บันทึกจริง (ไม่รวมค่าซ้ำ) อัปเดต NowCast / ค่าเฉลี่ย 24 ชั่วโมงของแต่ละสถานี (aqi_rolling.py) ซึ่งบันทึกลงไฟล์ทุกครั้งที่รายงานและตอนหยุด
+  restart แล้วจึงใช้หน้าต่างเดิมต่อได้
+- Ctrl+C / SIGTERM: หยุดรับรอบใหม่ เขียนข้อมูลที่ค้างใน queue ให้หมด แล้วจึงออก
+- รายงาน latency ของแต่ละรอบ (ล่าสุด / p50 / p95) จำนวนรอบสำเร็จ/ล้มเหลว/ข้าม และความลึกของ queue
+
+วิธีใช้:
+    python aqi_daemon.py
+    python aqi_daemon.py --sources api,simple --interval api=600 --interval simple=60
+    python aqi_daemon.py --duration 3600 --report-every 300
+"""
+
+import argparse
+import asyncio
+import signal
+import statistics
+import time
+from collections import deque
+from datetime import datetime
+
+from aqi_rolling import RollingAggregator
+from aqi_timeseries import TimeSeriesStore, to_readings
+
+DEFAULT_INTERVALS = {"api": 600.0, "scraper": 1800.0, "simple": 60.0}
+
+# แต่ละแหล่งคือ factory ที่สร้าง client ครั้งเดียวแล้วคืนฟังก์ชัน poll() (ใช้ session / limiter / cache เดิมทุกรอบ)
+def api_poller():
+    from aqi_api import AQIAPIClient
+    return AQIAPIClient().get_thailand_stations_data
+
+def api_bulk_poller():
+    from aqi_api import AQIAPIClient
+    return AQIAPIClient().get_thailand_bulk_data
+
+def scraper_poller():
+    from aqi_scraper import AQIScraper
+    scraper = AQIScraper()
+    def poll():
+        # เวลาที่ดึงหน้าจริงทำให้หน้าเดิมจาก cache ถูกตัดเป็นค่าซ้ำใน store
+        html_content, fetched_at = scraper.fetch_page()
+        return scraper.parse_air_quality_data(html_content, fetched_at) if html_content else None
+    return poll
+
+def simple_poller():
+    from aqi_simple import SimpleAQIClient
+    return SimpleAQIClient().get_thailand_air_quality
+
+SOURCES = {
+    "api": api_poller,
+    "api_bulk": api_bulk_poller,
+    "scraper": scraper_poller,
+    "simple": simple_poller
+}
+
+class PollMetrics:
+    """สถิติของแหล่งข้อมูลเดียว: latency ของรอบล่าสุด N รอบ และจำนวนรอบแต่ละสถานะ"""
+
+    def __init__(self, window=100):
+        self.latencies = deque(maxlen=window)
+        self.counts = {"ok": 0, "failed": 0, "skipped": 0}
+        self.readings = 0
+
+    def record(self, status, latency=None, readings=0):
+        self.counts[status] += 1
+        self.readings += readings
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        return {
+            **self.counts,
+            "readings": self.readings,
+            "last_ms": round(self.latencies[-1] * 1000, 1) if latencies else None,
+            "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else None
+        }
+
+class AQIDaemon:
+    """ตั้งเวลา poll หลายแหล่งพร้อมกันและส่งผลเข้า store ผ่าน writer ตัวเดียว"""
+
+    def __init__(self, intervals, store=None, queue_size=32, report_every=300.0, sources=SOURCES, rolling=None):
+        """
+        Args:
+            intervals (dict): {ชื่อแหล่ง: วินาทีต่อรอบ}
+            sources (dict): {ชื่อแหล่ง: factory ที่คืนฟังก์ชัน poll()}
+            store: object ที่มี append_new(readings) และ close() (ค่าเริ่มต้น TimeSeriesStore ที่ output/aqi_timeseries.sqlite)
+            queue_size (int): จำนวนผลของรอบ poll ที่รอเขียนได้สูงสุดก่อนจะหน่วงรอบถัดไป
+            report_every (float): พิมพ์สถิติทุกกี่วินาที (0 = เฉพาะตอนจบ)
+            rolling (RollingAggregator): NowCast / ค่าเฉลี่ย 24 ชั่วโมง (ค่าเริ่มต้นโหลดจาก output/aqi_rolling.json)
+        """
+        unknown = [name for name in intervals if name not in sources]
+        if unknown:
+            raise ValueError(f"ไม่รู้จักแหล่งข้อมูล: {', '.join(unknown)}")
+        self.intervals = intervals
+        self.pollers = {name: sources[name]() for name in intervals}
+        self.store = store or TimeSeriesStore()
+        self.rolling = rolling or RollingAggregator.load()
+        self.queue_size = queue_size
+        self.report_every = report_every
+        self.metrics = {name: PollMetrics() for name in intervals}
+        self.write_metrics = PollMetrics()
+        self.max_queue_depth = 0
+        self.stop_event = None
+        self.queue = None
+
+    async def poll_loop(self, name):
+        """poll แหล่ง name ตามรอบแบบไม่สะสม drift จนกว่าจะได้รับสัญญาณหยุด"""
+        interval = self.intervals[name]
+        poll = self.pollers[name]
+        metrics = self.metrics[name]
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        tick = 0
+        while not self.stop_event.is_set():
+            polled_at = time.time()
+            poll_started = loop.time()
+            try:
+                data = await asyncio.to_thread(poll)
+                latency = loop.time() - poll_started
+                readings = to_readings(name, data, polled_at)
+                if readings:
+                    # queue เต็ม = store เขียนไม่ทัน รอตรงนี้ (backpressure)
+                    await self.queue.put(readings)
+                    self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+                metrics.record("ok" if readings else "failed", latency, len(readings))
+            except Exception as e:
+                print(f"[{name}] poll ล้มเหลว: {e}")
+                metrics.record("failed", loop.time() - poll_started)
+
+            # รอบถัดไปนับจากเวลาเริ่มต้น ถ้าเลยไปแล้วให้ข้ามรอบที่พลาด
+            tick += 1
+            next_tick = started_at + tick * interval
+            now = loop.time()
+            if now > next_tick:
+                missed = int((now - next_tick) // interval) + 1
+                tick += missed
+                metrics.counts["skipped"] += missed
+                next_tick = started_at + tick * interval
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), timeout=next_tick - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def writer(self):
+        """writer ตัวเดียวของ store รับจาก queue จนกว่าจะได้ None (หลังผู้ผลิตหยุดหมดแล้ว)"""
+        while True:
+            readings = await self.queue.get()
+            if readings is None:
+                break
+            started_at = time.perf_counter()
+            try:
+                accepted = await asyncio.to_thread(self.store.append_new, readings)
+                self.write_metrics.record("ok", time.perf_counter() - started_at, len(accepted))
+                # ค่าซ้ำ (measured_at เดิม) ถูก store ตัดทิ้งแล้ว ถ้านับซ้ำ NowCast จะเอียงไปทางค่าที่ไม่เปลี่ยน
+                self.rolling.update_readings(accepted)
+            except Exception as e:
+                print(f"เขียน store ไม่สำเร็จ ({len(readings)} แถว): {e}")
+                self.write_metrics.record("failed", time.perf_counter() - started_at)
+
+    async def reporter(self):
+        while not self.stop_event.is_set():
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), timeout=self.report_every)
+            except asyncio.TimeoutError:
+                self.print_report()
+                await asyncio.to_thread(self.rolling.save)
+
+    def print_report(self):
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] สถิติ daemon (queue {self.queue.qsize()}/{self.queue_size}, สูงสุด {self.max_queue_depth})")
+        for name, metrics in self.metrics.items():
+            s = metrics.snapshot()
+            print(f"  {name:<9} สำเร็จ {s['ok']:>4} | ล้มเหลว {s['failed']:>3} | ข้าม {s['skipped']:>3} | {s['readings']:>6} แถว | "
+                  f"latency ล่าสุด {s['last_ms']} ms, p50 {s['p50_ms']} ms, p95 {s['p95_ms']} ms")
+        s = self.write_metrics.snapshot()
+        print(f"  {'store':<9} เขียน {s['ok']:>4} ครั้ง | {s['readings']:>6} แถว | p50 {s['p50_ms']} ms, p95 {s['p95_ms']} ms")
+        stations = list(self.rolling.stations)
+        if stations:
+            nowcasts = [(value, station) for station in stations if (value := self.rolling.nowcast(station)) is not None]
+            highest = "NowCast PM2.5 สูงสุด {} ({})".format(*max(nowcasts)) if nowcasts else "ยังไม่มี NowCast (ต้องมีข้อมูล 2 ใน 3 ชั่วโมงล่าสุด)"
+            print(f"  {'rolling':<9} {len(stations)} สถานี | {highest}")
+
+    def stop(self):
+        if self.stop_event and not self.stop_event.is_set():
+            print("\nกำลังหยุด daemon (เขียนข้อมูลที่ค้างให้เสร็จก่อน)...")
+            self.stop_event.set()
+
+    async def run(self, duration=None):
+        """รันจนกว่าจะได้ SIGINT/SIGTERM หรือครบ duration วินาที คืนค่าสถิติ"""
+        self.stop_event = asyncio.Event()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows / ไม่ได้รันใน main thread: ใช้ KeyboardInterrupt ตามปกติ
+                pass
+        if duration:
+            loop.call_later(duration, self.stop)
+
+        print(f"เริ่ม daemon: {', '.join(f'{name} ทุก {interval:g} วินาที' for name, interval in self.intervals.items())}")
+        writer_task = asyncio.create_task(self.writer())
+        reporter_task = asyncio.create_task(self.reporter()) if self.report_every else None
+        try:
+            await asyncio.gather(*(self.poll_loop(name) for name in self.intervals))
+        finally:
+            self.stop_event.set()
+            await self.queue.put(None)
+            await writer_task
+            if reporter_task:
+                await reporter_task
+            await asyncio.to_thread(self.store.close)
+            await asyncio.to_thread(self.rolling.save)
+        self.print_report()
+        return {
+            "sources": {name: metrics.snapshot() for name, metrics in self.metrics.items()},
+            "store": self.write_metrics.snapshot(),
+            "max_queue_depth": self.max_queue_depth
+        }
+
+def parse_intervals(sources, overrides):
+    """รวมรอบเริ่มต้นกับค่าจาก --interval name=seconds"""
+    intervals = {}
+    for name in sources:
+        intervals[name] = DEFAULT_INTERVALS.get(name, DEFAULT_INTERVALS["api"])
+    for override in overrides or []:
+        name, _, seconds = override.partition("=")
+        if name not in intervals:
+            raise SystemExit(f"--interval {override}: ไม่มีแหล่งข้อมูล {name} ใน --sources")
+        intervals[name] = float(seconds)
+    return intervals
+
+def main():
+    parser = argparse.ArgumentParser(description="daemon เก็บข้อมูลคุณภาพอากาศต่อเนื่อง")
+    parser.add_argument("--sources", default="api,simple", help=f"แหล่งข้อมูล คั่นด้วย , ({', '.join(SOURCES)})")
+    parser.add_argument("--interval", action="append", help="รอบ poll ของแหล่ง เช่น api=600 (ใช้ได้หลายครั้ง)")
+    parser.add_argument("--duration", type=float, default=None, help="หยุดเองหลังกี่วินาที (ค่าเริ่มต้น: รันจนกด Ctrl+C)")
+    parser.add_argument("--queue-size", type=int, default=32, help="จำนวนรอบที่รอเขียนได้สูงสุด")
+    parser.add_argument("--report-every", type=float, default=300.0, help="พิมพ์สถิติทุกกี่วินาที")
+    args = parser.parse_args()
+
+    sources = [name.strip() for name in args.sources.split(",") if name.strip()]
+    daemon = AQIDaemon(parse_intervals(sources, args.interval), queue_size=args.queue_size, report_every=args.report_every)
+    try:
+        asyncio.run(daemon.run(args.duration))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ค่าเฉลี่ยแบบหน้าต่างเลื่อนต่อสถานี (NowCast PM2.5/PM10 และค่าเฉลี่ย 24 ชั่วโมง) อัปเดตทีละค่าที่วัดได้
+
+- แต่ละสถานีและแต่ละค่ามี ring buffer รายชั่วโมง 24 ช่อง (ผลรวม + จำนวนของชั่วโมงนั้น)
+  ค่าใหม่บวกเข้าช่องของชั่วโมงตัวเอง ช่องที่หลุดหน้าต่างถูกล้างตอนเลื่อนชั่วโมง ไม่ต้องสแกนประวัติ
+- ค่าเฉลี่ย 24 ชั่วโมง = เฉลี่ยของค่าเฉลี่ยรายชั่วโมง เก็บผลรวมไว้ตลอดจึงอ่านได้ทันที
+- NowCast ตามวิธีของ US EPA: ค่าเฉลี่ยรายชั่วโมง 12 ชั่วโมงล่าสุดถ่วงน้ำหนักด้วย w^i
+  (w = ต่ำสุด/สูงสุด ไม่น้อยกว่า 0.5) ต้องมีข้อมูลอย่างน้อย 2 ใน 3 ชั่วโมงล่าสุด
+- ผลลัพธ์อยู่ในหน่วยเดียวกับค่าที่ส่งเข้ามา (WAQI ให้ค่า PM เป็น AQI ย่อย, OpenWeather เป็น μg/m³)
+- save() / load() เก็บหน้าต่างทั้งหมดลงไฟล์ JSON ทำให้ restart daemon แล้วไม่เสียข้อมูลย้อนหลัง
+
+วิธีใช้ (ส่งเฉพาะค่าใหม่ที่ store บันทึก ค่าที่ได้ซ้ำจาก cache จึงไม่ถูกนับซ้ำ และลงชั่วโมงตามเวลาที่วัด):
+    rolling = RollingAggregator.load()
+    store = TimeSeriesStore()
+    readings = to_readings("api", client.get_thailand_stations_data(), time.time())
+    rolling.update_readings(store.append_new(readings))
+    rolling.nowcast("Bangkok")            # NowCast PM2.5
+    rolling.mean("Bangkok", "AQI")        # ค่าเฉลี่ย 24 ชั่วโมง
+    rolling.save()
+"""
+
+import json
+import os
+import threading
+import time
+
+from aqi_timeseries import measured_ts
+
+DEFAULT_SNAPSHOT_PATH = os.path.join("output", "aqi_rolling.json")
+MEAN_FIELDS = ("AQI", "PM2.5", "PM10", "O3")
+NOWCAST_FIELDS = ("PM2.5", "PM10")
+NOWCAST_HOURS = 12
+NOWCAST_MIN_WEIGHT = 0.5
+
+def nowcast(hourly_means, min_weight=NOWCAST_MIN_WEIGHT):
+    """
+    NowCast จากค่าเฉลี่ยรายชั่วโมง เรียงจากชั่วโมงล่าสุด (None = ไม่มีข้อมูล)
+
+    คืนค่า None ถ้ามีข้อมูลน้อยกว่า 2 ใน 3 ชั่วโมงล่าสุด
+    """
+    if sum(value is not None for value in hourly_means[:3]) < 2:
+        return None
+    values = [value for value in hourly_means if value is not None]
+    highest = max(values)
+    weight = max(min(values) / highest, min_weight) if highest > 0 else 1.0
+    numerator = denominator = 0.0
+    for age, value in enumerate(hourly_means):
+        if value is not None:
+            numerator += weight ** age * value
+            denominator += weight ** age
+    return round(numerator / denominator, 1)
+
+class HourlyRing:
+    """ring buffer ของค่าเฉลี่ยรายชั่วโมง size ชั่วโมงล่าสุด พร้อมผลรวมของค่าเฉลี่ยที่อัปเดตทีละค่า"""
+
+    __slots__ = ("size", "hours", "sums", "counts", "latest_hour", "mean_total", "filled")
+
+    def __init__(self, size=24):
+        self.size = size
+        self.hours = [None] * size
+        self.sums = [0.0] * size
+        self.counts = [0] * size
+        self.latest_hour = None
+        self.mean_total = 0.0
+        self.filled = 0
+
+    def _evict(self, index):
+        if self.counts[index]:
+            self.mean_total -= self.sums[index] / self.counts[index]
+            self.filled -= 1
+        self.hours[index] = None
+        self.sums[index] = 0.0
+        self.counts[index] = 0
+
+    def advance(self, hour):
+        """เลื่อนหน้าต่างให้ชั่วโมงล่าสุดเป็น hour (ล้างช่องที่หลุดหน้าต่าง ไม่เกิน size ช่อง)"""
+        if self.latest_hour is not None and hour <= self.latest_hour:
+            return
+        first = hour - self.size + 1
+        if self.latest_hour is not None:
+            first = max(first, self.latest_hour + 1)
+        for expired in range(first, hour + 1):
+            self._evict(expired % self.size)
+        self.latest_hour = hour
+        if self.filled == 0:
+            # ล้างเศษทศนิยมที่สะสมจากการบวกลบ
+            self.mean_total = 0.0
+
+    def add(self, hour, value):
+        """เพิ่มค่าของชั่วโมง hour คืนค่า False ถ้าเก่ากว่าหน้าต่าง"""
+        self.advance(hour)
+        if hour <= self.latest_hour - self.size:
+            return False
+        index = hour % self.size
+        if self.counts[index]:
+            self.mean_total -= self.sums[index] / self.counts[index]
+        else:
+            self.filled += 1
+        self.hours[index] = hour
+        self.sums[index] += value
+        self.counts[index] += 1
+        self.mean_total += self.sums[index] / self.counts[index]
+        return True
+
+    def mean(self):
+        return round(self.mean_total / self.filled, 1) if self.filled else None
+
+    def recent_means(self, hours):
+        """ค่าเฉลี่ยของ hours ชั่วโมงล่าสุด เรียงจากชั่วโมงล่าสุด (None = ไม่มีข้อมูล)"""
+        means = []
+        for hour in range(self.latest_hour, self.latest_hour - min(hours, self.size), -1):
+            index = hour % self.size
+            means.append(self.sums[index] / self.counts[index] if self.hours[index] == hour and self.counts[index] else None)
+        return means
+
+    def to_dict(self):
+        slots = [[hour, self.sums[index], self.counts[index]]
+                 for index, hour in enumerate(self.hours) if hour is not None and self.counts[index]]
+        return {"latest_hour": self.latest_hour, "slots": slots}
+
+    @classmethod
+    def from_dict(cls, data, size=24):
+        ring = cls(size)
+        ring.latest_hour = data.get("latest_hour")
+        for hour, total, count in data.get("slots", []):
+            if ring.latest_hour is not None and hour > ring.latest_hour - size:
+                index = hour % size
+                ring.hours[index], ring.sums[index], ring.counts[index] = hour, total, count
+                ring.mean_total += total / count
+                ring.filled += 1
+        return ring
+
+class RollingAggregator:
+    """NowCast และค่าเฉลี่ย 24 ชั่วโมงของทุกสถานี อัปเดตทีละค่าแบบ O(1) (ใช้จากหลาย thread ได้)"""
+
+    def __init__(self, window_hours=24, fields=MEAN_FIELDS, path=DEFAULT_SNAPSHOT_PATH):
+        """
+        Args:
+            window_hours (int): ความยาวหน้าต่างของค่าเฉลี่ย (ชั่วโมง ต้องไม่น้อยกว่า 12 สำหรับ NowCast)
+            fields (tuple): ค่าที่เก็บ
+            path (str): ไฟล์ที่ใช้กับ save() / load()
+        """
+        self.window_hours = max(window_hours, NOWCAST_HOURS)
+        self.fields = tuple(fields)
+        self.path = path
+        self.stations = {}
+        self.lock = threading.Lock()
+
+    def update(self, station, values, ts=None):
+        """
+        เพิ่มค่าที่วัดได้ของสถานี
+
+        Args:
+            station (str): ชื่อสถานี
+            values (dict): {ชื่อค่า: ค่า} เช่น {"AQI": 80, "PM2.5": 42}
+            ts (float): epoch ของค่าที่วัด (ค่าเริ่มต้น: ตอนนี้)
+        """
+        hour = int((time.time() if ts is None else ts) // 3600)
+        with self.lock:
+            rings = self.stations.setdefault(station, {})
+            for field in self.fields:
+                value = values.get(field)
+                if value is None:
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                ring = rings.get(field)
+                if ring is None:
+                    ring = rings[field] = HourlyRing(self.window_hours)
+                ring.add(hour, value)
+
+    def update_station(self, station_data, ts=None):
+        """
+        เพิ่มผลของ client หนึ่งสถานี (ผลของ get_city_aqi_data / extract_station_data / get_openweather_aqi)
+
+        ไม่ตัดค่าซ้ำ ผู้เรียกต้องส่งเฉพาะค่าที่วัดใหม่และระบุ ts เป็นเวลาที่วัด (ถ้าเป็นผลจากการ poll ใช้ update_readings แทน)
+        """
+        if not station_data:
+            return
+        name = station_data.get("city") or station_data.get("station_name")
+        if name:
+            self.update(name, station_data, ts)
+
+    def update_readings(self, readings):
+        """
+        เพิ่มแถวของ time series (รูปแบบจาก aqi_timeseries.to_readings) ลงชั่วโมงของเวลาที่วัด (measured_at)
+
+        ส่งเฉพาะแถวใหม่ (ผลของ TimeSeriesStore.append_new) ค่าเดิมที่ poll ได้ซ้ำจะถูกนับเป็นค่าวัดใหม่
+        """
+        for reading in readings:
+            self.update(reading["station"], reading, measured_ts(reading))
+
+    def _ring(self, station, field, now):
+        ring = self.stations.get(station, {}).get(field)
+        if ring is not None:
+            # เวลาผ่านไปโดยไม่มีค่าใหม่ ชั่วโมงเก่าต้องหลุดหน้าต่างด้วย
+            ring.advance(int((time.time() if now is None else now) // 3600))
+        return ring
+
+    def mean(self, station, field="PM2.5", now=None):
+        """ค่าเฉลี่ยของหน้าต่าง (24 ชั่วโมง) ของสถานี"""
+        with self.lock:
+            ring = self._ring(station, field, now)
+            return ring.mean() if ring else None
+
+    def nowcast(self, station, field="PM2.5", now=None):
+        """NowCast ของสถานี (None ถ้าข้อมูลชั่วโมงล่าสุดไม่พอ)"""
+        with self.lock:
+            ring = self._ring(station, field, now)
+            return nowcast(ring.recent_means(NOWCAST_HOURS)) if ring else None
+
+    def snapshot(self, now=None):
+        """{สถานี: {"nowcast_PM2.5": ..., "mean_24h_AQI": ..., ...}} ของทุกสถานี"""
+        with self.lock:
+            stations = list(self.stations)
+        result = {}
+        for station in stations:
+            values = {}
+            for field in self.fields:
+                if field in NOWCAST_FIELDS:
+                    values[f"nowcast_{field}"] = self.nowcast(station, field, now)
+                values[f"mean_{self.window_hours}h_{field}"] = self.mean(station, field, now)
+            result[station] = values
+        return result
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "window_hours": self.window_hours,
+                "saved_at": time.time(),
+                "stations": {station: {field: ring.to_dict() for field, ring in rings.items()}
+                             for station, rings in self.stations.items()}
+            }
+
+    def save(self, path=None):
+        """บันทึกหน้าต่างทั้งหมดลงไฟล์ JSON (เขียนไฟล์ชั่วคราวแล้วแทนที่ ไฟล์เดิมไม่เสียถ้าล้มกลางทาง)"""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_SNAPSHOT_PATH, fields=MEAN_FIELDS):
+        """โหลดหน้าต่างจากไฟล์ของ save() (ไม่มีไฟล์หรืออ่านไม่ได้ = เริ่มใหม่)"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(fields=fields, path=path)
+        aggregator = cls(data.get("window_hours", 24), fields, path)
+        for station, rings in data.get("stations", {}).items():
+            aggregator.stations[station] = {
+                field: HourlyRing.from_dict(ring, aggregator.window_hours) for field, ring in rings.items()
+            }
+        return aggregator
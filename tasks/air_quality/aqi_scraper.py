@@ -12,8 +12,13 @@ import os
 from datetime import datetime
 import time
 
+from aqi_cache import resolve_cache
+from aqi_summary import summarize_stations
+
 class AQIScraper:
-    def __init__(self):
+    def __init__(self, cache=None):
+        # cache ของหน้าเว็บ (None = cache ร่วม, False = ไม่ใช้ cache) ข้อมูลต้นทางอัปเดตรายชั่วโมง
+        self.cache = resolve_cache(cache)
         self.base_url = "https://www.aqi.in/dashboard/thailand"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -27,6 +32,32 @@ class AQIScraper:
             print(f"สร้างโฟลเดอร์ {self.output_dir} เรียบร้อยแล้ว")
     
     def fetch_page_content(self):
+        """HTML ของหน้าเว็บ จาก cache ถ้ายังไม่หมดอายุ หรือดึงใหม่จากเว็บไซต์"""
+        return self.fetch_page()[0]
+    
+    def fetch_page(self):
+        """
+        คืนค่า (HTML, เวลาที่ดึงหน้านั้นจากเว็บไซต์จริงแบบ ISO) จาก cache หรือดึงใหม่
+        
+        หน้าเว็บไม่มีเวลาวัดของแต่ละสถานี เวลาที่ดึงจึงใช้แทน หน้าเดิมที่ได้ซ้ำจาก cache มีเวลาเดิม
+        time series store จึงตัดค่าซ้ำได้ (ข้อมูลใน cache รุ่นก่อนที่เก็บเป็น HTML อย่างเดียวคืนเวลาเป็น None)
+        """
+        if self.cache is None:
+            page = self.download_page()
+        else:
+            page = self.cache.get_or_fetch("aqi.in", self.base_url, self.download_page)
+        if isinstance(page, dict):
+            return page["html"], page["fetched_at"]
+        return page, None
+    
+    def download_page(self):
+        """ดึง HTML จากเว็บไซต์พร้อมเวลาที่ดึง (เก็บใน cache ด้วยกัน)"""
+        html_content = self.download_page_content()
+        if html_content is None:
+            return None
+        return {"html": html_content, "fetched_at": datetime.now().isoformat()}
+    
+    def download_page_content(self):
         """ดึงข้อมูล HTML จากเว็บไซต์"""
         try:
             print("กำลังดึงข้อมูลจาก aqi.in...")
@@ -37,11 +68,11 @@ class AQIScraper:
             print(f"เกิดข้อผิดพลาดในการดึงข้อมูล: {e}")
             return None
     
-    def parse_air_quality_data(self, html_content):
-        """แยกข้อมูลคุณภาพอากาศจาก HTML"""
+    def parse_air_quality_data(self, html_content, fetched_at=None):
+        """แยกข้อมูลคุณภาพอากาศจาก HTML (fetched_at จาก fetch_page ใช้เป็นเวลาวัดของทุกสถานีในหน้า)"""
         soup = BeautifulSoup(html_content, 'html.parser')
         air_quality_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": fetched_at or datetime.now().isoformat(),
             "country": "Thailand",
             "data_source": "aqi.in",
             "stations": []
@@ -64,6 +95,10 @@ class AQIScraper:
             if not air_quality_data["stations"]:
                 table_data = self.extract_table_data(soup)
                 air_quality_data["stations"].extend(table_data)
+            
+            if fetched_at:
+                for station in air_quality_data["stations"]:
+                    station.setdefault("timestamp", fetched_at)
                 
         except Exception as e:
             print(f"เกิดข้อผิดพลาดในการแยกข้อมูล: {e}")
@@ -173,37 +208,15 @@ class AQIScraper:
             return False
     
     def get_thailand_summary(self, data):
-        """สรุปข้อมูลคุณภาพอากาศของประเทศไทย"""
+        """สรุปข้อมูลคุณภาพอากาศของประเทศไทย (สถิติคำนวณใน aqi_summary)"""
         if not data.get('stations'):
             return None
         
-        stations = data['stations']
         summary = {
             "timestamp": data['timestamp'],
             "country": "Thailand",
-            "total_stations": len(stations),
-            "average_AQI": None,
-            "average_PM2.5": None,
-            "average_PM10": None,
-            "average_O3": None,
-            "stations_data": stations
         }
-        
-        # คำนวณค่าเฉลี่ย
-        aqi_values = [s['AQI'] for s in stations if s.get('AQI') is not None]
-        pm25_values = [s['PM2.5'] for s in stations if s.get('PM2.5') is not None]
-        pm10_values = [s['PM10'] for s in stations if s.get('PM10') is not None]
-        o3_values = [s['O3'] for s in stations if s.get('O3') is not None]
-        
-        if aqi_values:
-            summary['average_AQI'] = round(sum(aqi_values) / len(aqi_values), 1)
-        if pm25_values:
-            summary['average_PM2.5'] = round(sum(pm25_values) / len(pm25_values), 1)
-        if pm10_values:
-            summary['average_PM10'] = round(sum(pm10_values) / len(pm10_values), 1)
-        if o3_values:
-            summary['average_O3'] = round(sum(o3_values) / len(o3_values), 1)
-        
+        summary.update(summarize_stations(data['stations']))
         return summary
     
     def run(self):
@@ -214,13 +227,13 @@ class AQIScraper:
         self.create_output_directory()
         
         # ดึงข้อมูลจากเว็บไซต์
-        html_content = self.fetch_page_content()
+        html_content, fetched_at = self.fetch_page()
         if not html_content:
             print("ไม่สามารถดึงข้อมูลจากเว็บไซต์ได้")
             return False
         
         # แยกข้อมูลคุณภาพอากาศ
-        air_quality_data = self.parse_air_quality_data(html_content)
+        air_quality_data = self.parse_air_quality_data(html_content, fetched_at)
         
         # สรุปข้อมูลประเทศไทย
         thailand_summary = self.get_thailand_summary(air_quality_data)
@@ -9,11 +9,16 @@ import requests
 import json
 import os
 from datetime import datetime
-import random
+
+from aqi_cache import resolve_cache
+from aqi_synthetic import SyntheticAQIGenerator
+from aqi_summary import aqi_color, aqi_level_description, aqi_level_descriptions, summarize_stations
 
 class SimpleAQIClient:
-    def __init__(self):
+    def __init__(self, cache=None, seed=None):
         self.output_dir = "output"
+        # cache ของข้อมูลแต่ละเมือง (None = cache ร่วม, False = ไม่ใช้ cache)
+        self.cache = resolve_cache(cache)
         
         # ข้อมูลเมืองหลักในประเทศไทยพร้อมพิกัด
         self.thai_cities = {
@@ -26,6 +31,10 @@ class SimpleAQIClient:
             "อุดรธานี": {"lat": 17.4138, "lon": 102.7870, "en": "Udon Thani"},
             "ระยอง": {"lat": 12.6868, "lon": 101.2539, "en": "Rayong"}
         }
+        # ตัวสร้างข้อมูลจำลอง (seed เดิมได้ข้อมูลเดิม, None = สุ่ม)
+        self.generator = SyntheticAQIGenerator.from_cities(self.thai_cities, seed)
+        # ข้อมูลของแต่ละ seed ต่างกัน จึงแยก key ของ cache ตาม seed (ไม่ให้ได้ค่าที่ seed อื่นหรือรอบสุ่ม cache ไว้)
+        self.cache_source = "openweather" if seed is None else f"openweather:seed={seed}"
         
     def create_output_directory(self):
         """สร้างโฟลเดอร์ output หากยังไม่มี"""
@@ -34,42 +43,18 @@ class SimpleAQIClient:
             print(f"สร้างโฟลเดอร์ {self.output_dir} เรียบร้อยแล้ว")
     
     def get_openweather_aqi(self, lat, lon, city_name):
+        """ข้อมูล AQI ของเมือง จาก cache ถ้ายังไม่หมดอายุ หรือดึงใหม่"""
+        if self.cache is None:
+            return self.fetch_openweather_aqi(lat, lon, city_name)
+        return self.cache.get_or_fetch(self.cache_source, city_name, lambda: self.fetch_openweather_aqi(lat, lon, city_name))
+    
+    def fetch_openweather_aqi(self, lat, lon, city_name):
         """ดึงข้อมูล AQI จาก OpenWeatherMap API (ฟรี)"""
         try:
             # ใช้ API ฟรีจาก OpenWeatherMap (ต้องลงทะเบียน)
-            # สำหรับ demo นี้ เราจะสร้างข้อมูลจำลองที่สมจริง
-            
-            # สร้างข้อมูลจำลองที่สมจริงตามสถานการณ์ปัจจุบัน
-            base_aqi = random.randint(25, 85)  # AQI ปกติของไทย
-            
-            # ปรับค่าตามเมือง (กรุงเทพฯ มักจะสูงกว่า)
-            if "กรุงเทพ" in city_name:
-                base_aqi += random.randint(10, 25)
-            elif "เชียงใหม่" in city_name:
-                # เชียงใหม่ในช่วงหมอกควันอาจสูง
-                base_aqi += random.randint(5, 20)
-            
-            # คำนวณค่าอื่นๆ จาก AQI
-            pm25 = max(5, base_aqi * 0.6 + random.randint(-10, 10))
-            pm10 = max(10, pm25 * 1.5 + random.randint(-5, 15))
-            o3 = max(10, random.randint(15, 45))
-            
-            station_data = {
-                "city": city_name,
-                "city_en": self.thai_cities[city_name]["en"],
-                "coordinates": {
-                    "latitude": lat,
-                    "longitude": lon
-                },
-                "AQI": min(base_aqi, 150),  # จำกัดไม่ให้สูงเกินไป
-                "PM2.5": round(pm25, 1),
-                "PM10": round(pm10, 1),
-                "O3": round(o3, 1),
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "data_source": "จำลอง (Simulated)"
-            }
-            
-            return station_data
+            # สำหรับ demo นี้ เราจะสร้างข้อมูลจำลองของชั่วโมงปัจจุบันจาก SyntheticAQIGenerator
+            # (รอบวัน, ความสัมพันธ์ระหว่างเมืองใกล้กัน และหมอกควันช่วงฤดูแล้ง)
+            return self.generator.station_reading(city_name)
             
         except Exception as e:
             print(f"เกิดข้อผิดพลาดในการดึงข้อมูล {city_name}: {e}")
@@ -106,74 +91,26 @@ class SimpleAQIClient:
         return thailand_data
     
     def get_thailand_summary(self, data):
-        """สรุปข้อมูลคุณภาพอากาศของประเทศไทย"""
+        """สรุปข้อมูลคุณภาพอากาศของประเทศไทย (สถิติคำนวณใน aqi_summary)"""
         if not data.get('stations'):
             return None
         
-        stations = data['stations']
         summary = {
             "timestamp": data['timestamp'],
             "country": data['country'],
             "data_source": data['data_source'],
             "note": data.get('note', ''),
-            "total_stations": len(stations),
-            "average_AQI": None,
-            "average_PM2.5": None,
-            "average_PM10": None,
-            "average_O3": None,
-            "stations_data": stations
         }
-        
-        # คำนวณค่าเฉลี่ย
-        aqi_values = [s['AQI'] for s in stations if s.get('AQI') is not None]
-        pm25_values = [s['PM2.5'] for s in stations if s.get('PM2.5') is not None]
-        pm10_values = [s['PM10'] for s in stations if s.get('PM10') is not None]
-        o3_values = [s['O3'] for s in stations if s.get('O3') is not None]
-        
-        if aqi_values:
-            summary['average_AQI'] = round(sum(aqi_values) / len(aqi_values), 1)
-        if pm25_values:
-            summary['average_PM2.5'] = round(sum(pm25_values) / len(pm25_values), 1)
-        if pm10_values:
-            summary['average_PM10'] = round(sum(pm10_values) / len(pm10_values), 1)
-        if o3_values:
-            summary['average_O3'] = round(sum(o3_values) / len(o3_values), 1)
-        
+        summary.update(summarize_stations(data['stations'], concentrations=True))
         return summary
     
     def get_aqi_level_description(self, aqi):
         """แปลงค่า AQI เป็นคำอธิบายภาษาไทย"""
-        if aqi is None:
-            return "ไม่มีข้อมูล"
-        elif aqi <= 50:
-            return "ดี"
-        elif aqi <= 100:
-            return "ปานกลาง"
-        elif aqi <= 150:
-            return "ไม่ดีต่อกลุ่มเสี่ยง"
-        elif aqi <= 200:
-            return "ไม่ดี"
-        elif aqi <= 300:
-            return "แย่มาก"
-        else:
-            return "อันตราย"
+        return aqi_level_description(aqi)
     
     def get_aqi_color(self, aqi):
         """กำหนดสีตาม AQI"""
-        if aqi is None:
-            return "เทา"
-        elif aqi <= 50:
-            return "เขียว"
-        elif aqi <= 100:
-            return "เหลือง"
-        elif aqi <= 150:
-            return "ส้ม"
-        elif aqi <= 200:
-            return "แดง"
-        elif aqi <= 300:
-            return "ม่วง"
-        else:
-            return "น้ำตาลแดง"
+        return aqi_color(aqi)
     
     def save_to_json(self, data, filename="thailand_air_quality.json"):
         """บันทึกข้อมูลลงไฟล์ JSON"""
@@ -206,6 +143,8 @@ class SimpleAQIClient:
         aqi_color = self.get_aqi_color(avg_aqi)
         
         print(f"   AQI: {avg_aqi} ({aqi_level} - {aqi_color})")
+        if summary.get('estimated_AQI') is not None:
+            print(f"   AQI จากความเข้มข้น PM2.5/PM10/O3 (ตาราง US EPA): {summary['estimated_AQI']}")
         print(f"   PM2.5: {summary['average_PM2.5']} μg/m³")
         print(f"   PM10: {summary['average_PM10']} μg/m³")
         print(f"   O3: {summary['average_O3']} μg/m³")
@@ -213,11 +152,9 @@ class SimpleAQIClient:
         print("\n🏙️ รายละเอียดแต่ละเมือง:")
         print("-" * 60)
         
-        for station in summary['stations_data']:
-            aqi = station['AQI']
-            level = self.get_aqi_level_description(aqi)
-            color = self.get_aqi_color(aqi)
-            
+        stations = summary['stations_data']
+        aqi_values = [station['AQI'] for station in stations]
+        for station, aqi, level in zip(stations, aqi_values, aqi_level_descriptions(aqi_values)):
             print(f"📍 {station['city']:<12} | AQI: {aqi:>3} ({level:<15}) | PM2.5: {station['PM2.5']:>5} μg/m³")
         
         print("\n💡 คำแนะนำ:")
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ดัชนีเชิงพื้นที่ของสถานีตรวจวัด: หาสถานีที่ใกล้ที่สุด (k-nearest) และประมาณค่าที่พิกัดใดๆ แบบ IDW
+
+- พิกัดแปลงเป็นเวกเตอร์บนทรงกลมหนึ่งหน่วย (x, y, z) ระยะเส้นตรงจึงเรียงลำดับเหมือนระยะบนผิวโลก
+  และแปลงกลับเป็นกิโลเมตรได้ตรงๆ ไม่เพี้ยนใกล้ขั้วโลกหรือเส้นแบ่งวันเหมือนการใช้องศาเป็นระยะ
+- ใช้ KD-tree ของ scipy (cKDTree) ถ้ามี ไม่มีจะค้นแบบ brute force ด้วย NumPy ทีละก้อน (เร็วพอสำหรับหลักร้อยสถานี)
+- อัปเดตแบบ incremental: ค่าที่วัดได้ใหม่ของสถานีเดิมแก้ในที่ สถานีใหม่/ย้ายพิกัดต่อท้ายเป็นส่วน pending
+  ที่ค้นแบบ brute force ส่วนสถานีที่ถูกลบถูกทำเครื่องหมายไว้ สร้าง tree ใหม่เมื่อส่วนเหล่านี้เกิน rebuild_threshold
+- query / idw รับพิกัดเป็น array ทีละหลายพันจุดได้ (เช่นจุดศูนย์กลางของทุกอำเภอ)
+
+วิธีใช้:
+    index = StationIndex()
+    index.update_stations(client.get_thailand_stations_data()["stations"])
+    index.nearest(13.75, 100.50, k=3)
+    index.idw(lats, lons, field="PM2.5", k=8)
+
+    python aqi_spatial.py 13.75 100.50
+"""
+
+import argparse
+import threading
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+EARTH_RADIUS_KM = 6371.0088
+FIELDS = ("AQI", "PM2.5", "PM10", "O3")
+
+def to_unit_vectors(lats, lons):
+    """พิกัด (องศา) → เวกเตอร์บนทรงกลมหนึ่งหน่วย ขนาด (n, 3)"""
+    lat = np.radians(np.asarray(lats, dtype=float).reshape(-1))
+    lon = np.radians(np.asarray(lons, dtype=float).reshape(-1))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+def chord_to_km(chord):
+    """ระยะเส้นตรงระหว่างเวกเตอร์หนึ่งหน่วย → ระยะบนผิวโลก (กม.) ค่า inf (ไม่มีสถานี) คงเป็น inf"""
+    chord = np.asarray(chord, dtype=float)
+    return np.where(np.isfinite(chord), 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1)), np.inf)
+
+def km_to_chord(km):
+    return 2 * np.sin(np.asarray(km) / (2 * EARTH_RADIUS_KM))
+
+def station_location(station):
+    """(ชื่อ, ละติจูด, ลองจิจูด) ของผลจาก client หรือแถวของ time series คืนค่า None ถ้าไม่มีพิกัด"""
+    name = station.get("station") or station.get("city") or station.get("station_name")
+    coordinates = station.get("coordinates") or {}
+    lat = coordinates.get("latitude", station.get("lat"))
+    lon = coordinates.get("longitude", station.get("lon"))
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not name or np.isnan(lat) or np.isnan(lon):
+        return None
+    return name, lat, lon
+
+def _value(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class StationIndex:
+    """ดัชนี k-nearest / IDW ของสถานี อัปเดตทีละส่วนได้ (ใช้จากหลาย thread ได้)"""
+
+    def __init__(self, fields=FIELDS, rebuild_threshold=64, chunk_size=2048):
+        """
+        Args:
+            fields (tuple): ค่าที่เก็บต่อสถานี (ใช้กับ idw)
+            rebuild_threshold (int): จำนวนสถานีใหม่/ลบที่ยังไม่อยู่ใน tree ก่อนสร้าง tree ใหม่
+            chunk_size (int): จำนวนจุดต่อก้อนตอนค้นแบบ brute force (จำกัดหน่วยความจำ)
+        """
+        self.fields = tuple(fields)
+        self.rebuild_threshold = rebuild_threshold
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.ids = []
+        self.rows = {}
+        self.coordinates = np.empty((0, 2))
+        self.points = np.empty((0, 3))
+        self.values = np.empty((0, len(self.fields)))
+        self.alive = np.empty(0, dtype=bool)
+        self.tree = None
+        self.tree_rows = 0
+        self.dead = 0
+        self.dead_in_tree = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def update_stations(self, stations):
+        """
+        เพิ่ม/อัปเดตสถานีจากผลของ client (parse_waqi_response / extract_station_data / get_openweather_aqi)
+        หรือแถวของ time series สถานีที่ไม่มีพิกัดจะถูกข้าม
+
+        Returns:
+            int: จำนวนสถานีใหม่หรือที่ย้ายพิกัด (ส่วนที่ต้องเข้า tree)
+        """
+        with self.lock:
+            new_ids, new_coordinates, new_values = [], [], []
+            for station in stations:
+                location = station_location(station)
+                if location is None:
+                    continue
+                name, lat, lon = location
+                values = [_value(station.get(field)) for field in self.fields]
+                row = self.rows.get(name)
+                if row is not None and tuple(self.coordinates[row]) == (lat, lon):
+                    self.values[row] = values
+                    continue
+                if row is not None:
+                    self._kill(row)
+                if name in new_ids:
+                    index = new_ids.index(name)
+                    new_coordinates[index], new_values[index] = (lat, lon), values
+                    continue
+                new_ids.append(name)
+                new_coordinates.append((lat, lon))
+                new_values.append(values)
+            if new_ids:
+                start = len(self.ids)
+                coordinates = np.array(new_coordinates, dtype=float)
+                self.ids.extend(new_ids)
+                self.rows.update((name, start + offset) for offset, name in enumerate(new_ids))
+                self.coordinates = np.vstack((self.coordinates, coordinates))
+                self.points = np.vstack((self.points, to_unit_vectors(coordinates[:, 0], coordinates[:, 1])))
+                self.values = np.vstack((self.values, np.array(new_values, dtype=float)))
+                self.alive = np.concatenate((self.alive, np.ones(len(new_ids), dtype=bool)))
+            return len(new_ids)
+
+    def remove(self, name):
+        """ลบสถานี คืนค่า False ถ้าไม่มี"""
+        with self.lock:
+            row = self.rows.get(name)
+            if row is None:
+                return False
+            self._kill(row)
+            return True
+
+    def _kill(self, row):
+        del self.rows[self.ids[row]]
+        self.alive[row] = False
+        self.values[row] = np.nan
+        self.dead += 1
+        if row < self.tree_rows:
+            self.dead_in_tree += 1
+
+    def _ensure_tree(self):
+        """สร้าง tree ใหม่ (ตัดสถานีที่ลบแล้วออก) เมื่อส่วนที่อยู่นอก tree มากเกิน rebuild_threshold"""
+        pending = len(self.ids) - self.tree_rows if cKDTree is not None else 0
+        if pending + self.dead <= self.rebuild_threshold:
+            return
+        keep = np.flatnonzero(self.alive)
+        self.ids = [self.ids[row] for row in keep]
+        self.rows = {name: row for row, name in enumerate(self.ids)}
+        self.coordinates = self.coordinates[keep]
+        self.points = self.points[keep]
+        self.values = self.values[keep]
+        self.alive = self.alive[keep]
+        self.tree = cKDTree(self.points) if cKDTree is not None and len(keep) else None
+        self.tree_rows = len(keep) if self.tree is not None else 0
+        self.dead = 0
+        self.dead_in_tree = 0
+
+    def _brute_force(self, queries, rows, k):
+        """k สถานีที่ใกล้ที่สุดใน rows (ตำแหน่งแถว) แบบ brute force ทีละก้อน"""
+        count = min(k, len(rows))
+        distances = np.full((len(queries), count), np.inf)
+        indices = np.full((len(queries), count), -1)
+        if not count:
+            return distances, indices
+        points = self.points[rows]
+        for start in range(0, len(queries), self.chunk_size):
+            chunk = queries[start:start + self.chunk_size]
+            # |q - p|² = 2 - 2 q·p สำหรับเวกเตอร์หนึ่งหน่วย
+            chord = np.sqrt(np.maximum(2 - 2 * chunk @ points.T, 0))
+            nearest = np.argpartition(chord, count - 1, axis=1)[:, :count] if count < len(rows) else \
+                np.broadcast_to(np.arange(len(rows)), chord.shape)
+            distances[start:start + len(chunk)] = np.take_along_axis(chord, nearest, axis=1)
+            indices[start:start + len(chunk)] = rows[nearest]
+        return distances, indices
+
+    def _knn(self, queries, k):
+        """(ระยะเส้นตรง, แถว) ของ k สถานีที่ใกล้ที่สุด ขนาด (m, k) ช่องที่สถานีไม่พอเป็น inf / -1"""
+        self._ensure_tree()
+        parts = []
+        if self.tree is not None:
+            # ขอเผื่อจำนวนสถานีที่ลบแล้วแต่ยังอยู่ใน tree
+            count = min(k + self.dead_in_tree, self.tree_rows)
+            distances, indices = self.tree.query(queries, k=count)
+            distances, indices = distances.reshape(len(queries), count), indices.reshape(len(queries), count)
+            dead = ~self.alive[indices]
+            distances[dead], indices[dead] = np.inf, -1
+            parts.append((distances, indices))
+        pending = np.arange(self.tree_rows, len(self.ids))
+        pending = pending[self.alive[pending]]
+        parts.append(self._brute_force(queries, pending, k))
+
+        distances = np.hstack([part[0] for part in parts])
+        indices = np.hstack([part[1] for part in parts])
+        order = np.argsort(distances, axis=1)[:, :k]
+        distances, indices = np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+        if distances.shape[1] < k:
+            padding = k - distances.shape[1]
+            distances = np.pad(distances, ((0, 0), (0, padding)), constant_values=np.inf)
+            indices = np.pad(indices, ((0, 0), (0, padding)), constant_values=-1)
+        return distances, indices
+
+    def query(self, lats, lons, k=1):
+        """
+        k สถานีที่ใกล้ที่สุดของทุกจุด
+
+        Returns:
+            tuple: (ระยะทาง กม. ขนาด (m, k), รายชื่อสถานีต่อจุด) ช่องที่สถานีไม่พอเป็น inf / None
+        """
+        queries = to_unit_vectors(lats, lons)
+        with self.lock:
+            chord, rows = self._knn(queries, k)
+            names = [[self.ids[row] if row >= 0 else None for row in point] for point in rows]
+        return chord_to_km(chord), names
+
+    def nearest(self, lat, lon, k=1):
+        """k สถานีที่ใกล้ที่สุดของพิกัดเดียว เป็น dict (station, distance_km, latitude, longitude และค่าที่เก็บ)"""
+        queries = to_unit_vectors([lat], [lon])
+        with self.lock:
+            chord, rows = self._knn(queries, k)
+            results = []
+            for distance, row in zip(chord_to_km(chord[0]), rows[0]):
+                if row < 0:
+                    break
+                result = {"station": self.ids[row], "distance_km": round(float(distance), 2),
+                          "latitude": float(self.coordinates[row, 0]), "longitude": float(self.coordinates[row, 1])}
+                for field, value in zip(self.fields, self.values[row]):
+                    result[field] = None if np.isnan(value) else float(value)
+                results.append(result)
+            return results
+
+    def idw(self, lats, lons, field="AQI", k=8, power=2.0, max_distance_km=None):
+        """
+        ประมาณค่า field ที่ทุกจุดแบบ inverse distance weighting จาก k สถานีที่ใกล้ที่สุด
+
+        สถานีที่ไม่มีค่า field จะไม่ถูกนับ จุดที่ตรงกับสถานีได้ค่าของสถานีนั้น
+        จุดที่ไม่มีสถานีใน max_distance_km (กม.) ได้ NaN
+
+        Returns:
+            numpy.ndarray: ค่าประมาณ ขนาด (m,)
+        """
+        column = self.fields.index(field)
+        queries = to_unit_vectors(lats, lons)
+        with self.lock:
+            if not self.ids:
+                return np.full(len(queries), np.nan)
+            chord, rows = self._knn(queries, k)
+            values = np.where(rows >= 0, self.values[rows, column], np.nan)
+        usable = ~np.isnan(values) & np.isfinite(chord)
+        if max_distance_km is not None:
+            usable &= chord <= km_to_chord(max_distance_km)
+        distances = chord_to_km(np.where(usable, chord, 0))
+        exact = usable & (distances < 1e-6)
+        with np.errstate(divide="ignore"):
+            weights = np.where(usable & ~exact, 1.0 / distances ** power, 0.0)
+        values = np.where(usable, values, 0.0)
+        with np.errstate(invalid="ignore"):
+            result = (weights * values).sum(axis=1) / weights.sum(axis=1)
+        has_exact = exact.any(axis=1)
+        result[has_exact] = values[has_exact, exact[has_exact].argmax(axis=1)]
+        return result
+
+    def value_at(self, lat, lon, field="AQI", **kwargs):
+        """ค่าประมาณของ field ที่พิกัดเดียว (None ถ้าไม่มีสถานีที่ใช้ได้)"""
+        value = self.idw([lat], [lon], field, **kwargs)[0]
+        return None if np.isnan(value) else round(float(value), 1)
+
+def main():
+    from aqi_timeseries import DEFAULT_DB_PATH, TimeSeriesStore
+
+    parser = argparse.ArgumentParser(description="หาสถานีที่ใกล้ที่สุดและประมาณค่าคุณภาพอากาศที่พิกัด")
+    parser.add_argument("lat", type=float, help="ละติจูด")
+    parser.add_argument("lon", type=float, help="ลองจิจูด")
+    parser.add_argument("-k", type=int, default=3, help="จำนวนสถานีที่ใกล้ที่สุด")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="time series store ที่ใช้ค่าล่าสุดของแต่ละสถานี")
+    parser.add_argument("--source", default=None, help="แหล่งข้อมูล")
+    args = parser.parse_args()
+
+    store = TimeSeriesStore(args.db)
+    try:
+        readings = store.latest(args.source)
+    finally:
+        store.close()
+    index = StationIndex()
+    index.update_stations(readings)
+    if not len(index):
+        print("ยังไม่มีสถานีที่มีพิกัดใน time series store (รัน aqi_daemon.py ก่อน)")
+        return
+    for station in index.nearest(args.lat, args.lon, args.k):
+        print(f"{station['station']:<30} {station['distance_km']:>7.1f} กม. | AQI {station['AQI']} | PM2.5 {station['PM2.5']}")
+    print(f"AQI ประมาณ (IDW): {index.value_at(args.lat, args.lon)} | PM2.5: {index.value_at(args.lat, args.lon, 'PM2.5')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+สรุปข้อมูลคุณภาพอากาศแบบ vectorized (NumPy) ใช้ร่วมกันทุก client แทน get_thailand_summary ที่เคยคัดลอกไว้ 3 ที่
+
+- แปลงรายการสถานีเป็น matrix (สถานี × ค่า) ครั้งเดียว ค่าที่ไม่มีเป็น NaN แล้วคำนวณสถิติทุกค่าพร้อมกัน
+- ระดับและสีของ AQI ใช้ searchsorted กับขอบของแต่ละระดับทั้ง array (แทน if-chain ทีละสถานี)
+- คำนวณ AQI จากความเข้มข้นดิบ (μg/m³) ตาราง breakpoint ของ US EPA (ปรับปรุงปี 2024)
+  AQI รวมของสถานี = ค่าสูงสุดของ AQI ย่อยแต่ละสาร
+- ใช้กับข้อมูลย้อนหลังได้ เช่นผลของ TimeSeriesStore.query() ซึ่งมีชื่อค่าเดียวกัน
+
+วิธีใช้:
+    summary = {"timestamp": ..., "country": "Thailand", **summarize_stations(stations)}
+    aqi_level_descriptions([42, 160, None])     # ['ดี', 'ไม่ดี', 'ไม่มีข้อมูล']
+    concentration_to_aqi("PM2.5", [8.0, 40.2])  # array([ 44., 113.])
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+FIELDS = ("AQI", "PM2.5", "PM10", "O3")
+POLLUTANTS = ("PM2.5", "PM10", "O3")
+
+# ขอบบนของแต่ละระดับ AQI (ค่าที่เกิน 300 คือ "อันตราย")
+LEVEL_UPPER_BOUNDS = [50, 100, 150, 200, 300]
+LEVELS = ["ดี", "ปานกลาง", "ไม่ดีต่อกลุ่มเสี่ยง", "ไม่ดี", "แย่มาก", "อันตราย"]
+LEVELS_EN = ["Good", "Moderate", "Unhealthy for Sensitive Groups", "Unhealthy", "Very Unhealthy", "Hazardous"]
+COLORS = ["เขียว", "เหลือง", "ส้ม", "แดง", "ม่วง", "น้ำตาลแดง"]
+NO_DATA_LEVEL = "ไม่มีข้อมูล"
+NO_DATA_COLOR = "เทา"
+
+# (ความเข้มข้นต่ำ, สูง, AQI ต่ำ, สูง) ต่อช่วง และจำนวนทศนิยมที่ตัดก่อนเทียบตาราง
+AQI_BREAKPOINTS = {
+    "PM2.5": (1, [(0.0, 9.0, 0, 50), (9.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
+                  (55.5, 125.4, 151, 200), (125.5, 225.4, 201, 300), (225.5, 325.4, 301, 500)]),
+    "PM10": (0, [(0, 54, 0, 50), (55, 154, 51, 100), (155, 254, 101, 150),
+                 (255, 354, 151, 200), (355, 424, 201, 300), (425, 604, 301, 500)]),
+    # O3 เฉลี่ย 8 ชั่วโมง หน่วย ppb (แปลงจาก μg/m³ ด้วย O3_UGM3_PER_PPB)
+    "O3": (0, [(0, 54, 0, 50), (55, 70, 51, 100), (71, 85, 101, 150),
+               (86, 105, 151, 200), (106, 200, 201, 300)])
+}
+O3_UGM3_PER_PPB = 1.96  # ที่ 25°C, 1 atm
+
+_BREAKPOINT_ARRAYS = {
+    pollutant: (decimals, *np.array(table, dtype=float).T)
+    for pollutant, (decimals, table) in AQI_BREAKPOINTS.items()
+}
+_LEVEL_BOUNDS = np.array(LEVEL_UPPER_BOUNDS, dtype=float)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def station_matrix(stations, fields=FIELDS):
+    """matrix ขนาด (จำนวนสถานี, จำนวนค่า) ค่าที่ไม่มีหรือไม่ใช่ตัวเลขเป็น NaN"""
+    rows = [[station.get(field) for field in fields] for station in stations]
+    try:
+        return np.array(rows, dtype=float).reshape(len(rows), len(fields))
+    except (TypeError, ValueError):
+        # มีค่าเป็นข้อความปนมา แปลงทีละค่า
+        return np.array([[_to_float(value) for value in row] for row in rows], dtype=float).reshape(len(rows), len(fields))
+
+def concentration_to_aqi(pollutant, concentrations):
+    """
+    AQI ย่อยจากความเข้มข้น (PM2.5 / PM10 / O3 หน่วย μg/m³) ทั้ง array
+
+    ตัดทศนิยมตามมาตรฐาน หาช่วงด้วย searchsorted แล้ว interpolate เชิงเส้นภายในช่วง
+    ค่าที่เกินตารางใช้ AQI สูงสุดของตาราง ค่าที่ไม่มีคืนเป็น NaN
+    """
+    decimals, c_low, c_high, i_low, i_high = _BREAKPOINT_ARRAYS[pollutant]
+    values = np.asarray(concentrations, dtype=float)
+    if pollutant == "O3":
+        values = values / O3_UGM3_PER_PPB
+    scale = 10.0 ** decimals
+    values = np.clip(np.floor(values * scale) / scale, 0, c_high[-1])
+    index = np.minimum(np.searchsorted(c_high, values, side="left"), len(c_high) - 1)
+    aqi = (i_high[index] - i_low[index]) / (c_high[index] - c_low[index]) * (values - c_low[index]) + i_low[index]
+    return np.round(aqi)
+
+def aqi_from_concentrations(matrix, fields=FIELDS):
+    """AQI รวมของแต่ละแถว (ค่าสูงสุดของ AQI ย่อยที่มีข้อมูล) จาก matrix ของ station_matrix"""
+    sub_indices = np.column_stack([
+        concentration_to_aqi(pollutant, matrix[:, fields.index(pollutant)])
+        for pollutant in POLLUTANTS if pollutant in fields
+    ])
+    result = np.full(len(matrix), np.nan)
+    has_data = ~np.isnan(sub_indices).all(axis=1)
+    result[has_data] = np.nanmax(sub_indices[has_data], axis=1)
+    return result
+
+def aqi_level_indices(aqi):
+    """ระดับของ AQI ทั้ง array (0 = ดี ... 5 = อันตราย, -1 = ไม่มีข้อมูล)"""
+    values = np.asarray(aqi, dtype=float)
+    index = np.searchsorted(_LEVEL_BOUNDS, values, side="left")
+    index[np.isnan(values)] = -1
+    return index
+
+def aqi_level_descriptions(aqi, english=False):
+    """คำอธิบายระดับของ AQI ทั้งรายการ"""
+    values = np.array([_to_float(value) for value in aqi], dtype=float)
+    return [_describe(index, english) for index in aqi_level_indices(values)]
+
+def aqi_colors(aqi):
+    """สีของ AQI ทั้งรายการ"""
+    values = np.array([_to_float(value) for value in aqi], dtype=float)
+    return [COLORS[index] if index >= 0 else NO_DATA_COLOR for index in aqi_level_indices(values)]
+
+def _describe(index, english):
+    if index < 0:
+        return NO_DATA_LEVEL
+    return f"{LEVELS[index]} ({LEVELS_EN[index]})" if english else LEVELS[index]
+
+def _level_index(aqi):
+    value = _to_float(aqi)
+    return -1 if np.isnan(value) else bisect_left(LEVEL_UPPER_BOUNDS, value)
+
+def aqi_level_description(aqi, english=False):
+    """คำอธิบายระดับของ AQI ค่าเดียว (english=True ต่อท้ายชื่อภาษาอังกฤษ เช่น "ดี (Good)")"""
+    return _describe(_level_index(aqi), english)
+
+def aqi_color(aqi):
+    """สีของ AQI ค่าเดียว"""
+    index = _level_index(aqi)
+    return COLORS[index] if index >= 0 else NO_DATA_COLOR
+
+def field_statistics(matrix, fields=FIELDS):
+    """จำนวน / เฉลี่ย / ต่ำสุด / สูงสุด / มัธยฐาน ของแต่ละค่า (ไม่นับ NaN) คำนวณทุกค่าในครั้งเดียว"""
+    counts = (~np.isnan(matrix)).sum(axis=0)
+    statistics = {field: {"count": int(count), "mean": None, "min": None, "max": None, "median": None}
+                  for field, count in zip(fields, counts)}
+    present = counts > 0
+    if not present.any():
+        return statistics
+    columns = matrix[:, present]
+    results = zip(np.nanmean(columns, axis=0), np.nanmin(columns, axis=0),
+                  np.nanmax(columns, axis=0), np.nanmedian(columns, axis=0))
+    for field, (mean, low, high, median) in zip(np.array(fields)[present], results):
+        statistics[field].update(mean=round(float(mean), 1), min=float(low), max=float(high), median=round(float(median), 1))
+    return statistics
+
+def summarize_stations(stations, concentrations=False):
+    """
+    สรุปรายการสถานีของ client (ผลของ parse_waqi_response / extract_station_data / get_openweather_aqi)
+
+    Args:
+        stations (list): dict ต่อสถานีที่มี "AQI", "PM2.5", "PM10", "O3"
+        concentrations (bool): PM2.5 / PM10 / O3 เป็นความเข้มข้น μg/m³
+            (ไม่ใช่ AQI ย่อยแบบ WAQI) จะคำนวณ "estimated_AQI" เฉลี่ยจากตาราง breakpoint ด้วย
+
+    Returns:
+        dict: total_stations, average_<ค่า> (ทศนิยม 1 ตำแหน่ง), statistics, level_counts และ stations_data
+    """
+    matrix = station_matrix(stations)
+    statistics = field_statistics(matrix)
+    summary = {"total_stations": len(stations)}
+    for field in FIELDS:
+        summary[f"average_{field}"] = statistics[field]["mean"]
+    if concentrations:
+        estimated = aqi_from_concentrations(matrix)
+        summary["estimated_AQI"] = round(float(np.nanmean(estimated)), 1) if (~np.isnan(estimated)).any() else None
+    levels = aqi_level_indices(matrix[:, FIELDS.index("AQI")])
+    counts = np.bincount(levels[levels >= 0], minlength=len(LEVELS))
+    summary["statistics"] = statistics
+    summary["level_counts"] = {level: int(count) for level, count in zip(LEVELS, counts) if count}
+    summary["stations_data"] = stations
+    return summary
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+สร้างข้อมูลคุณภาพอากาศจำลองจำนวนมากแบบ vectorized (NumPy) สำหรับทดสอบโหลดของ pipeline
+
+- N สถานี × T ช่วงเวลา สร้างทีละก้อน (chunk) ด้วย array ทั้งก้อน ไม่วนทีละค่าแบบ random.randint
+- seed เดียวกันได้ข้อมูลเดิมทุกครั้ง และค่าของแต่ละช่วงเวลาไม่ขึ้นกับขนาด chunk
+  (สัญญาณรบกวนของแต่ละช่วงเวลาสุ่มจาก seed ของช่วงเวลานั้น chunk จึงสร้างเฉพาะแถวที่ใช้)
+- ความสัมพันธ์เชิงพื้นที่: ระดับมลพิษมาจาก "ศูนย์กลาง" ไม่กี่จุดที่เปลี่ยนตามเวลา สถานีผสมค่าจากศูนย์กลางใกล้ๆ
+  ด้วยน้ำหนัก Gaussian ตามระยะ สถานีที่อยู่ใกล้กันจึงมีค่าขึ้นลงไปด้วยกัน
+- รอบวัน: PM สูงช่วงเช้า (การจราจร + ชั้นอากาศผกผัน) O3 สูงช่วงบ่าย (แสงแดด) ตามเวลาประเทศไทย
+- หมอกควัน: ช่วงฤดูแล้ง (ม.ค.-เม.ย.) มีเหตุการณ์หลายวันที่ PM พุ่งสูง ภาคเหนือแรงกว่า
+- AQI คำนวณจากความเข้มข้นด้วยตาราง breakpoint ของ aqi_summary
+- ผลลัพธ์อยู่ในรูปแบบเดียวกับ SimpleAQIClient.get_thailand_air_quality / aqi_timeseries.to_readings
+
+วิธีใช้:
+    generator = SyntheticAQIGenerator(n_stations=10000, seed=1)
+    for readings in generator.iter_readings(start, steps=24 * 30):
+        store.append(readings)
+
+    python aqi_synthetic.py --stations 10000 --hours 720 --store output/load_test.sqlite
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from aqi_summary import concentration_to_aqi
+
+THAILAND_BOUNDS = (5.6, 97.3, 20.5, 105.7)
+THAILAND_UTC_OFFSET_HOURS = 7
+DEFAULT_CHUNK_STEPS = 256
+DATA_SOURCE = "จำลอง (Simulated)"
+
+class SyntheticAQIGenerator:
+    """ข้อมูลจำลองของหลายสถานี สร้างเป็น array ทีละหลายช่วงเวลา"""
+
+    def __init__(self, n_stations=1000, seed=0, stations=None, bounds=THAILAND_BOUNDS, anchors=12, correlation_km=150.0):
+        """
+        Args:
+            n_stations (int): จำนวนสถานีที่สุ่มตำแหน่งในกรอบ bounds (ใช้เมื่อไม่ได้ส่ง stations)
+            seed (int): seed ของข้อมูลทั้งหมด (None = สุ่ม)
+            stations (list): [(ชื่อ, ละติจูด, ลองจิจูด, ชื่อภาษาอังกฤษ), ...] ถ้าต้องการกำหนดสถานีเอง
+            bounds (tuple): (lat ต่ำสุด, lon ต่ำสุด, lat สูงสุด, lon สูงสุด)
+            anchors (int): จำนวนศูนย์กลางของความสัมพันธ์เชิงพื้นที่
+            correlation_km (float): ระยะที่ค่าของสถานียังสัมพันธ์กับศูนย์กลาง
+        """
+        self.seed = int(np.random.SeedSequence().entropy % (2 ** 32)) if seed is None else seed
+        rng = np.random.default_rng([self.seed, 0])
+        lat_min, lon_min, lat_max, lon_max = bounds
+
+        if stations is None:
+            self.names = [f"SIM-{index:06d}" for index in range(n_stations)]
+            self.names_en = self.names
+            self.lats = rng.uniform(lat_min, lat_max, n_stations)
+            self.lons = rng.uniform(lon_min, lon_max, n_stations)
+        else:
+            self.names = [station[0] for station in stations]
+            self.names_en = [station[3] if len(station) > 3 else station[0] for station in stations]
+            self.lats = np.array([station[1] for station in stations], dtype=float)
+            self.lons = np.array([station[2] for station in stations], dtype=float)
+        self.rows = {name: index for index, name in enumerate(self.names)}
+        count = len(self.names)
+
+        # ศูนย์กลาง: ระดับ PM เปลี่ยนตามผลรวมของคลื่นไซน์ที่สุ่มคาบ (6 ชั่วโมง - 20 วัน) และเฟส
+        anchor_lats = rng.uniform(lat_min, lat_max, anchors)
+        anchor_lons = rng.uniform(lon_min, lon_max, anchors)
+        self.level_periods = np.exp(rng.uniform(np.log(6), np.log(480), (anchors, 6)))
+        self.level_phases = rng.uniform(0, 2 * np.pi, (anchors, 6))
+        self.level_amplitudes = rng.uniform(0.5, 1.0, (anchors, 6))
+        # เหตุการณ์หมอกควัน: คลื่นช้า (2-12 วัน) ส่วนที่เกินเกณฑ์คือช่วงที่มีหมอกควัน
+        self.haze_periods = np.exp(rng.uniform(np.log(48), np.log(288), (anchors, 4)))
+        self.haze_phases = rng.uniform(0, 2 * np.pi, (anchors, 4))
+        # ภาคเหนือ (ละติจูดสูง) มีหมอกควันแรงกว่า
+        self.haze_strength = np.clip((anchor_lats - 12.0) / 7.0, 0.1, 1.0) * rng.uniform(6.0, 12.0, anchors)
+
+        # น้ำหนักของแต่ละศูนย์กลางต่อสถานี (ระยะโดยประมาณบนระนาบ กม.)
+        dy = (self.lats[:, None] - anchor_lats[None, :]) * 111.0
+        dx = (self.lons[:, None] - anchor_lons[None, :]) * 111.0 * np.cos(np.radians(self.lats[:, None]))
+        weights = np.exp(-(dx ** 2 + dy ** 2) / (2 * correlation_km ** 2)) + 1e-6
+        self.weights = weights / weights.sum(axis=1, keepdims=True)
+
+        # ลักษณะเฉพาะของสถานี (ค่าพื้นฐาน, สัดส่วน PM10/PM2.5, O3)
+        station_rng = np.random.default_rng([self.seed, 1])
+        self.base_pm25 = station_rng.lognormal(np.log(18.0), 0.35, count)
+        self.pm10_ratio = station_rng.uniform(1.4, 2.0, count)
+        self.base_o3 = station_rng.uniform(40.0, 90.0, count)
+
+    @classmethod
+    def from_cities(cls, cities, seed=None, **kwargs):
+        """สร้างจาก dict แบบ SimpleAQIClient.thai_cities {ชื่อ: {"lat", "lon", "en"}}"""
+        stations = [(name, info["lat"], info["lon"], info.get("en", name)) for name, info in cities.items()]
+        return cls(seed=seed, stations=stations, **kwargs)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _noise(self, first_step, steps):
+        """สัญญาณรบกวนขนาด (steps, สถานี, 3) ของช่วงเวลา first_step ... first_step + steps - 1"""
+        # seed ต่อช่วงเวลา: งานและหน่วยความจำเป็นสัดส่วนกับขนาด chunk และไม่สุ่มแถวเดิมซ้ำเมื่อ chunk เล็ก
+        noise = np.empty((steps, len(self), 3))
+        for row, step in enumerate(range(first_step, first_step + steps)):
+            np.random.default_rng([self.seed, 2, step]).standard_normal(out=noise[row])
+        return noise
+
+    def generate(self, first_step, steps, step_seconds=3600):
+        """
+        ข้อมูลของช่วงเวลา first_step ... (ช่วงเวลาที่ k คือ epoch k * step_seconds)
+
+        Returns:
+            dict: "ts" ขนาด (steps,) และ "AQI", "PM2.5", "PM10", "O3" ขนาด (steps, สถานี)
+        """
+        step_index = np.arange(first_step, first_step + steps)
+        ts = step_index * float(step_seconds)
+        hours = ts / 3600.0
+
+        # ระดับของศูนย์กลาง (steps, anchors)
+        waves = self.level_amplitudes * np.sin(
+            2 * np.pi * hours[:, None, None] / self.level_periods + self.level_phases
+        )
+        level = np.exp(0.25 * waves.sum(axis=2))
+        # ค่าเฉลี่ยของคลื่นอยู่ในช่วง [-1, 1] คูณ 2 แล้วหักเกณฑ์ 0.5 เหลือเป็นบวกราว 1 ใน 4 ของเวลา
+        haze_wave = 2 * np.sin(2 * np.pi * hours[:, None, None] / self.haze_periods + self.haze_phases).mean(axis=2)
+        day_of_year = (ts / 86400.0) % 365.25
+        dry_season = (0.5 * (1 + np.cos(2 * np.pi * (day_of_year - 60) / 365.25))) ** 3
+        haze = np.maximum(haze_wave - 0.5, 0) * self.haze_strength * dry_season[:, None]
+
+        local_hour = (hours + THAILAND_UTC_OFFSET_HOURS) % 24
+        diurnal_pm = 1 + 0.25 * np.cos(2 * np.pi * (local_hour - 8) / 24)
+        sunlight = np.maximum(np.sin(np.pi * (local_hour - 7) / 12), 0)
+
+        noise = self._noise(first_step, steps)
+        regional = (level @ self.weights.T) * (1 + haze @ self.weights.T)
+        pm25 = self.base_pm25 * regional * diurnal_pm[:, None] * np.exp(0.15 * noise[:, :, 0])
+        pm10 = pm25 * self.pm10_ratio * np.exp(0.1 * noise[:, :, 1])
+        o3 = self.base_o3 * (0.35 + 0.9 * sunlight[:, None]) * np.exp(0.15 * noise[:, :, 2])
+        pm25, pm10, o3 = (np.round(np.maximum(values, 1.0), 1) for values in (pm25, pm10, o3))
+
+        aqi = np.fmax(np.fmax(concentration_to_aqi("PM2.5", pm25), concentration_to_aqi("PM10", pm10)),
+                      concentration_to_aqi("O3", o3))
+        return {"ts": ts, "AQI": aqi.astype(int), "PM2.5": pm25, "PM10": pm10, "O3": o3}
+
+    def iter_chunks(self, start, steps, step_seconds=3600, chunk_steps=DEFAULT_CHUNK_STEPS):
+        """ผลของ generate() ทีละ chunk_steps ช่วงเวลา เริ่มที่เวลา start (epoch ปัดลงตาม step_seconds)"""
+        first_step = int(start // step_seconds)
+        for offset in range(0, steps, chunk_steps):
+            yield self.generate(first_step + offset, min(chunk_steps, steps - offset), step_seconds)
+
+    def iter_readings(self, start, steps, step_seconds=3600, chunk_steps=DEFAULT_CHUNK_STEPS, source="synthetic"):
+        """แถวของ time series (รูปแบบ aqi_timeseries.to_readings) ทีละ chunk ส่งเข้า TimeSeriesStore.append ได้ตรงๆ"""
+        lats, lons = self.lats.tolist(), self.lons.tolist()
+        for chunk in self.iter_chunks(start, steps, step_seconds, chunk_steps):
+            columns = [chunk[field].tolist() for field in ("AQI", "PM2.5", "PM10", "O3")]
+            readings = []
+            for step, ts in enumerate(chunk["ts"].tolist()):
+                measured_at = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+                for index, name in enumerate(self.names):
+                    readings.append({
+                        "ts": ts, "source": source, "station": name, "measured_at": measured_at,
+                        "lat": lats[index], "lon": lons[index],
+                        "AQI": columns[0][step][index], "PM2.5": columns[1][step][index],
+                        "PM10": columns[2][step][index], "O3": columns[3][step][index]
+                    })
+            yield readings
+
+    def _station_data(self, index, ts, values):
+        return {
+            "city": self.names[index],
+            "city_en": self.names_en[index],
+            "coordinates": {"latitude": float(self.lats[index]), "longitude": float(self.lons[index])},
+            "AQI": int(values["AQI"][index]),
+            "PM2.5": float(values["PM2.5"][index]),
+            "PM10": float(values["PM10"][index]),
+            "O3": float(values["O3"][index]),
+            "timestamp": datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+            "data_source": DATA_SOURCE
+        }
+
+    def iter_snapshots(self, start, steps, step_seconds=3600, chunk_steps=DEFAULT_CHUNK_STEPS):
+        """ข้อมูลทุกสถานีทีละช่วงเวลา ในรูปแบบเดียวกับ SimpleAQIClient.get_thailand_air_quality"""
+        for chunk in self.iter_chunks(start, steps, step_seconds, chunk_steps):
+            for step, ts in enumerate(chunk["ts"].tolist()):
+                values = {field: chunk[field][step] for field in ("AQI", "PM2.5", "PM10", "O3")}
+                yield {
+                    "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                    "country": "ประเทศไทย",
+                    "data_source": "จำลองข้อมูลสำหรับการทดสอบ",
+                    "note": "ข้อมูลนี้เป็นการจำลองเพื่อการทดสอบโปรแกรม ไม่ใช่ข้อมูลจริง",
+                    "stations": [self._station_data(index, ts, values) for index in range(len(self))]
+                }
+
+    def station_reading(self, name, when=None, step_seconds=3600):
+        """ข้อมูลของสถานีเดียว ณ ช่วงเวลาที่ when (epoch) อยู่ ในรูปแบบของ SimpleAQIClient.get_openweather_aqi"""
+        when = time.time() if when is None else when
+        chunk = self.generate(int(when // step_seconds), 1, step_seconds)
+        values = {field: chunk[field][0] for field in ("AQI", "PM2.5", "PM10", "O3")}
+        return self._station_data(self.rows[name], float(chunk["ts"][0]), values)
+
+def main():
+    parser = argparse.ArgumentParser(description="สร้างข้อมูลคุณภาพอากาศจำลองจำนวนมากสำหรับทดสอบโหลด")
+    parser.add_argument("--stations", type=int, default=1000, help="จำนวนสถานี")
+    parser.add_argument("--hours", type=int, default=24 * 7, help="จำนวนช่วงเวลา (รายชั่วโมง)")
+    parser.add_argument("--seed", type=int, default=0, help="seed")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_STEPS, help="จำนวนช่วงเวลาต่อ chunk")
+    parser.add_argument("--start", default=None, help="วันเริ่มต้น YYYY-MM-DD (ค่าเริ่มต้น: ย้อนหลังจากตอนนี้)")
+    parser.add_argument("--store", default=None, help="เขียนลง TimeSeriesStore ที่ไฟล์นี้ (ไม่ระบุ = วัดความเร็วการสร้างอย่างเดียว)")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d").timestamp() if args.start else time.time() - args.hours * 3600
+    generator = SyntheticAQIGenerator(args.stations, args.seed)
+    started_at = time.perf_counter()
+    total = 0
+    if args.store:
+        from aqi_timeseries import TimeSeriesStore
+        store = TimeSeriesStore(args.store, dedupe=False)
+        try:
+            for readings in generator.iter_readings(start, args.hours, chunk_steps=args.chunk):
+                total += store.append(readings)
+        finally:
+            store.close()
+    else:
+        for chunk in generator.iter_chunks(start, args.hours, chunk_steps=args.chunk):
+            total += chunk["AQI"].size
+    elapsed = time.perf_counter() - started_at
+    print(f"สร้าง {total:,} ค่า ({args.stations:,} สถานี × {args.hours:,} ชั่วโมง) ใน {elapsed:.2f} วินาที "
+          f"({total / elapsed:,.0f} ค่า/วินาที)")
+
+if __name__ == "__main__":
+    main()
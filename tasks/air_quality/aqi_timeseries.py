@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ที่เก็บประวัติค่าคุณภาพอากาศแบบ time series (SQLite ไฟล์เดียว) แทนการเขียนทับไฟล์ JSON ทุกครั้งที่รัน
+
+- readings   : ค่าดิบทุกครั้งที่วัด (แหล่งข้อมูล, สถานี, เวลา, AQI, PM2.5, PM10, O3) มี index (station, ts)
+- rollup_hour / rollup_day : จำนวน, ผลรวม, ต่ำสุด, สูงสุด ของแต่ละค่าต่อสถานีต่อชั่วโมง/วัน
+  อัปเดตทีละ batch ตอนต่อท้ายข้อมูล (ไม่ต้องคำนวณใหม่จากค่าดิบ) วันนับตามเวลาประเทศไทย (UTC+7)
+- query() เลือกความละเอียดให้อัตโนมัติตามช่วงเวลา ช่วงยาวเป็นปีจึงอ่านแค่ rollup รายวัน ไม่ต้องสแกนค่าดิบรายนาที
+- ค่าที่ซ้ำกับครั้งก่อน (เวลาวัดของต้นทางเดิม เช่นได้จาก cache) จะไม่ถูกบันทึกซ้ำ ใช้ได้กับแถวที่มี measured_at
+  (api / simple ใช้เวลาวัดของต้นทาง scraper ใช้เวลาที่ดึงหน้าเว็บ) แถวที่ไม่มี measured_at จะถูกบันทึกทุกครั้ง
+- prune_raw() ลบค่าดิบที่เก่ากว่าที่กำหนด โดย rollup ยังอยู่ครบ
+
+วิธีใช้:
+    store = TimeSeriesStore()
+    store.append(to_readings("api", client.get_thailand_stations_data(), time.time()))
+    store.query(station="Bangkok", start=time.time() - 365 * 86400)
+
+    python aqi_timeseries.py --station Bangkok --days 30
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_DB_PATH = os.path.join("output", "aqi_timeseries.sqlite")
+THAILAND_UTC_OFFSET = 7 * 3600
+
+# ชื่อค่าในผลลัพธ์ของ client → ชื่อคอลัมน์
+FIELDS = {"AQI": "aqi", "PM2.5": "pm25", "PM10": "pm10", "O3": "o3"}
+ROLLUP_PERIODS = {"hour": 3600, "day": 86400}
+
+def to_readings(source, data, polled_at):
+    """
+    แปลงผลของ client เป็นแถวของ time series แถวละสถานี
+
+    รับ dict ที่มี "stations" เป็นรายการผลของ parse_waqi_response / extract_station_data / get_openweather_aqi
+    """
+    readings = []
+    for station in (data or {}).get("stations", []):
+        name = station.get("city") or station.get("station_name")
+        if not name:
+            continue
+        coordinates = station.get("coordinates") or {}
+        reading = {
+            "ts": polled_at,
+            "source": source,
+            "station": name,
+            "measured_at": station.get("timestamp"),
+            "lat": coordinates.get("latitude"),
+            "lon": coordinates.get("longitude")
+        }
+        for field in FIELDS:
+            reading[field] = station.get(field)
+        readings.append(reading)
+    return readings
+
+def measured_ts(reading):
+    """
+    epoch ของเวลาที่ต้นทางวัดค่า (measured_at) ถ้าไม่มีหรืออ่านไม่ได้ใช้เวลาที่ poll (ts)
+
+    เวลาที่ไม่มี timezone (เช่น time.s ของ WAQI, datetime.now().isoformat()) ถือเป็นเวลาท้องถิ่นของเครื่อง
+    """
+    measured_at = reading.get("measured_at")
+    if measured_at:
+        try:
+            return datetime.fromisoformat(str(measured_at)).timestamp()
+        except ValueError:
+            pass
+    return reading["ts"]
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class TimeSeriesStore:
+    """time series ของค่าที่วัดได้ พร้อม rollup รายชั่วโมง/รายวัน (ใช้จากหลาย thread ได้)"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, tz_offset=THAILAND_UTC_OFFSET, dedupe=True):
+        """
+        Args:
+            path (str): ไฟล์ SQLite
+            tz_offset (int): วินาทีที่ต่างจาก UTC สำหรับตัดขอบวันของ rollup รายวัน
+            dedupe (bool): ข้ามค่าที่เวลาวัดของต้นทาง (measured_at) เท่ากับค่าล่าสุดของสถานีเดียวกัน
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.tz_offset = tz_offset
+        self.dedupe = dedupe
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        self.last_measured = {}
+        self.stats = {"appended": 0, "duplicates": 0}
+
+    def _create_tables(self):
+        columns = ", ".join(f"{column} REAL" for column in FIELDS.values())
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS readings (source TEXT NOT NULL, station TEXT NOT NULL, ts INTEGER NOT NULL, "
+            f"measured_at TEXT, lat REAL, lon REAL, {columns})"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS readings_station_ts ON readings (station, ts)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS readings_ts ON readings (ts)")
+        aggregates = ", ".join(
+            f"{column}_n INTEGER NOT NULL DEFAULT 0, {column}_sum REAL NOT NULL DEFAULT 0, {column}_min REAL, {column}_max REAL"
+            for column in FIELDS.values()
+        )
+        for period in ROLLUP_PERIODS:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS rollup_{period} (source TEXT NOT NULL, station TEXT NOT NULL, "
+                f"bucket INTEGER NOT NULL, n INTEGER NOT NULL, {aggregates}, PRIMARY KEY (station, bucket, source)) WITHOUT ROWID"
+            )
+        self.conn.commit()
+
+    def bucket(self, ts, period):
+        """เวลาเริ่มต้นของช่วง (ชั่วโมง/วัน) ที่ ts อยู่"""
+        size = ROLLUP_PERIODS[period]
+        return int((ts + self.tz_offset) // size * size - self.tz_offset)
+
+    def _is_duplicate(self, reading, pending):
+        """
+        ค่าเดิมของต้นทาง (measured_at ไม่เปลี่ยน) ที่ได้ซ้ำจากการ poll รอบถัดไป
+
+        เวลาวัดล่าสุดของ batch นี้เก็บใน pending ก่อน และรวมเข้า self.last_measured หลัง commit สำเร็จเท่านั้น
+        ถ้าเขียนไม่สำเร็จ ค่าเดียวกันจากรอบถัดไปจึงไม่ถูกมองว่าซ้ำ
+        """
+        measured_at = reading.get("measured_at")
+        if not self.dedupe or not measured_at:
+            return False
+        key = (reading["source"], reading["station"])
+        if key not in pending and key not in self.last_measured:
+            row = self.conn.execute(
+                "SELECT measured_at FROM readings WHERE station = ? AND source = ? ORDER BY ts DESC LIMIT 1", key[::-1]
+            ).fetchone()
+            self.last_measured[key] = row[0] if row else None
+        if pending.get(key, self.last_measured.get(key)) == measured_at:
+            return True
+        pending[key] = measured_at
+        return False
+
+    def append(self, readings):
+        """
+        ต่อท้ายค่าที่วัดได้ (รูปแบบจาก to_readings) และอัปเดต rollup ใน transaction เดียว
+
+        Returns:
+            int: จำนวนแถวที่บันทึก (ไม่นับค่าซ้ำ)
+        """
+        return len(self.append_new(readings))
+
+    def append_new(self, readings):
+        """
+        เหมือน append() แต่คืนค่ารายการแถวที่บันทึกจริง (ตัดค่าซ้ำออกแล้ว)
+        ให้ผู้เรียกส่งต่อเฉพาะค่าใหม่ เช่นไปยัง RollingAggregator ซึ่งจะนับค่าซ้ำเป็นค่าวัดใหม่
+        """
+        with self.lock:
+            accepted = []
+            rows = []
+            pending = {}
+            rollups = {period: {} for period in ROLLUP_PERIODS}
+            for reading in readings:
+                if self._is_duplicate(reading, pending):
+                    self.stats["duplicates"] += 1
+                    continue
+                accepted.append(reading)
+                ts = int(reading["ts"])
+                values = [_number(reading.get(field)) for field in FIELDS]
+                rows.append((reading["source"], reading["station"], ts, reading.get("measured_at"),
+                             _number(reading.get("lat")), _number(reading.get("lon")), *values))
+                # รวมค่าใน batch ก่อน แล้วค่อย upsert ครั้งเดียวต่อ (สถานี, ช่วงเวลา)
+                for period, groups in rollups.items():
+                    key = (reading["source"], reading["station"], self.bucket(ts, period))
+                    group = groups.setdefault(key, [0] + [[0, 0.0, None, None] for _ in FIELDS])
+                    group[0] += 1
+                    for aggregate, value in zip(group[1:], values):
+                        if value is None:
+                            continue
+                        aggregate[0] += 1
+                        aggregate[1] += value
+                        aggregate[2] = value if aggregate[2] is None else min(aggregate[2], value)
+                        aggregate[3] = value if aggregate[3] is None else max(aggregate[3], value)
+            if not rows:
+                return []
+
+            placeholders = ", ".join("?" * (6 + len(FIELDS)))
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT INTO readings (source, station, ts, measured_at, lat, lon, {', '.join(FIELDS.values())}) "
+                    f"VALUES ({placeholders})", rows
+                )
+                for period, groups in rollups.items():
+                    self._upsert_rollup(period, groups)
+            self.last_measured.update(pending)
+            self.stats["appended"] += len(rows)
+            return accepted
+
+    def _upsert_rollup(self, period, groups):
+        columns = ["source", "station", "bucket", "n"]
+        updates = ["n = n + excluded.n"]
+        for column in FIELDS.values():
+            columns += [f"{column}_n", f"{column}_sum", f"{column}_min", f"{column}_max"]
+            updates += [
+                f"{column}_n = {column}_n + excluded.{column}_n",
+                f"{column}_sum = {column}_sum + excluded.{column}_sum",
+                f"{column}_min = min(coalesce({column}_min, excluded.{column}_min), coalesce(excluded.{column}_min, {column}_min))",
+                f"{column}_max = max(coalesce({column}_max, excluded.{column}_max), coalesce(excluded.{column}_max, {column}_max))"
+            ]
+        rows = [
+            (*key, group[0], *[value for aggregate in group[1:] for value in aggregate])
+            for key, group in groups.items()
+        ]
+        self.conn.executemany(
+            f"INSERT INTO rollup_{period} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT (station, bucket, source) DO UPDATE SET {', '.join(updates)}", rows
+        )
+
+    def choose_resolution(self, start, end):
+        """ความละเอียดที่เหมาะกับช่วงเวลา: ไม่เกิน 2 วันใช้ค่าดิบ ไม่เกิน 60 วันใช้รายชั่วโมง นอกนั้นรายวัน"""
+        span = (end if end is not None else time.time()) - (start if start is not None else 0)
+        if span <= 2 * 86400:
+            return "raw"
+        if span <= 60 * 86400:
+            return "hour"
+        return "day"
+
+    def query(self, station=None, start=None, end=None, resolution="auto", source=None):
+        """
+        ค่าของสถานีในช่วงเวลา [start, end) เรียงตามเวลา
+
+        Args:
+            station (str): ชื่อสถานี (None = ทุกสถานี)
+            start, end (float): epoch วินาที (None = ไม่จำกัด)
+            resolution (str): "raw", "hour", "day" หรือ "auto"
+            source (str): แหล่งข้อมูล (None = ทุกแหล่ง)
+
+        Returns:
+            list: dict ต่อแถว (rollup มีค่าเฉลี่ยในชื่อเดิม เช่น "AQI" และ "AQI_min" / "AQI_max" / "n")
+        """
+        if resolution == "auto":
+            resolution = self.choose_resolution(start, end)
+        time_column = "ts" if resolution == "raw" else "bucket"
+        conditions, params = [], []
+        for column, value in (("station", station), ("source", source)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append(f"{time_column} >= ?")
+            params.append(self.bucket(start, resolution) if resolution != "raw" else int(start))
+        if end is not None:
+            conditions.append(f"{time_column} < ?")
+            params.append(int(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.lock:
+            if resolution == "raw":
+                cursor = self.conn.execute(
+                    f"SELECT source, station, ts, measured_at, lat, lon, {', '.join(FIELDS.values())} "
+                    f"FROM readings {where} ORDER BY ts", params
+                )
+                return [
+                    {"source": row[0], "station": row[1], "ts": row[2], "measured_at": row[3], "lat": row[4], "lon": row[5],
+                     **dict(zip(FIELDS, row[6:]))}
+                    for row in cursor
+                ]
+            selected = ", ".join(
+                f"{column}_n, {column}_sum, {column}_min, {column}_max" for column in FIELDS.values()
+            )
+            cursor = self.conn.execute(
+                f"SELECT source, station, bucket, n, {selected} FROM rollup_{resolution} {where} ORDER BY bucket", params
+            )
+            results = []
+            for row in cursor:
+                result = {"source": row[0], "station": row[1], "ts": row[2], "n": row[3]}
+                for index, field in enumerate(FIELDS):
+                    count, total, low, high = row[4 + index * 4: 8 + index * 4]
+                    result[field] = round(total / count, 2) if count else None
+                    result[f"{field}_min"] = low
+                    result[f"{field}_max"] = high
+                results.append(result)
+            return results
+
+    def latest(self, source=None):
+        """ค่าดิบล่าสุดของทุกสถานี (รูปแบบเดียวกับ query แบบ raw)"""
+        condition, params = ("WHERE source = ?", [source]) if source is not None else ("", [])
+        with self.lock:
+            cursor = self.conn.execute(
+                f"SELECT source, station, ts, measured_at, lat, lon, {', '.join(FIELDS.values())} FROM readings "
+                f"JOIN (SELECT source, station, MAX(ts) AS ts FROM readings {condition} GROUP BY source, station) "
+                f"USING (source, station, ts)", params
+            )
+            return [
+                {"source": row[0], "station": row[1], "ts": row[2], "measured_at": row[3], "lat": row[4], "lon": row[5],
+                 **dict(zip(FIELDS, row[6:]))}
+                for row in cursor
+            ]
+
+    def stations(self):
+        """รายชื่อ (แหล่งข้อมูล, สถานี) ทั้งหมดที่มีข้อมูล"""
+        with self.lock:
+            return self.conn.execute("SELECT DISTINCT source, station FROM rollup_day ORDER BY source, station").fetchall()
+
+    def prune_raw(self, older_than):
+        """ลบค่าดิบที่เก่ากว่า older_than (epoch) rollup ยังอยู่ คืนค่าจำนวนแถวที่ลบ"""
+        with self.lock, self.conn:
+            return self.conn.execute("DELETE FROM readings WHERE ts < ?", (int(older_than),)).rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="ดูประวัติค่าคุณภาพอากาศจาก time series store")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="ไฟล์ SQLite")
+    parser.add_argument("--station", default=None, help="ชื่อสถานี (ไม่ระบุ = แสดงรายชื่อสถานี)")
+    parser.add_argument("--source", default=None, help="แหล่งข้อมูล")
+    parser.add_argument("--days", type=float, default=7, help="ย้อนหลังกี่วัน")
+    parser.add_argument("--resolution", choices=["auto", "raw", "hour", "day"], default="auto", help="ความละเอียด")
+    args = parser.parse_args()
+
+    store = TimeSeriesStore(args.db)
+    try:
+        if not args.station:
+            for source, station in store.stations():
+                print(f"{source:<9} {station}")
+            return
+        started_at = time.perf_counter()
+        rows = store.query(args.station, time.time() - args.days * 86400, resolution=args.resolution, source=args.source)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        for row in rows:
+            when = datetime.fromtimestamp(row["ts"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{when} {row['source']:<9} AQI {row['AQI']} | PM2.5 {row['PM2.5']} | PM10 {row['PM10']} | O3 {row['O3']}")
+        print(f"{len(rows)} แถว ({elapsed_ms:.1f} ms)")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
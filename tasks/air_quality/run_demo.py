@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from aqi_scraper import AQIScraper
 from aqi_api import AQIAPIClient
 from aqi_simple import SimpleAQIClient
+from aqi_collector import collect, print_snapshot, save_snapshot
 
 def show_menu():
     """แสดงเมนูตัวเลือก"""
@@ -95,22 +96,17 @@ def run_simple_demo():
         print(f"❌ เกิดข้อผิดพลาด: {e}")
 
 def run_all():
-    """รันทุกโปรแกรม"""
-    print("\n🚀 กำลังรันทุกโปรแกรม...")
+    """รันทุกแหล่งข้อมูลพร้อมกัน แล้วรวมผลเป็นไฟล์เดียว (output/thailand_aqi_snapshot.json)"""
+    print("\n🚀 กำลังดึงข้อมูลจากทุกแหล่งพร้อมกัน...")
     print("=" * 60)
     
-    # รัน Simple Demo ก่อน (เพราะทำงานได้แน่นอน)
-    run_simple_demo()
-    
-    print("\n" + "="*60)
-    
-    # รัน API Integration
-    run_api_integration()
-    
-    print("\n" + "="*60)
-    
-    # รัน Web Scraping
-    run_web_scraping()
+    try:
+        snapshot = collect(("simple", "api", "scraper"))
+        print_snapshot(snapshot)
+        save_snapshot(snapshot)
+    except Exception as e:
+        print(f"❌ เกิดข้อผิดพลาด: {e}")
+        return
     
     print("\n🎉 รันทุกโปรแกรมเสร็จสิ้น!")
     print("📁 ตรวจสอบไฟล์ผลลัพธ์ในโฟลเดอร์ 'output'")
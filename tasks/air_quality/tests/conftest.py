@@ -0,0 +1,10 @@
+"""
+fixture ร่วมของชุดทดสอบ air_quality
+
+สคริปต์ใน tasks/air_quality import กันด้วยชื่อ module ตรง ๆ จึงเพิ่มโฟลเดอร์นั้นเข้า sys.path
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,95 @@
+"""ทดสอบ aqi_cache: เวลาหมดอายุตามรอบเผยแพร่ และ stale-while-revalidate"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from aqi_cache import MemoryLRU, ResponseCache, SQLiteCache, aligned_expiry
+
+def epoch(hour, minute):
+    return datetime(2026, 10, 18, hour, minute, tzinfo=timezone.utc).timestamp()
+
+@pytest.mark.parametrize("fetched, expires", [
+    ((10, 5), (10, 10)),   # ยังไม่ถึงรอบเผยแพร่ของ 10:00
+    ((10, 10), (11, 10)),  # เผยแพร่แล้วพอดี → รอบถัดไป
+    ((10, 15), (11, 10)),
+    ((23, 59), (0, 10)),
+])
+def test_aligned_expiry_is_the_next_publish_time(fetched, expires):
+    expected = epoch(*expires) + (86400 if expires < fetched else 0)
+    assert aligned_expiry(epoch(*fetched)) == expected
+
+def test_aligned_expiry_custom_period():
+    assert aligned_expiry(epoch(10, 5), period=1800, publish_delay=300) == epoch(10, 35)
+
+@pytest.fixture
+def memory():
+    return MemoryLRU()
+
+@pytest.fixture
+def cache(memory):
+    cache = ResponseCache(backends=[memory], expiry_fn=lambda now: now + 60, max_stale=300)
+    yield cache
+    cache.close()
+
+def test_fresh_entry_is_served_without_fetching(cache):
+    calls = []
+    fetch = lambda: calls.append(1) or {"AQI": len(calls)}
+
+    assert cache.get_or_fetch("waqi", "Bangkok", fetch) == {"AQI": 1}
+    assert cache.get_or_fetch("waqi", "Bangkok", fetch) == {"AQI": 1}
+    assert len(calls) == 1
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 1
+
+def test_stale_entry_is_served_immediately_and_refreshed_once(cache, memory):
+    now = time.time()
+    memory.set("waqi:Bangkok", {"AQI": "old"}, now - 120, now - 60)
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"AQI": "new"}
+
+    assert cache.get_or_fetch("waqi", "Bangkok", slow_fetch) == {"AQI": "old"}
+    # ระหว่างดึงใหม่ คำขอซ้ำยังได้ค่าเดิมและไม่เริ่มดึงซ้ำ
+    assert cache.get_or_fetch("waqi", "Bangkok", slow_fetch) == {"AQI": "old"}
+    release.set()
+    cache.wait()
+
+    assert len(calls) == 1
+    assert cache.stats["stale_hits"] == 2 and cache.stats["refreshes"] == 1
+    assert cache.get_or_fetch("waqi", "Bangkok", slow_fetch) == {"AQI": "new"}
+
+def test_failed_background_refresh_keeps_the_stale_value(cache, memory):
+    now = time.time()
+    memory.set("waqi:Bangkok", {"AQI": "old"}, now - 120, now - 60)
+
+    assert cache.get_or_fetch("waqi", "Bangkok", lambda: None) == {"AQI": "old"}
+    cache.wait()
+
+    assert cache.stats["errors"] == 1
+    assert memory.get("waqi:Bangkok")[0] == {"AQI": "old"}
+
+def test_too_old_entry_is_fetched_synchronously_with_stale_fallback(cache, memory):
+    now = time.time()
+    memory.set("waqi:Bangkok", {"AQI": "ancient"}, now - 1000, now - 900)
+
+    assert cache.get_or_fetch("waqi", "Bangkok", lambda: {"AQI": "new"}) == {"AQI": "new"}
+    memory.set("waqi:Bangkok", {"AQI": "ancient"}, now - 1000, now - 900)
+    assert cache.get_or_fetch("waqi", "Bangkok", lambda: None) == {"AQI": "ancient"}
+    assert cache.stats["misses"] == 2 and cache.stats["stale_hits"] == 0
+
+def test_disk_entry_is_promoted_to_memory(tmp_path):
+    memory, disk = MemoryLRU(), SQLiteCache(str(tmp_path / "cache.sqlite"))
+    now = time.time()
+    disk.set("waqi:Bangkok", {"AQI": 42}, now, now + 60)
+    cache = ResponseCache(backends=[memory, disk])
+    try:
+        assert cache.get_or_fetch("waqi", "Bangkok", lambda: pytest.fail("fetched")) == {"AQI": 42}
+        assert memory.get("waqi:Bangkok")[0] == {"AQI": 42}
+    finally:
+        cache.close()
@@ -0,0 +1,83 @@
+"""ทดสอบ aqi_collector: การรวมสถานีซ้ำข้ามแหล่ง และ timeout ของแต่ละแหล่ง"""
+
+import threading
+import time
+
+from aqi_collector import collect, merge_stations, summarize_merged
+
+def station(city, lat, lon, aqi=50, pm25=20, **fields):
+    return {"city": city, "coordinates": {"latitude": lat, "longitude": lon}, "AQI": aqi, "PM2.5": pm25, **fields}
+
+def test_same_city_name_merges_across_sources_and_keeps_priority_values():
+    merged = merge_stations({
+        "simple": [station("เชียงใหม่", 18.79, 98.99, aqi=80, city_en="Chiang Mai")],
+        "api": [station("Chiang Mai, Thailand", 18.70, 98.90, aqi=120)]
+    })
+
+    assert len(merged) == 1
+    assert merged[0]["source"] == "api"
+    assert merged[0]["sources"] == ["api", "simple"]
+    assert merged[0]["AQI"] == 120
+
+def test_nearby_stations_merge_by_radius_only_across_sources():
+    merged = merge_stations({
+        "api": [station("Din Daeng", 13.7650, 100.5500), station("Rayong", 12.68, 101.25)],
+        # ห่างจาก Din Daeng ราว 1 กม. → สถานีเดียวกัน, ห่างราว 20 กม. → สถานีใหม่
+        "scraper": [station("Bangkok Center", 13.7560, 100.5520), station("Bang Phli", 13.60, 100.64)],
+        # แหล่งเดียวกันอยู่ใกล้กันได้ ไม่รวมกันเอง
+        "simple": [station("A", 16.4300, 102.8200), station("B", 16.4310, 102.8210)]
+    }, merge_radius_km=5.0)
+
+    by_city = {entry["city"]: entry for entry in merged}
+    assert sorted(by_city) == ["A", "B", "Bang Phli", "Din Daeng", "Rayong"]
+    assert by_city["Din Daeng"]["sources"] == ["api", "scraper"]
+    assert by_city["Bang Phli"]["sources"] == ["scraper"]
+
+def test_each_source_merges_into_a_primary_station_once():
+    merged = merge_stations({
+        "api": [station("Din Daeng", 13.7650, 100.5500)],
+        "scraper": [station("North", 13.7660, 100.5500), station("South", 13.7640, 100.5500)]
+    }, merge_radius_km=5.0)
+
+    assert [entry["city"] for entry in merged] == ["Din Daeng", "South"]
+    assert merged[0]["sources"] == ["api", "scraper"]
+
+def test_summary_does_not_average_pollutants_across_units():
+    merged = merge_stations({
+        "api": [station("Bangkok", 13.75, 100.50, aqi=100, pm25=150)],
+        "simple": [station("Phuket", 7.88, 98.39, aqi=40, pm25=10)]
+    })
+    summary = summarize_merged(merged)
+
+    assert summary["average_AQI"] == 70
+    assert summary["pollutant_units"] == "mixed"
+    assert summary["average_PM2.5"] is None
+    assert summary["by_source"]["api"]["average_PM2.5"] == 150
+    assert summary["by_source"]["simple"]["average_PM2.5"] == 10
+
+def test_timed_out_source_does_not_block_and_runs_in_daemon_thread():
+    release = threading.Event()
+
+    def slow():
+        release.wait(10)
+        return {"stations": [station("Late", 1.0, 1.0)]}
+
+    factories = {
+        "fast": lambda: lambda: {"stations": [station("Bangkok", 13.75, 100.50)]},
+        "slow": lambda: slow,
+        "broken": lambda: lambda: 1 / 0
+    }
+    started_at = time.perf_counter()
+    try:
+        snapshot = collect(("fast", "slow", "broken"), timeout=0.2, factories=factories)
+        elapsed = time.perf_counter() - started_at
+        slow_threads = [thread for thread in threading.enumerate() if thread.name == "collect-slow"]
+    finally:
+        release.set()
+
+    assert elapsed < 2
+    assert snapshot["sources"]["slow"]["status"] == "timeout"
+    assert snapshot["sources"]["broken"]["status"] == "error"
+    assert snapshot["sources"]["fast"] == {"status": "ok", "stations": 1, "seconds": snapshot["sources"]["fast"]["seconds"]}
+    assert snapshot["total_stations"] == 1
+    assert slow_threads and all(thread.daemon for thread in slow_threads)
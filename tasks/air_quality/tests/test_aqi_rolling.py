@@ -0,0 +1,60 @@
+"""ทดสอบ NowCast และหน้าต่างเลื่อน 24 ชั่วโมงของ aqi_rolling"""
+
+from aqi_rolling import HourlyRing, RollingAggregator, nowcast
+
+HOUR = 3600
+START = 1_700_000_000 // HOUR * HOUR
+
+def test_nowcast_weights_recent_hours():
+    # min/max = 0.5 → w = 0.5: (20 + 0.5 × 10 + 0.25 × 10) / 1.75
+    assert nowcast([20, 10, 10]) == 15.7
+    # ค่าคงที่ w = 1 ได้ค่าเดิม
+    assert nowcast([30.0] * 12) == 30.0
+    # ต้องมีข้อมูลอย่างน้อย 2 ใน 3 ชั่วโมงล่าสุด
+    assert nowcast([None, None, 10, 10]) is None
+    assert nowcast([10, None, 10]) == 10.0
+
+def test_ring_evicts_hours_that_leave_the_window():
+    ring = HourlyRing(size=24)
+    for hour in range(24):
+        ring.add(hour, float(hour))
+    assert ring.mean() == 11.5
+
+    ring.add(24, 24.0)
+    # ชั่วโมง 0 หลุดหน้าต่าง เหลือ 1..24
+    assert ring.mean() == 12.5
+    assert ring.add(0, 100.0) is False
+
+    ring.advance(60)
+    assert ring.mean() is None
+
+def test_hour_mean_is_averaged_before_the_window_mean():
+    ring = HourlyRing(size=24)
+    for value in (10.0, 20.0, 30.0):
+        ring.add(5, value)
+    ring.add(6, 40.0)
+    assert ring.mean() == 30.0
+    assert ring.recent_means(3) == [40.0, 20.0, None]
+
+def test_aggregator_expires_windows_as_time_passes():
+    rolling = RollingAggregator(path=None)
+    for offset in range(3):
+        rolling.update("Bangkok", {"PM2.5": 20, "AQI": 60}, ts=START + offset * HOUR)
+
+    now = START + 2 * HOUR
+    assert rolling.nowcast("Bangkok", now=now) == 20.0
+    assert rolling.mean("Bangkok", "AQI", now=now) == 60.0
+    # ไม่มีค่าใหม่ 2 ชั่วโมง: NowCast ข้อมูลไม่พอ แต่ค่าเฉลี่ย 24 ชั่วโมงยังอยู่
+    assert rolling.nowcast("Bangkok", now=now + 2 * HOUR) is None
+    assert rolling.mean("Bangkok", "AQI", now=now + 2 * HOUR) == 60.0
+    assert rolling.mean("Bangkok", "AQI", now=now + 24 * HOUR) is None
+
+def test_readings_are_bucketed_by_measurement_time():
+    from datetime import datetime
+
+    rolling = RollingAggregator(path=None)
+    measured_at = datetime.fromtimestamp(START).isoformat()
+    # poll ช้ากว่าเวลาวัด 3 ชั่วโมง ค่าต้องลงชั่วโมงที่วัด ไม่ใช่ชั่วโมงที่ poll
+    rolling.update_readings([{"station": "Bangkok", "ts": START + 3 * HOUR, "measured_at": measured_at, "PM2.5": 30}])
+    ring = rolling.stations["Bangkok"]["PM2.5"]
+    assert ring.latest_hour == START // HOUR
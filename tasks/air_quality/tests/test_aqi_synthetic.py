@@ -0,0 +1,37 @@
+"""ทดสอบ SyntheticAQIGenerator: ค่าที่ได้ต้องไม่ขึ้นกับขนาด chunk"""
+
+import numpy as np
+import pytest
+
+from aqi_synthetic import SyntheticAQIGenerator
+
+START = 1_767_225_600  # 2026-01-01 00:00 UTC (ฤดูแล้ง มีหมอกควัน)
+
+def concatenated(generator, steps, chunk_steps):
+    chunks = list(generator.iter_chunks(START, steps, chunk_steps=chunk_steps))
+    return {field: np.concatenate([chunk[field] for chunk in chunks]) for field in ("ts", "AQI", "PM2.5", "PM10", "O3")}
+
+@pytest.mark.parametrize("chunk_steps", [1, 7, 64, 300])
+def test_output_is_the_same_for_any_chunk_size(chunk_steps):
+    generator = SyntheticAQIGenerator(n_stations=50, seed=3)
+    expected = concatenated(generator, 300, 300)
+    actual = concatenated(generator, 300, chunk_steps)
+
+    for field, values in expected.items():
+        np.testing.assert_array_equal(actual[field], values, err_msg=field)
+
+def test_station_reading_matches_the_bulk_series():
+    generator = SyntheticAQIGenerator(n_stations=20, seed=5)
+    bulk = generator.generate(START // 3600 + 10, 1)
+    reading = generator.station_reading("SIM-000007", when=START + 10 * 3600 + 1800)
+
+    assert reading["AQI"] == bulk["AQI"][0, 7]
+    assert reading["PM2.5"] == bulk["PM2.5"][0, 7]
+
+def test_same_seed_repeats_and_other_seed_differs():
+    first = SyntheticAQIGenerator(n_stations=10, seed=1).generate(START // 3600, 24)
+    again = SyntheticAQIGenerator(n_stations=10, seed=1).generate(START // 3600, 24)
+    other = SyntheticAQIGenerator(n_stations=10, seed=2).generate(START // 3600, 24)
+
+    np.testing.assert_array_equal(first["PM2.5"], again["PM2.5"])
+    assert not np.array_equal(first["PM2.5"], other["PM2.5"])
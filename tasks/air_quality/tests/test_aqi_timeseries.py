@@ -0,0 +1,64 @@
+"""ทดสอบ TimeSeriesStore: การตัดค่าซ้ำและ rollup"""
+
+import pytest
+
+from aqi_timeseries import TimeSeriesStore
+
+def reading(measured_at, aqi=50, ts=1_700_000_000, station="Bangkok"):
+    return {"ts": ts, "source": "api", "station": station, "measured_at": measured_at, "AQI": aqi, "PM2.5": 20}
+
+@pytest.fixture
+def store(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "aqi.sqlite"))
+    yield store
+    store.close()
+
+def test_repeated_measurement_is_stored_once(store):
+    assert len(store.append_new([reading("2026-10-18 10:00:00")])) == 1
+    assert store.append_new([reading("2026-10-18 10:00:00", ts=1_700_001_800)]) == []
+    assert store.append([reading("2026-10-18 11:00:00", ts=1_700_003_600)]) == 1
+
+    rows = store.query(station="Bangkok", resolution="raw")
+    assert [row["measured_at"] for row in rows] == ["2026-10-18 10:00:00", "2026-10-18 11:00:00"]
+    assert store.stats == {"appended": 2, "duplicates": 1}
+
+def test_failed_write_does_not_mark_reading_as_seen(store, monkeypatch):
+    def fail_once(period, groups):
+        monkeypatch.undo()
+        raise OSError("disk I/O error")
+    monkeypatch.setattr(store, "_upsert_rollup", fail_once)
+
+    with pytest.raises(OSError):
+        store.append_new([reading("2026-10-18 10:00:00")])
+    assert store.query(resolution="raw") == []
+
+    # รอบ poll ถัดไปได้ค่าเดิมจาก cache ต้องบันทึกได้ ไม่ถูกนับว่าซ้ำ
+    assert len(store.append_new([reading("2026-10-18 10:00:00")])) == 1
+    assert len(store.query(resolution="raw")) == 1
+    assert store.query(station="Bangkok", resolution="hour")[0]["n"] == 1
+
+def test_duplicate_within_one_batch_is_dropped(store):
+    accepted = store.append_new([reading("2026-10-18 10:00:00"), reading("2026-10-18 10:00:00"),
+                                 reading("2026-10-18 10:00:00", station="Chiang Mai")])
+    assert [row["station"] for row in accepted] == ["Bangkok", "Chiang Mai"]
+
+def test_cached_scraper_page_is_stored_once(store):
+    from aqi_cache import MemoryLRU, ResponseCache
+    from aqi_scraper import AQIScraper
+    from aqi_timeseries import to_readings
+
+    page = ("<html><table><tr><th>สถานี</th></tr>"
+            "<tr><td>Bangkok</td><td>80</td><td>25.1</td><td>40</td><td>10</td></tr></table></html>")
+    downloads = []
+    scraper = AQIScraper(cache=ResponseCache([MemoryLRU()]))
+    scraper.download_page_content = lambda: downloads.append(1) or page
+
+    stored = []
+    for polled_at in (1_700_000_000, 1_700_001_800):
+        html_content, fetched_at = scraper.fetch_page()
+        data = scraper.parse_air_quality_data(html_content, fetched_at)
+        stored.append(len(store.append_new(to_readings("scraper", data, polled_at))))
+
+    # หน้าเดียวกันจาก cache มีเวลาที่ดึงเดิม รอบที่สองจึงไม่ถูกบันทึกซ้ำ
+    assert downloads == [1]
+    assert stored == [1, 0]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+วัดความเร็วของ extractor แต่ละตัวแบบ offline โดยเล่นซ้ำหน้าเว็บจาก cassette (http_cassette)
+
+- ถ้ายังไม่มี cassette จะสร้างขึ้นจากผลลัพธ์ JSON ใน data/output (API response + หน้า examPreview จำลอง
+  + script ที่หน้าอ้างถึง) ตามจำนวนที่กำหนดด้วย --pages จึงรันได้โดยไม่ต้องต่อ internet
+- request ที่ไม่มีใน cassette (miss) ทำให้ผลวัดไม่ตรงกับการทำงานจริง จึงจบด้วย error ถ้ามี miss
+- ใช้ cassette ที่บันทึกจากเว็บจริงได้ด้วย
+    EXAM_CASSETTE=data/cassettes/exams.warc EXAM_CASSETTE_MODE=record python extract_exam_01.py --start 13500 --end 14500
+- extractor แต่ละตัวรันใน process แยก รายงาน pages/sec, ms ต่อหน้า p50/p99 และ peak RSS
+
+วิธีใช้:
+    python bench_extractors.py
+    python bench_extractors.py --pages 5000 --extractors api,bs4
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+import requests
+
+from bench_html_parsers import DEFAULT_PAGES_DIR, render_exam_page
+from extract_exam_01 import API_PATH, BASE_URL, build_api_url
+from extract_exam_02_beautifulsoup import WEB_URL
+from http_cassette import Cassette, install_cassette
+
+EXTRACTORS = ["api", "bs4", "api_scraper"]
+DEFAULT_CASSETTE = os.path.join("data", "cassettes", "bench.warc")
+SYNTHETIC_ID_START = 900000
+# script ที่ render_exam_page ใส่ไว้ใน <head> ซึ่ง api_scraper โหลดตอนค้นหา endpoint
+SCRIPT_PATH = "/assets/js/app.js"
+SCRIPT_BODY = b"var config = {theme: 'default'};\n"
+
+def to_api_payload(exam_data, exam_id):
+    """แปลงผลลัพธ์ของ extractor กลับเป็นรูปแบบ response ของ API formdoexamination"""
+    metadata = exam_data.get("metadata", {})
+    formdo = []
+    for question in exam_data.get("questions", []):
+        choices = []
+        for choice in question.get("choices", []):
+            if isinstance(choice, dict):
+                choices.append({"detail": choice.get("choice_text", ""), "answer": "true" if choice.get("is_correct") else "false"})
+            else:
+                choices.append({"detail": str(choice), "answer": "false"})
+        formdo.append({
+            "question_id": question.get("question_id"),
+            "question_detail": question.get("question_text", ""),
+            "choice": choices
+        })
+    return {"data": {
+        "exam": {
+            "exam_id": exam_id,
+            "exam_name": metadata.get("exam_name", f"Exam_{exam_id}"),
+            "level_name": metadata.get("level_name", ""),
+            "subject_name": metadata.get("subject_name", ""),
+            "question_count": len(formdo)
+        },
+        "formdo": formdo
+    }}
+
+def synthesize_cassette(path, pages, pages_dir=DEFAULT_PAGES_DIR):
+    """สร้าง cassette ที่มี API response และหน้า examPreview ของ exam_id จำลองจำนวน pages ชุด พร้อม script ที่ทุกหน้าใช้ร่วมกัน"""
+    templates = []
+    for file_path in sorted(glob.glob(os.path.join(pages_dir, "*.json"))):
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("questions"):
+            templates.append(data)
+    if not templates:
+        raise SystemExit(f"ไม่พบไฟล์ข้อสอบ .json ใน {pages_dir} สำหรับสร้าง cassette")
+
+    json_headers = {"Content-Type": "application/json; charset=utf-8"}
+    html_headers = {"Content-Type": "text/html; charset=utf-8"}
+    script_headers = {"Content-Type": "application/javascript; charset=utf-8"}
+    with Cassette(path) as cassette:
+        cassette.append("GET", urljoin(BASE_URL, SCRIPT_PATH), 200, script_headers, SCRIPT_BODY)
+        for i in range(pages):
+            exam_id = SYNTHETIC_ID_START + i
+            template = templates[i % len(templates)]
+            payload = json.dumps(to_api_payload(template, exam_id), ensure_ascii=False).encode("utf-8")
+            cassette.append("GET", build_api_url(exam_id), 200, json_headers, payload)
+            cassette.append("GET", WEB_URL.format(exam_id=exam_id), 200, html_headers, render_exam_page(template))
+    print(f"สร้าง cassette {path} ({pages} ข้อสอบ, {pages * 2 + 1} response)")
+
+def cassette_exam_ids(cassette, kind):
+    """exam_id ที่มี response อยู่ใน cassette ("api" = JSON API, "page" = หน้า examPreview)"""
+    ids = set()
+    for key in cassette.keys():
+        parts = urlsplit(key.split(" ", 1)[1])
+        query = parse_qs(parts.query)
+        if kind == "api" and parts.path == API_PATH and "exam_id" in query:
+            ids.add(int(query["exam_id"][0]))
+        elif kind == "page" and parts.path.endswith("/examPreview") and "id" in query:
+            ids.add(int(query["id"][0]))
+    return sorted(ids)
+
+def build_extractor(name, cassette):
+    """คืนค่า (ฟังก์ชัน extract(exam_id), ชนิดของ response ที่ต้องใช้)"""
+    if name == "api":
+        from extract_exam_01 import extract_exam_data
+        session = requests.Session()
+        install_cassette(session, cassette, "replay")
+        return (lambda exam_id: extract_exam_data(exam_id, BASE_URL, session=session)), "api"
+    if name == "bs4":
+        from extract_exam_02_beautifulsoup import extract_exam_data_from_web
+        session = requests.Session()
+        install_cassette(session, cassette, "replay")
+        return (lambda exam_id: extract_exam_data_from_web(exam_id, session=session)), "page"
+    if name == "api_scraper":
+        from endpoint_cache import EndpointDiscoveryCache
+        from endpoint_ranking import EndpointRanker
+        from exam_scraper_api import APIExamScraper
+        # cache/สถิติในหน่วยความจำ เพื่อไม่ให้ผลของรอบก่อนมีผลต่อการวัด
+        scraper = APIExamScraper(endpoint_cache=EndpointDiscoveryCache(path=None), ranker=EndpointRanker(path=None),
+                                 cassette=cassette, cassette_mode="replay")
+        return scraper.scrape_exam, "page"
+    raise ValueError(f"ไม่รู้จัก extractor: {name}")
+
+def run_worker(name, cassette_path, limit):
+    """วัดผล extractor เดียวใน process ปัจจุบันแล้วพิมพ์ผลเป็น JSON"""
+    cassette = Cassette(cassette_path)
+    extract, kind = build_extractor(name, cassette)
+    exam_ids = cassette_exam_ids(cassette, kind)[:limit]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    extracted = 0
+    started_at = time.perf_counter()
+    # extractor พิมพ์ความคืบหน้าทุกหน้า ปิดไว้ระหว่างวัดผล
+    with contextlib.redirect_stdout(io.StringIO()):
+        for exam_id in exam_ids:
+            page_started_at = time.perf_counter()
+            exam_data = extract(exam_id)
+            timings.append((time.perf_counter() - page_started_at) * 1000)
+            if exam_data and exam_data.get("questions"):
+                extracted += 1
+    elapsed = time.perf_counter() - started_at
+
+    timings.sort()
+    print(json.dumps({
+        "extractor": name,
+        "pages": len(exam_ids),
+        "extracted": extracted,
+        "pages_per_sec": round(len(exam_ids) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(statistics.median(timings), 2) if timings else 0.0,
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 2) if timings else 0.0,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "rss_growth_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+        "cassette_misses": cassette.stats["misses"]
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="เปรียบเทียบ extractor แบบ offline ด้วย cassette")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE, help="ไฟล์ cassette (สร้างใหม่ถ้ายังไม่มี)")
+    parser.add_argument("--pages", type=int, default=1000, help="จำนวนข้อสอบจำลองเมื่อต้องสร้าง cassette")
+    parser.add_argument("--pages-dir", default=DEFAULT_PAGES_DIR, help="โฟลเดอร์ผลลัพธ์ .json ที่ใช้สร้างหน้าจำลอง")
+    parser.add_argument("--limit", type=int, default=None, help="จำนวนหน้าสูงสุดต่อ extractor")
+    parser.add_argument("--extractors", default=",".join(EXTRACTORS), help="extractor ที่จะวัด คั่นด้วย ,")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.cassette, args.limit)
+        return
+
+    if not os.path.exists(args.cassette):
+        synthesize_cassette(args.cassette, args.pages, args.pages_dir)
+
+    results = []
+    for name in [n.strip() for n in args.extractors.split(",") if n.strip()]:
+        command = [sys.executable, os.path.abspath(__file__), "--worker", name, "--cassette", args.cassette]
+        if args.limit:
+            command += ["--limit", str(args.limit)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n{'extractor':<12} {'pages':>6} {'ได้ข้อมูล':>9} {'pages/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'peak RSS KB':>12} {'miss':>5}")
+    print("-" * 76)
+    for r in results:
+        print(f"{r['extractor']:<12} {r['pages']:>6} {r['extracted']:>9} {r['pages_per_sec']:>8} {r['p50_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['peak_rss_kb']:>12} {r['cassette_misses']:>5}")
+
+    missed = [r["extractor"] for r in results if r["cassette_misses"]]
+    if missed:
+        raise SystemExit(f"\ncassette ไม่มี response ที่ {', '.join(missed)} ขอ ผลวัดใช้ไม่ได้ "
+                         f"(ลบ {args.cassette} เพื่อสร้างใหม่ หรือบันทึกจากเว็บจริงด้วยโหมด record)")
+
+if __name__ == "__main__":
+    main()
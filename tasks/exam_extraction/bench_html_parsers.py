@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+เปรียบเทียบเวลาและหน่วยความจำสูงสุดของ parser backend แต่ละตัวใน html_parsers
+
+ใช้หน้าเว็บที่บันทึกไว้ใน data/output:
+- ไฟล์ .html จะถูกใช้ตามเดิม
+- ไฟล์ .json (ผลลัพธ์ของ extractor) จะถูกสร้างกลับเป็นหน้า examPreview จำลอง
+  โดยใช้ HTML ของคำถาม/ตัวเลือกที่บันทึกไว้ ครอบด้วย header และ footer ที่มี script
+
+แต่ละ backend รันใน process แยก เพื่อให้ค่า peak RSS ไม่ปนกัน
+
+วิธีใช้:
+    python bench_html_parsers.py
+    python bench_html_parsers.py --pages-dir ../../data/output --repeat 20
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from html_parsers import parse_html
+
+BACKENDS = ["html.parser", "lxml", "lxml-stream"]
+DEFAULT_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "output")
+
+def render_exam_page(exam_data):
+    """สร้างหน้า HTML จำลองจากข้อมูลข้อสอบที่บันทึกเป็น JSON"""
+    metadata = exam_data.get("metadata", {})
+    title = metadata.get("exam_name") or metadata.get("title") or "Exam"
+    parts = [
+        "<html><head><title>", title, "</title>",
+        "<script src='/assets/js/app.js'></script></head><body>",
+        "<div class='header'><h1>", title, "</h1>",
+        "<div class='exam-info'>ระดับ ", str(metadata.get("level_name", "")),
+        "<br>วิชา ", str(metadata.get("subject_name", "")), "</div></div>",
+        "<div class='exam-content'>"
+    ]
+    for question in exam_data.get("questions", []):
+        parts.append(f"<div class='question-item' id='question-{question.get('question_number')}'>")
+        parts.append(f"<div class='question-text'>{question.get('question_text', '')}</div><ul>")
+        for choice in question.get("choices", []):
+            text = choice.get("choice_text", "") if isinstance(choice, dict) else str(choice)
+            parts.append(f"<li class='choice'>{text}</li>")
+        parts.append("</ul></div>")
+    parts.append("</div>")
+    # ส่วนท้ายหน้าที่ streaming mode ไม่ต้อง parse
+    parts.append("<div class='footer'>")
+    parts.extend(f"<div class='related'><a href='/exam/{i}'>ข้อสอบที่เกี่ยวข้อง {i}</a></div>" for i in range(200))
+    parts.append("<script>var config = {};</script></div></body></html>")
+    return "".join(parts).encode("utf-8")
+
+def load_pages(pages_dir):
+    """อ่านหน้าเว็บทั้งหมดจากโฟลเดอร์ คืนค่าเป็นรายการ bytes"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*"))):
+        if path.endswith(".html"):
+            with open(path, "rb") as f:
+                pages.append(f.read())
+        elif path.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("questions"):
+                pages.append(render_exam_page(data))
+    return pages
+
+def run_worker(backend, pages_dir, repeat):
+    """วัดผล backend เดียวใน process ปัจจุบันแล้วพิมพ์ผลเป็น JSON"""
+    pages = load_pages(pages_dir)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    questions = 0
+    for _ in range(repeat):
+        for page in pages:
+            started_at = time.perf_counter()
+            soup = parse_html(page, backend)
+            timings.append((time.perf_counter() - started_at) * 1000)
+            questions = len(soup.select(".question-item"))
+
+    # วัด peak ของ Python heap แยกอีกรอบ เพราะ tracemalloc ทำให้ parse ช้าลง
+    tracemalloc.start()
+    for page in pages:
+        parse_html(page, backend)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "backend": backend,
+        "pages": len(pages),
+        "parses": len(timings),
+        "questions_last_page": questions,
+        "mean_ms": round(statistics.mean(timings), 2),
+        "p50_ms": round(statistics.median(timings), 2),
+        "heap_peak_kb": round(heap_peak / 1024, 1),
+        "rss_growth_kb": rss_after - rss_before
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="เปรียบเทียบ parser backend สำหรับหน้าข้อสอบ")
+    parser.add_argument("--pages-dir", default=DEFAULT_PAGES_DIR, help="โฟลเดอร์ที่มีหน้าเว็บ (.html) หรือผลลัพธ์ (.json)")
+    parser.add_argument("--repeat", type=int, default=10, help="จำนวนรอบที่ parse ทุกหน้า")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.pages_dir, args.repeat)
+        return
+
+    print(f"กำลังเปรียบเทียบ parser backend ด้วยหน้าเว็บจาก {os.path.abspath(args.pages_dir)}")
+    # ตรวจก่อนเริ่ม worker เพราะ worker คำนวณสถิติจากเวลาที่วัดได้ซึ่งต้องมีอย่างน้อย 1 ค่า
+    if not load_pages(args.pages_dir):
+        print("ไม่พบหน้าเว็บสำหรับทดสอบ")
+        return
+    results = []
+    for backend in BACKENDS:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", backend,
+             "--pages-dir", args.pages_dir, "--repeat", str(args.repeat)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    baseline = results[0]["mean_ms"]
+    print(f"\n{'backend':<12} {'pages':>5} {'mean ms':>9} {'p50 ms':>9} {'speedup':>8} {'heap KB':>10} {'RSS+ KB':>9} {'คำถาม':>6}")
+    print("-" * 76)
+    for r in results:
+        speedup = baseline / r["mean_ms"] if r["mean_ms"] else 0
+        print(f"{r['backend']:<12} {r['pages']:>5} {r['mean_ms']:>9} {r['p50_ms']:>9} {speedup:>7.1f}x "
+              f"{r['heap_peak_kb']:>10} {r['rss_growth_kb']:>9} {r['questions_last_page']:>6}")
+
+if __name__ == "__main__":
+    main()
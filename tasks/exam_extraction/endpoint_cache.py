@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+cache ผลการค้นหา API endpoint ของ APIExamScraper แบบถาวรบนดิสก์
+
+- รายชื่อ script ของหน้า examPreview ใช้ร่วมกันทุก exam_id จึง cache ตาม template ของหน้า (มี TTL)
+- endpoint ที่สกัดได้จากแต่ละ script cache ตาม URL ของ script พร้อม ETag / Last-Modified
+  เมื่อเกินเวลาที่กำหนดจะตรวจซ้ำด้วย conditional GET ถ้าได้ 304 ก็ใช้ค่าเดิมโดยไม่ต้องโหลดใหม่
+"""
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "endpoint_cache.json")
+
+class EndpointDiscoveryCache:
+    """cache ของรายชื่อ script ต่อหน้า และ endpoint ต่อ script"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, page_ttl=3600, revalidate_after=600):
+        """
+        Args:
+            path (str): ไฟล์ JSON สำหรับเก็บ cache (None = เก็บในหน่วยความจำอย่างเดียว)
+            page_ttl (int): อายุ (วินาที) ของรายชื่อ script ที่ได้จากหน้า examPreview
+            revalidate_after (int): ใช้ endpoint ของ script โดยไม่ตรวจซ้ำได้นานกี่วินาที
+        """
+        self.path = path
+        self.page_ttl = page_ttl
+        self.revalidate_after = revalidate_after
+        self.pages = {}
+        self.scripts = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.stats = {"page_hits": 0, "page_misses": 0, "script_fresh": 0, "script_not_modified": 0, "script_downloads": 0}
+        self.load()
+
+    def load(self):
+        """อ่าน cache จากดิสก์ (ถ้ามี)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.pages = data.get("pages", {})
+            self.scripts = data.get("scripts", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"อ่าน endpoint cache ไม่สำเร็จ เริ่มใหม่: {e}")
+
+    def save(self):
+        """บันทึก cache ลงดิสก์แบบ atomic เฉพาะเมื่อมีการเปลี่ยนแปลง"""
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pages": self.pages, "scripts": self.scripts}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def get_page(self, key):
+        """คืนค่า {"scripts": [...]} ของ template หน้า ถ้ายังไม่หมดอายุ"""
+        entry = self.pages.get(key)
+        if entry and time.time() - entry["fetched_at"] < self.page_ttl:
+            self._count("page_hits")
+            return entry
+        self._count("page_misses")
+        return None
+
+    def put_page(self, key, scripts):
+        # เก็บเฉพาะ URL ของ script ซึ่งเหมือนกันทุก exam_id (inline script ของหน้าอาจฝัง URL เฉพาะ id ไว้ จึงไม่ cache)
+        with self.lock:
+            self.pages[key] = {
+                "scripts": scripts,
+                "fetched_at": time.time()
+            }
+            self.dirty = True
+
+    def get_fresh_script(self, script_url):
+        """คืนค่า endpoint ของ script ถ้าเพิ่งตรวจสอบไปไม่นาน (ไม่ต้องส่ง request)"""
+        entry = self.scripts.get(script_url)
+        if entry and time.time() - entry["validated_at"] < self.revalidate_after:
+            self._count("script_fresh")
+            return entry["endpoints"]
+        return None
+
+    def conditional_headers(self, script_url):
+        """สร้าง header สำหรับ conditional GET จาก ETag / Last-Modified ที่เก็บไว้"""
+        entry = self.scripts.get(script_url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def mark_not_modified(self, script_url):
+        """เซิร์ฟเวอร์ตอบ 304 ต่ออายุ entry เดิมแล้วคืนค่า endpoint ที่ cache ไว้"""
+        self._count("script_not_modified")
+        with self.lock:
+            entry = self.scripts[script_url]
+            entry["validated_at"] = time.time()
+            self.dirty = True
+        return entry["endpoints"]
+
+    def has_script(self, script_url):
+        return script_url in self.scripts
+
+    def cached_endpoints(self, script_url):
+        """endpoint ที่เคย cache ไว้ (ใช้เมื่อโหลด script ไม่สำเร็จ)"""
+        entry = self.scripts.get(script_url)
+        return entry["endpoints"] if entry else []
+
+    def put_script(self, script_url, etag, last_modified, endpoints):
+        self._count("script_downloads")
+        with self.lock:
+            self.scripts[script_url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "endpoints": endpoints,
+                "validated_at": time.time()
+            }
+            self.dirty = True
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+จัดอันดับคู่ (endpoint, ชื่อพารามิเตอร์) ของ APIExamScraper ตามสถิติความสำเร็จในอดีต
+คู่ที่เคยได้ข้อมูลบ่อยที่สุดจะถูกลองก่อน สถิติบันทึกลงดิสก์เพื่อใช้ข้ามการรัน
+"""
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_STATS_PATH = os.path.join("data", "cache", "endpoint_stats.json")
+
+class EndpointRanker:
+    """เก็บจำนวนครั้งที่ลอง/สำเร็จของแต่ละคู่ endpoint + พารามิเตอร์ แล้วเรียงลำดับให้"""
+
+    def __init__(self, path=DEFAULT_STATS_PATH):
+        self.path = path
+        self.stats = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def key(endpoint, param_name):
+        return f"{param_name} {endpoint}"
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.stats = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"อ่านสถิติ endpoint ไม่สำเร็จ เริ่มใหม่: {e}")
+
+    def save(self):
+        """บันทึกสถิติลงดิสก์แบบ atomic เฉพาะเมื่อมีการเปลี่ยนแปลง"""
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def record(self, endpoint, param_name, success):
+        """บันทึกผลการลอง 1 ครั้ง"""
+        with self.lock:
+            entry = self.stats.setdefault(self.key(endpoint, param_name), {"attempts": 0, "successes": 0, "last_success": None})
+            entry["attempts"] += 1
+            if success:
+                entry["successes"] += 1
+                entry["last_success"] = time.time()
+            self.dirty = True
+
+    def score(self, endpoint, param_name):
+        """อัตราความสำเร็จแบบ Laplace smoothing (คู่ที่ยังไม่เคยลองได้ 0.5)"""
+        entry = self.stats.get(self.key(endpoint, param_name))
+        if not entry:
+            return 0.5
+        return (entry["successes"] + 1) / (entry["attempts"] + 2)
+
+    def is_proven(self, endpoint, param_name, min_successes=3, min_score=0.8):
+        """คู่นี้สำเร็จสม่ำเสมอพอที่จะลองเดี่ยว ๆ ก่อนโดยไม่ต้องแข่งกับคู่อื่นหรือไม่"""
+        entry = self.stats.get(self.key(endpoint, param_name))
+        return bool(entry) and entry["successes"] >= min_successes and self.score(endpoint, param_name) >= min_score
+
+    def rank(self, candidates):
+        """เรียง candidates [(endpoint, param_name), ...] ตามคะแนนจากมากไปน้อย (คะแนนเท่ากันใช้ลำดับเดิม)"""
+        order = {candidate: index for index, candidate in enumerate(candidates)}
+        return sorted(candidates, key=lambda c: (-self.score(*c), order[c]))
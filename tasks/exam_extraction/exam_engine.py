@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+เครื่องมือดึงข้อสอบแบบรวมหลายวิธี เรียงตามต้นทุนจากถูกไปแพง
+
+สำหรับแต่ละ exam_id จะลองทีละวิธีและขยับไปวิธีถัดไปเฉพาะเมื่อวิธีก่อนหน้าไม่ได้ข้อมูล
+(ถ้าวิธีใดได้ 404 แปลว่าไม่มีข้อสอบนี้ จะหยุดทันทีและบันทึก "not_found" โดยไม่ลองวิธีที่แพงกว่า):
+1. "api"     : JSON API (extract_exam_01) ใช้ request เดียว
+2. "html"    : หน้าเว็บแบบ static + BeautifulSoup (extract_exam_02_beautifulsoup)
+3. "browser" : headless Chrome (extract_exam_03_selenium) เปิดเบราว์เซอร์เฉพาะเมื่อถูกเรียกใช้ครั้งแรก
+
+ทุกวิธีใช้ HTTP session, output sink, journal และสถิติร่วมกัน
+
+วิธีใช้:
+    python exam_engine.py --start 13500 --end 13600
+    python exam_engine.py --start 13500 --strategies api,html --sink jsonl
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from exam_sinks import open_sink
+from extract_exam_01 import BASE_URL, extract_exam_data, sanitize_filename
+from extract_exam_02_beautifulsoup import extract_exam_data_from_web
+from html_parsers import DEFAULT_BACKEND
+from http_cassette import install_from_env
+from scrape_journal import NOT_FOUND, ScrapeJournal, hash_exam_data
+
+# rate_limiter.py อยู่ที่ root ของ repo ใช้ร่วมกับ tasks อื่นและสคริปต์ gitlab
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from rate_limiter import install_rate_limiter, shared_limiter
+
+DEFAULT_STRATEGIES = ("api", "html", "browser")
+
+class ExtractionStrategy:
+    """
+    วิธีดึงข้อสอบ 1 วิธี คลาสลูกต้อง implement extract(exam_id) ที่คืนค่า exam_data,
+    NOT_FOUND เมื่อเซิร์ฟเวอร์ยืนยันว่าไม่มีข้อสอบนี้ หรือ None เมื่อวิธีนี้ล้มเหลว
+    """
+
+    name = None
+
+    def extract(self, exam_id):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class ApiStrategy(ExtractionStrategy):
+    """ดึงจาก JSON API โดยตรง (ถูกที่สุด)"""
+
+    name = "api"
+
+    def __init__(self, session, base_url=BASE_URL):
+        self.session = session
+        self.base_url = base_url
+
+    def extract(self, exam_id):
+        return extract_exam_data(exam_id, self.base_url, session=self.session)
+
+class StaticHtmlStrategy(ExtractionStrategy):
+    """ดึงหน้า examPreview แบบ static แล้ว parse ด้วย BeautifulSoup"""
+
+    name = "html"
+
+    def __init__(self, session, parser_backend=DEFAULT_BACKEND):
+        self.session = session
+        self.parser_backend = parser_backend
+
+    def extract(self, exam_id):
+        return extract_exam_data_from_web(exam_id, self.parser_backend, session=self.session)
+
+class BrowserStrategy(ExtractionStrategy):
+    """render หน้าด้วย headless Chrome (แพงที่สุด) สร้าง WebDriverPool เมื่อถูกเรียกใช้ครั้งแรกเท่านั้น"""
+
+    name = "browser"
+
+    def __init__(self, pool_size=1, max_pages_per_driver=50):
+        self.pool_size = pool_size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                # import ที่นี่เพื่อให้ใช้วิธี api/html ได้โดยไม่ต้องติดตั้ง selenium
+                from webdriver_pool import WebDriverPool
+                self.pool = WebDriverPool(size=self.pool_size, headless=True, max_pages=self.max_pages_per_driver)
+            return self.pool
+
+    def extract(self, exam_id):
+        from extract_exam_03_selenium import extract_exam_data_selenium
+        with self._get_pool().driver() as driver:
+            return extract_exam_data_selenium(exam_id, driver)
+
+    def browser_launches(self):
+        return self.pool.stats["created"] if self.pool else 0
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+def create_session(pool_size=16):
+    """สร้าง requests.Session ที่มี connection pool ใหญ่พอสำหรับ worker ทุกตัว และจำกัดอัตราต่อ host แบบปรับตัวเอง"""
+    session = requests.Session()
+    install_rate_limiter(session, pool_connections=pool_size, pool_maxsize=pool_size)
+    # EXAM_CASSETTE ทำให้ทุกวิธีที่ใช้ session นี้อ่าน/บันทึกผ่าน cassette
+    install_from_env(session)
+    return session
+
+def exam_filename(exam_data):
+    """ชื่อไฟล์ JSON ของข้อสอบ (metadata จากวิธี html/browser อาจไม่ครบทุกช่อง)"""
+    metadata = exam_data["metadata"]
+    parts = [metadata.get(key) or "Unknown" for key in ("exam_id", "exam_name", "level_name", "subject_name")]
+    return sanitize_filename("_".join(str(part) for part in parts) + ".json")
+
+class ExamExtractionEngine:
+    """ลองวิธีดึงข้อสอบตามลำดับต้นทุน และเก็บสถิติของแต่ละวิธี"""
+
+    def __init__(self, strategies=DEFAULT_STRATEGIES, workers=4, base_url=BASE_URL,
+                 parser_backend=DEFAULT_BACKEND, browser_pool_size=1):
+        """
+        Args:
+            strategies (iterable): ชื่อวิธีตามลำดับที่จะลอง ("api", "html", "browser")
+            workers (int): จำนวน exam_id ที่ประมวลผลพร้อมกัน
+            base_url (str): ปลายทางของ JSON API
+            parser_backend (str): parser ของวิธี html
+            browser_pool_size (int): จำนวนเบราว์เซอร์สูงสุดของวิธี browser
+        """
+        self.workers = workers
+        self.session = create_session(workers)
+        factories = {
+            "api": lambda: ApiStrategy(self.session, base_url),
+            "html": lambda: StaticHtmlStrategy(self.session, parser_backend),
+            "browser": lambda: BrowserStrategy(browser_pool_size)
+        }
+        unknown = [name for name in strategies if name not in factories]
+        if unknown:
+            raise ValueError(f"ไม่รู้จักวิธีดึงข้อมูล: {', '.join(unknown)}")
+        self.strategies = [factories[name]() for name in strategies]
+        self.lock = threading.Lock()
+        self.metrics = {s.name: {"attempts": 0, "successes": 0, "seconds": 0.0} for s in self.strategies}
+
+    def _record(self, name, success, seconds):
+        with self.lock:
+            entry = self.metrics[name]
+            entry["attempts"] += 1
+            entry["successes"] += int(success)
+            entry["seconds"] += seconds
+
+    def extract(self, exam_id):
+        """
+        ดึงข้อสอบ 1 ชุด
+
+        Returns:
+            tuple: (exam_data, ชื่อวิธีที่สำเร็จ), (NOT_FOUND, ชื่อวิธีที่ได้ 404) หรือ (None, None) ถ้าทุกวิธีล้มเหลว
+        """
+        for strategy in self.strategies:
+            started_at = time.perf_counter()
+            try:
+                exam_data = strategy.extract(exam_id)
+            except Exception as e:
+                print(f"วิธี {strategy.name} ล้มเหลวกับ exam_id {exam_id}: {e}")
+                exam_data = None
+            success = bool(exam_data and exam_data.get("questions"))
+            self._record(strategy.name, success, time.perf_counter() - started_at)
+            if exam_data is NOT_FOUND:
+                # ไม่มีข้อสอบนี้ วิธีที่แพงกว่าก็จะไม่เจอเช่นกัน
+                return NOT_FOUND, strategy.name
+            if success:
+                exam_data["metadata"].setdefault("question_count", len(exam_data["questions"]))
+                return exam_data, strategy.name
+        return None, None
+
+    def run_range(self, start_id, end_id, output_dir, sink="json", journal_path=None):
+        """ดึงข้อสอบช่วง start_id..end_id แล้วบันทึกผ่าน sink เดียวกัน (รันต่อจากเดิมได้ด้วย journal)"""
+        os.makedirs(output_dir, exist_ok=True)
+        journal = ScrapeJournal(journal_path or os.path.join(output_dir, "scrape_journal.jsonl"))
+        pending_ids = journal.pending_ids(start_id, end_id)
+        skipped = (end_id - start_id + 1) - len(pending_ids)
+        exam_sink = open_sink(sink, output_dir, filename_fn=exam_filename, on_durable=journal.record_durable)
+
+        def worker(exam_id):
+            exam_data, strategy_name = self.extract(exam_id)
+            if exam_data is NOT_FOUND:
+                # สถานะ "not_found" ถือว่าเสร็จแล้ว รอบหน้าจึงไม่ไล่ลองทุกวิธีซ้ำ
+                journal.record(exam_id, "not_found")
+                print(f"exam_id {exam_id}: ไม่พบข้อสอบ (วิธี {strategy_name})")
+                return "not_found"
+            if exam_data is None:
+                journal.record(exam_id, "failed")
+                return "failed"
+            exam_sink.write(exam_data, (exam_id, hash_exam_data(exam_data)))
+            print(f"exam_id {exam_id}: ได้ {len(exam_data['questions'])} ข้อ ด้วยวิธี {strategy_name}")
+            return "ok"
+
+        started_at = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(worker, pending_ids))
+        finally:
+            exam_sink.close()
+            journal.close()
+        elapsed = time.perf_counter() - started_at
+
+        stats = {
+            "ok": results.count("ok"),
+            "not_found": results.count("not_found"),
+            "failed": results.count("failed"),
+            "skipped": skipped,
+            "elapsed": round(elapsed, 3),
+            "strategies": self.metrics,
+            "browser_launches": self.browser_launches(),
+            "rate_limit": shared_limiter().report()
+        }
+        self.print_summary(stats)
+        return stats
+
+    def browser_launches(self):
+        return sum(s.browser_launches() for s in self.strategies if isinstance(s, BrowserStrategy))
+
+    def print_summary(self, stats):
+        print("\nสรุปผลการดึงข้อมูล:")
+        print(f"สำเร็จ: {stats['ok']} | ไม่พบ: {stats['not_found']} | ล้มเหลว: {stats['failed']} | ข้าม: {stats['skipped']} | "
+              f"ใช้เวลา {stats['elapsed']} วินาที")
+        for name, entry in stats["strategies"].items():
+            average_ms = entry["seconds"] / entry["attempts"] * 1000 if entry["attempts"] else 0.0
+            print(f"  {name:<8} ลอง {entry['attempts']:>5} | สำเร็จ {entry['successes']:>5} | เฉลี่ย {average_ms:.0f} ms")
+        print(f"เปิดเบราว์เซอร์: {stats['browser_launches']} ครั้ง")
+        for host, entry in stats["rate_limit"].items():
+            print(f"  rate limit {host}: อัตราจริง {entry['effective_rate']}/วินาที | throttled {entry['throttled']} | retry {entry['retries']}")
+
+    def close(self):
+        for strategy in self.strategies:
+            strategy.close()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def parse_args():
+    """อ่านพารามิเตอร์จาก command line"""
+    parser = argparse.ArgumentParser(description="ดึงข้อสอบโดยลองวิธีที่ถูกที่สุดก่อน (API → HTML → เบราว์เซอร์)")
+    parser.add_argument("--start", type=int, default=13500, help="exam_id เริ่มต้น")
+    parser.add_argument("--end", type=int, default=None, help="exam_id สุดท้าย (ค่าเริ่มต้นเท่ากับ --start)")
+    parser.add_argument("--strategies", default=",".join(DEFAULT_STRATEGIES), help="ลำดับวิธีที่จะลอง คั่นด้วย ,")
+    parser.add_argument("--workers", type=int, default=4, help="จำนวน exam_id ที่ประมวลผลพร้อมกัน")
+    parser.add_argument("--browser-pool-size", type=int, default=1, help="จำนวนเบราว์เซอร์สูงสุด")
+    parser.add_argument("--base-url", default=BASE_URL, help="ปลายทางของ JSON API")
+    parser.add_argument("--parser-backend", default=DEFAULT_BACKEND, help="parser ของวิธี html")
+    parser.add_argument("--output-dir", default=os.path.join("data", "output"), help="โฟลเดอร์สำหรับบันทึกไฟล์")
+    parser.add_argument("--sink", choices=["json", "jsonl", "parquet"], default="json", help="รูปแบบไฟล์ output")
+    parser.add_argument("--journal", default=None, help="ไฟล์ journal สำหรับรันต่อจากเดิม")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    end_id = args.end if args.end is not None else args.start
+    strategies = [name.strip() for name in args.strategies.split(",") if name.strip()]
+
+    print(f"เริ่มดึงข้อสอบ ID {args.start} ถึง {end_id} ด้วยลำดับ {' → '.join(strategies)}")
+    with ExamExtractionEngine(strategies, args.workers, args.base_url, args.parser_backend, args.browser_pool_size) as engine:
+        engine.run_range(args.start, end_id, args.output_dir, args.sink, args.journal)
+
+if __name__ == "__main__":
+    main()
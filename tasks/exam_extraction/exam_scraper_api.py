@@ -1,22 +1,74 @@
 import requests
+import asyncio
+import functools
 import json
 import os
-import time
 import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+
+from endpoint_cache import EndpointDiscoveryCache
+from endpoint_ranking import EndpointRanker
+from exam_sinks import open_sink
+from html_parsers import DEFAULT_BACKEND, parse_html
+from http_cassette import install_cassette, install_from_env
+from parse_pipeline import ExamPipeline
+from scrape_journal import NOT_FOUND, ScrapeJournal, hash_exam_data
+
+# rate_limiter.py lives at the repository root and is shared with the other tasks
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from rate_limiter import install_rate_limiter
+
+# Look for API patterns in JavaScript
+API_PATTERNS = [
+    r'["\'](/api/[^"\']+)["\']',
+    r'["\'](/examination[^"\']+)["\']',
+    r'ajax\s*\(\s*["\']([^"\']+)["\']',
+    r'fetch\s*\(\s*["\']([^"\']+)["\']',
+    r'\.get\s*\(\s*["\']([^"\']+)["\']',
+    r'\.post\s*\(\s*["\']([^"\']+)["\']'
+]
+
+# Query parameter names the exam id may be passed as
+PARAM_NAMES = ['id', 'examId', 'exam_id', 'examID']
 
 class APIExamScraper:
-    def __init__(self):
+    def __init__(self, parser_backend=DEFAULT_BACKEND, endpoint_cache=None, ranker=None, race_width=3,
+                 cassette=None, cassette_mode="once", limiter=None):
         """
         Initialize the API-based exam scraper
+        
+        Args:
+            parser_backend (str): HTML parser backend ("html.parser", "lxml" or "lxml-stream")
+            endpoint_cache (EndpointDiscoveryCache): Discovery cache (defaults to the on-disk cache)
+            ranker (EndpointRanker): Endpoint/param success statistics (defaults to the on-disk stats)
+            race_width (int): Number of endpoint/param combinations raced concurrently
+            cassette (str|Cassette): Record/replay HTTP through this cassette (defaults to $EXAM_CASSETTE)
+            cassette_mode (str): "record", "replay" or "once"
+            limiter (AdaptiveRateLimiter): Per-host rate limiter (defaults to the process-wide one)
         """
+        self.parser_backend = parser_backend
+        self.endpoint_cache = endpoint_cache or EndpointDiscoveryCache()
+        self.ranker = ranker or EndpointRanker()
+        self.race_width = race_width
+        self.race_executor = ThreadPoolExecutor(max_workers=race_width)
+        # Probes run on race_executor threads, so shared counters need a lock
+        self.stats_lock = threading.Lock()
+        self.api_requests = 0
+        # One Session is shared by the race threads: they only issue GETs and never mutate
+        # headers/cookies after setup, and the mounted adapters (rate limiter, cassette) are
+        # thread-safe with a connection pool sized for race_width concurrent requests
         self.session = requests.Session()
         self.base_url = "https://www.trueplookpanya.com"
-        self.setup_session()
+        self.cassette = None
+        self.limiter = None
+        self.setup_session(cassette, cassette_mode, limiter)
         
-    def setup_session(self):
-        """Setup requests session with appropriate headers"""
+    def setup_session(self, cassette=None, cassette_mode="once", limiter=None):
+        """Setup requests session with appropriate headers, adaptive rate limiting and an optional record/replay cassette"""
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -25,78 +77,199 @@ class APIExamScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         })
+        
+        # Throttle per host and retry 429/503 instead of sleeping a fixed time between exams
+        self.limiter = install_rate_limiter(self.session, limiter, pool_maxsize=max(10, self.race_width))
+        # Installed after the limiter so replayed responses are not throttled
+        if cassette is not None:
+            self.cassette = install_cassette(self.session, cassette, cassette_mode)
+        else:
+            self.cassette = install_from_env(self.session)
+    
+    def extract_endpoints(self, script_content):
+        """
+        Extract exam/question API URLs from JavaScript source
+        
+        Args:
+            script_content (str): JavaScript code
+            
+        Returns:
+            list: Absolute endpoint URLs in order of appearance
+        """
+        api_endpoints = []
+        for pattern in API_PATTERNS:
+            matches = re.findall(pattern, script_content)
+            for match in matches:
+                if 'exam' in match.lower() or 'question' in match.lower():
+                    full_url = urljoin(self.base_url, match)
+                    if full_url not in api_endpoints:
+                        api_endpoints.append(full_url)
+        return api_endpoints
+    
+    def get_script_endpoints(self, script_url):
+        """
+        Get the endpoints referenced by one script, using the discovery cache
+        
+        A recently validated script costs no request; an older one is
+        revalidated with a conditional GET and only re-downloaded when changed.
+        
+        Args:
+            script_url (str): Absolute script URL
+            
+        Returns:
+            list: Endpoint URLs found in the script
+        """
+        endpoints = self.endpoint_cache.get_fresh_script(script_url)
+        if endpoints is not None:
+            return endpoints
+        
+        try:
+            script_response = self.session.get(script_url, headers=self.endpoint_cache.conditional_headers(script_url))
+            if script_response.status_code == 304 and self.endpoint_cache.has_script(script_url):
+                return self.endpoint_cache.mark_not_modified(script_url)
+            script_response.raise_for_status()
+        except Exception:
+            return self.endpoint_cache.cached_endpoints(script_url)
+        
+        endpoints = self.extract_endpoints(script_response.text)
+        self.endpoint_cache.put_script(
+            script_url,
+            script_response.headers.get('ETag'),
+            script_response.headers.get('Last-Modified'),
+            endpoints
+        )
+        return endpoints
     
     def discover_api_endpoints(self, exam_id):
         """
         Try to discover API endpoints by analyzing the page
         
+        The script list of the examPreview template and the endpoints found in
+        each script are cached, so repeated calls usually cost no requests.
+        Inline scripts are rendered per exam and may embed id-specific URLs,
+        so their endpoints are only used for the exam whose page was fetched.
+        
         Args:
             exam_id (int): Exam ID to analyze
             
         Returns:
             list: List of potential API endpoints
         """
-        url = f"{self.base_url}/examination2/examPreview?id={exam_id}"
+        page = self.endpoint_cache.get_page("examPreview")
+        inline_endpoints = []
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for JavaScript files that might contain API calls
-            script_tags = soup.find_all('script', src=True)
-            api_endpoints = []
-            
-            for script in script_tags:
-                script_url = urljoin(self.base_url, script['src'])
-                try:
-                    script_response = self.session.get(script_url)
-                    script_content = script_response.text
-                    
-                    # Look for API patterns in JavaScript
-                    api_patterns = [
-                        r'["\'](/api/[^"\']+)["\']',
-                        r'["\'](/examination[^"\']+)["\']',
-                        r'ajax\s*\(\s*["\']([^"\']+)["\']',
-                        r'fetch\s*\(\s*["\']([^"\']+)["\']',
-                        r'\.get\s*\(\s*["\']([^"\']+)["\']',
-                        r'\.post\s*\(\s*["\']([^"\']+)["\']'
-                    ]
-                    
-                    for pattern in api_patterns:
-                        matches = re.findall(pattern, script_content)
-                        for match in matches:
-                            if 'exam' in match.lower() or 'question' in match.lower():
-                                full_url = urljoin(self.base_url, match)
-                                if full_url not in api_endpoints:
-                                    api_endpoints.append(full_url)
+            if page is None:
+                url = f"{self.base_url}/examination2/examPreview?id={exam_id}"
+                response = self.session.get(url)
+                response.raise_for_status()
+                
+                # Script tags may sit after the question container, so never stream here
+                soup = parse_html(response.content, DEFAULT_BACKEND)
+                
+                # Look for JavaScript files that might contain API calls
+                scripts = [urljoin(self.base_url, script['src']) for script in soup.find_all('script', src=True)]
                 
-                except Exception as e:
-                    continue
+                # Also look for inline JavaScript
+                for script in soup.find_all('script', src=False):
+                    if script.string:
+                        for endpoint in self.extract_endpoints(script.string):
+                            if endpoint not in inline_endpoints:
+                                inline_endpoints.append(endpoint)
+                
+                self.endpoint_cache.put_page("examPreview", scripts)
+                page = {"scripts": scripts}
             
-            # Also look for inline JavaScript
-            inline_scripts = soup.find_all('script', src=False)
-            for script in inline_scripts:
-                if script.string:
-                    for pattern in api_patterns:
-                        matches = re.findall(pattern, script.string)
-                        for match in matches:
-                            if 'exam' in match.lower() or 'question' in match.lower():
-                                full_url = urljoin(self.base_url, match)
-                                if full_url not in api_endpoints:
-                                    api_endpoints.append(full_url)
+            api_endpoints = []
+            for script_url in page["scripts"]:
+                for endpoint in self.get_script_endpoints(script_url):
+                    if endpoint not in api_endpoints:
+                        api_endpoints.append(endpoint)
+            for endpoint in inline_endpoints:
+                if endpoint not in api_endpoints:
+                    api_endpoints.append(endpoint)
             
+            self.endpoint_cache.save()
             return api_endpoints
             
         except Exception as e:
             print(f"Error discovering API endpoints: {e}")
             return []
     
+    def probe_endpoint(self, exam_id, endpoint, param_name):
+        """
+        Request one endpoint with one parameter name and record the outcome
+        
+        Args:
+            exam_id (int): Exam ID
+            endpoint (str): API endpoint URL
+            param_name (str): Query parameter name for the exam ID
+            
+        Returns:
+            dict: Exam data if the response contains questions, None otherwise
+        """
+        exam_data = None
+        try:
+            with self.stats_lock:
+                self.api_requests += 1
+            response = self.session.get(endpoint, params={param_name: exam_id})
+            
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                    if data and ('questions' in data or 'exam' in data or 'data' in data):
+                        exam_data = self.process_api_data(data, exam_id)
+                except json.JSONDecodeError:
+                    # Try to parse as HTML if not JSON
+                    soup = parse_html(response.content, self.parser_backend)
+                    if soup.find_all(['div', 'span', 'p']):
+                        exam_data = self.extract_from_html(soup, exam_id)
+        except Exception:
+            exam_data = None
+        
+        # A 200 with an empty payload still parses into a dict; only questions count as success
+        if not (exam_data and exam_data.get('questions')):
+            exam_data = None
+        self.ranker.record(endpoint, param_name, exam_data is not None)
+        return exam_data
+    
+    def race_candidates(self, exam_id, candidates):
+        """
+        Probe several endpoint/param combinations concurrently
+        
+        Returns the first usable result and cancels the probes that have not
+        started yet. Probes already in flight finish in the background.
+        
+        Args:
+            exam_id (int): Exam ID
+            candidates (list): (endpoint, param_name) pairs
+            
+        Returns:
+            tuple: ((endpoint, param_name), exam_data) or (None, None)
+        """
+        futures = {
+            self.race_executor.submit(self.probe_endpoint, exam_id, endpoint, param_name): (endpoint, param_name)
+            for endpoint, param_name in candidates
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                exam_data = future.result()
+                if exam_data is not None:
+                    for other in pending:
+                        other.cancel()
+                    return futures[future], exam_data
+        return None, None
+    
     def try_api_endpoints(self, exam_id, endpoints):
         """
         Try different API endpoints to get exam data
         
+        Endpoint/param combinations are ranked by their past success rate. A
+        proven winner is tried alone first; the rest are raced in groups of
+        race_width with first-success cancellation.
+        
         Args:
             exam_id (int): Exam ID
             endpoints (list): List of API endpoints to try
@@ -104,35 +277,24 @@ class APIExamScraper:
         Returns:
             dict: Exam data if successful, None otherwise
         """
-        for endpoint in endpoints:
-            try:
-                # Try different parameter formats
-                param_variations = [
-                    {'id': exam_id},
-                    {'examId': exam_id},
-                    {'exam_id': exam_id},
-                    {'examID': exam_id}
-                ]
-                
-                for params in param_variations:
-                    response = self.session.get(endpoint, params=params)
-                    
-                    if response.status_code == 200:
-                        try:
-                            data = response.json()
-                            if data and ('questions' in data or 'exam' in data or 'data' in data):
-                                print(f"Found API endpoint: {endpoint}")
-                                return self.process_api_data(data, exam_id)
-                        except json.JSONDecodeError:
-                            # Try to parse as HTML if not JSON
-                            soup = BeautifulSoup(response.content, 'html.parser')
-                            if soup.find_all(['div', 'span', 'p']):
-                                return self.extract_from_html(soup, exam_id)
-                
-            except Exception as e:
-                continue
+        candidates = self.ranker.rank([(endpoint, param_name) for endpoint in endpoints for param_name in PARAM_NAMES])
         
-        return None
+        try:
+            if candidates and self.ranker.is_proven(*candidates[0]):
+                exam_data = self.probe_endpoint(exam_id, *candidates[0])
+                if exam_data is not None:
+                    return exam_data
+                candidates = candidates[1:]
+            
+            for start in range(0, len(candidates), self.race_width):
+                winner, exam_data = self.race_candidates(exam_id, candidates[start:start + self.race_width])
+                if winner:
+                    print(f"Found API endpoint: {winner[0]} ({winner[1]})")
+                    return exam_data
+            
+            return None
+        finally:
+            self.ranker.save()
     
     def process_api_data(self, data, exam_id):
         """
@@ -193,7 +355,8 @@ class APIExamScraper:
         
         return exam_data
     
-    def extract_from_html(self, soup, exam_id):
+    @staticmethod
+    def extract_from_html(soup, exam_id):
         """
         Extract exam data from HTML when API is not available
         
@@ -241,15 +404,27 @@ class APIExamScraper:
         
         return exam_data
     
-    def scrape_exam(self, exam_id):
+    def close(self):
+        """Stop the race threads and close the HTTP session"""
+        self.race_executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def fetch_raw(self, exam_id):
         """
-        Main method to scrape exam data
+        Network half of scrape_exam: fetch exam data without parsing any HTML
         
         Args:
-            exam_id (int): Exam ID to scrape
+            exam_id (int): Exam ID to fetch
             
         Returns:
-            dict: Exam data or None if failed
+            tuple: ("data", exam_data) from an API endpoint, ("html", page bytes)
+                   for the HTML fallback, NOT_FOUND if the page is a 404 or None if failed
         """
         print(f"กำลังวิเคราะห์ข้อสอบ ID: {exam_id}")
         
@@ -260,7 +435,7 @@ class APIExamScraper:
             print(f"พบ API endpoints: {len(endpoints)} รายการ")
             exam_data = self.try_api_endpoints(exam_id, endpoints)
             if exam_data:
-                return exam_data
+                return "data", exam_data
         
         # Fallback: try direct page scraping
         print("กำลังลองดึงข้อมูลจากหน้าเว็บโดยตรง...")
@@ -268,62 +443,187 @@ class APIExamScraper:
         
         try:
             response = self.session.get(url)
+            if response.status_code == 404:
+                print(f"ไม่พบข้อสอบ ID: {exam_id}")
+                return NOT_FOUND
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return self.extract_from_html(soup, exam_id)
+            return "html", response.content
             
         except Exception as e:
             print(f"Error scraping exam {exam_id}: {e}")
             return None
     
-    def scrape_exam_range(self, start_id, end_id=None, output_dir="exam_data_api"):
+    def scrape_exam(self, exam_id):
+        """
+        Main method to scrape exam data
+        
+        Args:
+            exam_id (int): Exam ID to scrape
+            
+        Returns:
+            dict: Exam data, NOT_FOUND if the exam does not exist or None if failed
+        """
+        raw = self.fetch_raw(exam_id)
+        if not raw:
+            return raw
+        return parse_raw_exam(exam_id, raw, self.parser_backend)
+    
+    def scrape_exam_range(self, start_id, end_id=None, output_dir="exam_data_api", journal_path=None, sink="json"):
         """
         Scrape multiple exams in a range
         
+        Progress is recorded in an append-only journal so a rerun skips ids
+        that were already saved or not found and only retries failures.
+        
         Args:
             start_id (int): Starting exam ID
             end_id (int): Ending exam ID (if None, scrape only start_id)
-            output_dir (str): Directory to save JSON files
+            output_dir (str): Directory to save output files
+            journal_path (str): Journal file (defaults to scrape_journal.jsonl in output_dir)
+            sink (str): Output format - "json" (one file per exam), "jsonl" or "parquet"
         """
         if end_id is None:
             end_id = start_id
         
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
+        # "json" keeps one exam_{id}.json per exam, "jsonl"/"parquet" batch many exams per file
+        sink_options = {"indent": 2} if sink == "json" else {}
+        journal = ScrapeJournal(journal_path or os.path.join(output_dir, "scrape_journal.jsonl"))
+        # The journal marks an exam done only once the sink has flushed it to disk
+        exam_sink = open_sink(sink, output_dir, on_durable=journal.record_durable, **sink_options)
         
         successful_scrapes = 0
         failed_scrapes = 0
+        not_found = 0
+        
+        pending_ids = journal.pending_ids(start_id, end_id)
+        skipped = (end_id - start_id + 1) - len(pending_ids)
+        if skipped:
+            print(f"ข้าม {skipped} ID ที่ดึงเสร็จแล้วจากรอบก่อน")
         
-        for exam_id in range(start_id, end_id + 1):
+        for exam_id in pending_ids:
             try:
                 exam_data = self.scrape_exam(exam_id)
                 
-                if exam_data and exam_data.get('questions'):
-                    # Save to JSON file
-                    filename = f"exam_{exam_id}.json"
-                    filepath = os.path.join(output_dir, filename)
-                    
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(exam_data, f, ensure_ascii=False, indent=2)
-                    
-                    print(f"บันทึกไฟล์: {filepath} ({len(exam_data['questions'])} ข้อ)")
+                if exam_data is NOT_FOUND:
+                    # A 404 is final, so the id is not retried
+                    journal.record(exam_id, "not_found")
+                    not_found += 1
+                elif exam_data and exam_data.get('questions'):
+                    location = exam_sink.write(exam_data, (exam_id, hash_exam_data(exam_data)))
+                    print(f"บันทึกไฟล์: {location} ({len(exam_data['questions'])} ข้อ)")
                     successful_scrapes += 1
                 else:
+                    # An empty response may be transient, so it stays retryable
+                    journal.record(exam_id, "empty" if exam_data else "failed")
                     print(f"ไม่พบข้อมูลข้อสอบ ID: {exam_id}")
                     failed_scrapes += 1
                 
-                # Add delay between requests
-                time.sleep(1)
-                
             except Exception as e:
                 print(f"Error processing exam {exam_id}: {e}")
+                journal.record(exam_id, "failed")
                 failed_scrapes += 1
                 continue
         
+        exam_sink.close()
+        journal.close()
+        
         print(f"\nสรุปผลการดึงข้อมูล:")
         print(f"สำเร็จ: {successful_scrapes} ไฟล์")
         print(f"ล้มเหลว: {failed_scrapes} ไฟล์")
+        print(f"ไม่พบ: {not_found} ID")
+        print(f"ข้าม: {skipped} ไฟล์")
+        print(f"endpoint cache: {self.endpoint_cache.stats}")
+        attempted = successful_scrapes + failed_scrapes + not_found
+        if attempted:
+            print(f"API requests ต่อข้อสอบ: {self.api_requests / attempted:.2f}")
+        print(f"rate limit:\n{self.limiter.format_report()}")
+
+    def scrape_exam_range_pipelined(self, start_id, end_id=None, output_dir="exam_data_api", journal_path=None,
+                                    sink="json", fetch_concurrency=4, parse_workers=None):
+        """
+        Scrape multiple exams with fetching, parsing and writing in separate stages
+        
+        Fetchers run concurrently (the blocking session calls are moved to
+        threads). Data from an API endpoint is already parsed and goes straight
+        to the writer; page HTML goes through a bounded queue to a process pool
+        for parsing. A single writer saves results.
+        
+        Args:
+            start_id (int): Starting exam ID
+            end_id (int): Ending exam ID (if None, scrape only start_id)
+            output_dir (str): Directory to save output files
+            journal_path (str): Journal file (defaults to scrape_journal.jsonl in output_dir)
+            sink (str): Output format - "json" (one file per exam), "jsonl" or "parquet"
+            fetch_concurrency (int): Number of exams fetched concurrently
+            parse_workers (int): Number of parser processes (defaults to the CPU count)
+            
+        Returns:
+            dict: Counts plus the pipeline metrics snapshot
+        """
+        if end_id is None:
+            end_id = start_id
+        
+        os.makedirs(output_dir, exist_ok=True)
+        sink_options = {"indent": 2} if sink == "json" else {}
+        journal = ScrapeJournal(journal_path or os.path.join(output_dir, "scrape_journal.jsonl"))
+        exam_sink = open_sink(sink, output_dir, on_durable=journal.record_durable, **sink_options)
+        pending_ids = journal.pending_ids(start_id, end_id)
+        stats = {"ok": 0, "not_found": 0, "failed": 0, "skipped": (end_id - start_id + 1) - len(pending_ids)}
+        
+        async def fetch(exam_id):
+            return await asyncio.to_thread(self.fetch_raw, exam_id)
+        
+        def write(exam_id, exam_data):
+            if exam_data is NOT_FOUND:
+                journal.record(exam_id, "not_found")
+                stats["not_found"] += 1
+            elif exam_data and exam_data.get('questions'):
+                exam_sink.write(exam_data, (exam_id, hash_exam_data(exam_data)))
+                stats["ok"] += 1
+            else:
+                journal.record(exam_id, "empty" if exam_data else "failed")
+                stats["failed"] += 1
+        
+        pipeline = ExamPipeline(fetch, functools.partial(parse_raw_exam, parser_backend=self.parser_backend), write,
+                                fetch_concurrency=fetch_concurrency, parse_workers=parse_workers, report_every=5,
+                                preparsed=preparsed_exam)
+        try:
+            metrics = asyncio.run(pipeline.run(pending_ids))
+        finally:
+            exam_sink.close()
+            journal.close()
+        # Exams whose write raised are not journaled, so the next run retries them
+        stats["failed"] += metrics["errors"]["write"]
+        
+        print("\nสรุปผลการดึงข้อมูล:")
+        print(f"สำเร็จ: {stats['ok']} | ไม่พบ: {stats['not_found']} | ล้มเหลว: {stats['failed']} | ข้าม: {stats['skipped']} | "
+              f"ใช้เวลา {metrics['elapsed']} วินาที")
+        print(f"pipeline: {pipeline.metrics.format_line()}")
+        stats["pipeline"] = metrics
+        return stats
+
+def preparsed_exam(raw):
+    """Exam data from an API endpoint (or a 404) needs no parsing, so the pipeline skips the process pool for it"""
+    if raw is NOT_FOUND:
+        return raw
+    kind, payload = raw
+    return payload if kind == "data" else None
+
+def parse_raw_exam(exam_id, raw, parser_backend=DEFAULT_BACKEND):
+    """
+    CPU half of scrape_exam, kept at module level so it can run in a process pool
+    
+    Args:
+        exam_id (int): Exam ID
+        raw (tuple): Result of APIExamScraper.fetch_raw
+        parser_backend (str): HTML parser backend
+    """
+    kind, payload = raw
+    if kind == "data":
+        return payload
+    return APIExamScraper.extract_from_html(parse_html(payload, parser_backend), exam_id)
 
 def main():
     """Main function to run the API scraper"""
@@ -341,6 +641,8 @@ def main():
         print("\nการดึงข้อมูลถูกยกเลิกโดยผู้ใช้")
     except Exception as e:
         print(f"เกิดข้อผิดพลาด: {e}")
+    finally:
+        scraper.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,42 +1,61 @@
 import time
-import json
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from selenium.common.exceptions import NoSuchElementException
+
+from exam_sinks import open_sink
+from html_parsers import DEFAULT_BACKEND, parse_html
+from scrape_journal import NOT_FOUND, ScrapeJournal, hash_exam_data
+from webdriver_pool import WebDriverPool
+from page_readiness import PageLatencyMetrics, build_readiness
+from selector_plan import SelectorPlan
+
+# CSS selectors that mark a question block on the exam page
+QUESTION_SELECTORS = [
+    ".question-item",
+    ".question-block",
+    ".exam-question",
+    "[class*='question']",
+    ".item-question"
+]
 
 class ExamScraper:
-    def __init__(self, headless=True, wait_time=10):
+    def __init__(self, headless=True, wait_time=10, pool_size=1, max_pages_per_driver=50, readiness="default",
+                 parser_backend=DEFAULT_BACKEND):
         """
-        Initialize the exam scraper with Selenium WebDriver
+        Initialize the exam scraper with a pool of Selenium WebDrivers
         
         Args:
             headless (bool): Run browser in headless mode
             wait_time (int): Maximum wait time for elements to load
+            pool_size (int): Number of browsers (and range workers) to run in parallel
+            max_pages_per_driver (int): Restart a browser after this many pages
+            readiness (str): Page readiness strategy ("default", "dom_marker",
+                "question_count" or "network_idle")
+            parser_backend (str): HTML parser backend ("html.parser", "lxml" or "lxml-stream")
         """
         self.wait_time = wait_time
-        self.setup_driver(headless)
+        self.parser_backend = parser_backend
+        self.readiness = readiness
+        self.metrics = PageLatencyMetrics()
+        # Remember which selectors match the rendered exam template across pages and runs
+        self.selector_plan = SelectorPlan(layout="examPreview_selenium")
+        self.setup_driver(headless, pool_size, max_pages_per_driver)
         
-    def setup_driver(self, headless):
-        """Setup Chrome WebDriver with appropriate options"""
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        # Add user agent to avoid detection
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    def setup_driver(self, headless, pool_size=1, max_pages_per_driver=50):
+        """Setup a bounded pool of Chrome WebDrivers (browsers start lazily, once per worker)"""
+        self.pool = WebDriverPool(
+            size=pool_size,
+            headless=headless,
+            max_pages=max_pages_per_driver,
+            # NetworkIdleReady (also part of the default strategy) needs the log to see requests still in flight
+            performance_log=build_readiness(self.readiness, ", ".join(QUESTION_SELECTORS)).needs_performance_log
+        )
         
+        # Start the first browser eagerly so a missing ChromeDriver fails fast
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.wait = WebDriverWait(self.driver, self.wait_time)
+            with self.pool.driver():
+                pass
         except Exception as e:
             print(f"Error setting up WebDriver: {e}")
             print("Please make sure ChromeDriver is installed and in PATH")
@@ -44,38 +63,53 @@ class ExamScraper:
     
     def scrape_exam(self, exam_id):
         """
-        Scrape exam data for a specific exam ID
+        Scrape exam data for a specific exam ID using a driver borrowed from the pool
         
         Args:
             exam_id (int): The exam ID to scrape
             
         Returns:
-            dict: Exam data including metadata and questions
+            dict: Exam data including metadata and questions (see scrape_exam_with_driver)
+        """
+        with self.pool.driver() as driver:
+            return self.scrape_exam_with_driver(driver, exam_id)
+    
+    def scrape_exam_with_driver(self, driver, exam_id):
+        """
+        Scrape exam data for a specific exam ID with the given WebDriver
+        
+        Args:
+            driver (WebDriver): Browser to load the page in
+            exam_id (int): The exam ID to scrape
+            
+        Returns:
+            dict: Exam data including metadata and questions, NOT_FOUND for a
+                  404 page or None if scraping failed
         """
         url = f"https://www.trueplookpanya.com/examination2/examPreview?id={exam_id}"
+        # Strategies keep per-page state, so each page gets its own instance
+        readiness = build_readiness(self.readiness, ", ".join(QUESTION_SELECTORS))
         
         try:
             print(f"กำลังดึงข้อมูลข้อสอบ ID: {exam_id}")
-            self.driver.get(url)
-            
-            # Wait for page to load
-            time.sleep(3)
+            started_at = time.perf_counter()
+            driver.get(url)
+            navigated_at = time.perf_counter()
             
             # Check if page loaded successfully
-            if "404" in self.driver.title or "Not Found" in self.driver.title:
+            if "404" in driver.title or "Not Found" in driver.title:
                 print(f"ไม่พบข้อสอบ ID: {exam_id}")
-                return None
+                return NOT_FOUND
             
-            # Wait for content to load
-            try:
-                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            except TimeoutException:
-                print(f"Timeout waiting for page to load for exam ID: {exam_id}")
-                return None
+            # Wait until questions are rendered instead of sleeping a fixed time
+            ready = readiness.wait(driver, self.wait_time)
+            self.metrics.record(exam_id, navigated_at - started_at, time.perf_counter() - navigated_at, ready, readiness.name)
+            if not ready:
+                print(f"Timeout waiting for questions for exam ID: {exam_id} (parsing what is loaded)")
             
-            # Get page source and parse with BeautifulSoup
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            # Get page source and parse with the configured backend
+            page_source = driver.page_source
+            soup = parse_html(page_source, self.parser_backend)
             
             # Extract exam metadata
             metadata = self.extract_metadata(soup, exam_id)
@@ -118,11 +152,9 @@ class ExamScraper:
             "title"
         ]
         
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem and title_elem.get_text().strip():
-                metadata["title"] = title_elem.get_text().strip()
-                break
+        title_elem = self.selector_plan.select_one(soup, "title", title_selectors)
+        if title_elem:
+            metadata["title"] = title_elem.get_text().strip()
         
         # Try to extract other metadata from tables or divs
         # Look for common patterns in Thai educational websites
@@ -146,20 +178,7 @@ class ExamScraper:
         questions = []
         
         # Try multiple selectors for questions
-        question_selectors = [
-            ".question-item",
-            ".question-block",
-            ".exam-question",
-            "[class*='question']",
-            ".item-question"
-        ]
-        
-        question_elements = []
-        for selector in question_selectors:
-            elements = soup.select(selector)
-            if elements:
-                question_elements = elements
-                break
+        question_elements = self.selector_plan.select(soup, "question", QUESTION_SELECTORS)
         
         # If no specific question elements found, try to find patterns
         if not question_elements:
@@ -191,11 +210,9 @@ class ExamScraper:
                 "li"
             ]
             
-            for choice_selector in choice_selectors:
-                choices = element.select(choice_selector)
-                if choices:
-                    question_data["choices"] = [choice.get_text().strip() for choice in choices if choice.get_text().strip()]
-                    break
+            choices = self.selector_plan.select(element, "choice", choice_selectors)
+            if choices:
+                question_data["choices"] = [choice.get_text().strip() for choice in choices if choice.get_text().strip()]
             
             if question_data["question_text"]:
                 questions.append(question_data)
@@ -208,65 +225,105 @@ class ExamScraper:
         # Implementation would depend on the specific text format
         return []
     
-    def scrape_exam_range(self, start_id, end_id=None, output_dir="exam_data"):
+    def scrape_and_save(self, exam_id, exam_sink, journal):
+        """
+        Scrape one exam, write it to the output sink and record the outcome in the journal
+        
+        Returns:
+            bool: True if the exam was saved
+        """
+        try:
+            exam_data = self.scrape_exam(exam_id)
+            
+            if exam_data is NOT_FOUND:
+                # The 404 page is final, so the id is not retried
+                journal.record(exam_id, "not_found")
+                saved = False
+            elif exam_data and exam_data["questions"]:
+                location = exam_sink.write(exam_data, (exam_id, hash_exam_data(exam_data)))
+                print(f"บันทึกไฟล์: {location}")
+                saved = True
+            else:
+                # A page that rendered no questions may be transient, so it stays retryable
+                journal.record(exam_id, "empty" if exam_data else "failed")
+                saved = False
+            
+            return saved
+            
+        except Exception as e:
+            print(f"Error processing exam {exam_id}: {e}")
+            journal.record(exam_id, "failed")
+            return False
+    
+    def scrape_exam_range(self, start_id, end_id=None, output_dir="exam_data", journal_path=None, sink="json"):
         """
         Scrape multiple exams in a range
         
+        Ids are fanned out across the driver pool with one worker thread per
+        browser. Progress is recorded in an append-only journal so a rerun
+        skips ids that were already saved and only retries failures.
+        
         Args:
             start_id (int): Starting exam ID
             end_id (int): Ending exam ID (if None, scrape only start_id)
-            output_dir (str): Directory to save JSON files
+            output_dir (str): Directory to save output files
+            journal_path (str): Journal file (defaults to scrape_journal.jsonl in output_dir)
+            sink (str): Output format - "json" (one file per exam), "jsonl" or "parquet"
         """
         if end_id is None:
             end_id = start_id
         
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
+        # "json" keeps one exam_{id}.json per exam, "jsonl"/"parquet" batch many exams per file
+        sink_options = {"indent": 2} if sink == "json" else {}
+        journal = ScrapeJournal(journal_path or os.path.join(output_dir, "scrape_journal.jsonl"))
+        # The journal marks an exam done only once the sink has flushed it to disk
+        exam_sink = open_sink(sink, output_dir, on_durable=journal.record_durable, **sink_options)
+        
+        pending_ids = journal.pending_ids(start_id, end_id)
+        skipped = (end_id - start_id + 1) - len(pending_ids)
+        if skipped:
+            print(f"ข้าม {skipped} ID ที่ดึงเสร็จแล้วจากรอบก่อน")
         
-        successful_scrapes = 0
-        failed_scrapes = 0
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            results = list(executor.map(
+                lambda exam_id: self.scrape_and_save(exam_id, exam_sink, journal),
+                pending_ids
+            ))
         
-        for exam_id in range(start_id, end_id + 1):
-            try:
-                exam_data = self.scrape_exam(exam_id)
-                
-                if exam_data:
-                    # Save to JSON file
-                    filename = f"exam_{exam_id}.json"
-                    filepath = os.path.join(output_dir, filename)
-                    
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(exam_data, f, ensure_ascii=False, indent=2)
-                    
-                    print(f"บันทึกไฟล์: {filepath}")
-                    successful_scrapes += 1
-                else:
-                    failed_scrapes += 1
-                
-                # Add delay between requests to be respectful
-                time.sleep(2)
-                
-            except Exception as e:
-                print(f"Error processing exam {exam_id}: {e}")
-                failed_scrapes += 1
-                continue
+        exam_sink.close()
+        journal.close()
+        
+        successful_scrapes = sum(results)
+        failed_scrapes = len(results) - successful_scrapes
         
         print(f"\nสรุปผลการดึงข้อมูล:")
         print(f"สำเร็จ: {successful_scrapes} ไฟล์")
         print(f"ล้มเหลว: {failed_scrapes} ไฟล์")
+        print(f"ข้าม: {skipped} ไฟล์")
+        print(f"เปิดเบราว์เซอร์: {self.pool.stats['created']} ครั้ง")
+        
+        latency = self.metrics.summary()
+        if latency["pages"]:
+            print(f"เวลาต่อหน้า: p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms (รอจนหมดเวลา {latency['timeouts']} หน้า)")
+        
+        plan_stats = self.selector_plan.stats()
+        print(f"selector plan: hit {plan_stats['hits']} / miss {plan_stats['misses']} (hit rate {plan_stats['hit_rate']})")
     
     def close(self):
-        """Close the WebDriver"""
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+        """Close every WebDriver in the pool"""
+        if hasattr(self, 'pool'):
+            self.pool.close()
 
 def main():
     """Main function to run the scraper"""
     # Configuration
     START_ID = 13500
     END_ID = 13500  # Change this to scrape multiple exams
+    POOL_SIZE = 2  # Number of browsers working in parallel
     
-    scraper = ExamScraper(headless=True)
+    scraper = ExamScraper(headless=True, pool_size=POOL_SIZE)
     
     try:
         # Scrape single exam or range
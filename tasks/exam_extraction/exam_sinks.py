@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+ปลายทางสำหรับบันทึกข้อมูลข้อสอบ (output sink) ที่สลับกันได้
+
+- "json"    : ไฟล์ JSON 1 ไฟล์ต่อ 1 ข้อสอบ (รูปแบบเดิม)
+- "jsonl"   : รวมหลายข้อสอบในไฟล์ .jsonl บรรทัดละ 1 ข้อสอบ มี buffer, หมุนไฟล์ตามขนาด และ fsync เป็นชุด
+- "parquet" : ไฟล์ Parquet แบบ columnar แถวละ 1 ตัวเลือก (แตก questions/choices ออกเป็นคอลัมน์)
+
+โหลดข้อสอบทั้งวิชาจาก jsonl/parquet ได้ด้วยการอ่านไฟล์ต่อเนื่องไม่กี่ไฟล์ แทนการเปิดไฟล์เล็กนับแสนไฟล์
+
+jsonl/parquet เก็บข้อมูลไว้ใน buffer ก่อนลงดิสก์ ผู้เรียกจึงต้องบันทึก journal ว่าเสร็จผ่าน on_durable
+(เรียกเมื่อข้อมูลลงดิสก์แล้วจริง) ไม่ใช่ทันทีหลัง write() มิฉะนั้นข้อสอบที่ค้างใน buffer ตอนโปรแกรมล้มจะหายไป
+"""
+
+import glob
+import json
+import os
+import re
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow เป็น dependency เสริม ใช้เฉพาะ ParquetSink
+    pa = None
+    pq = None
+
+class ExamSink:
+    """
+    คลาสแม่ของ sink คลาสลูกต้อง implement _write(exam_data) และ _close()
+    และเรียก _release_pending() เมื่อข้อมูลที่เขียนไปแล้วลงดิสก์จริง
+    """
+
+    def __init__(self, on_durable=None):
+        """
+        Args:
+            on_durable (callable): on_durable(token, location) ถูกเรียกเมื่อข้อสอบที่ write() พร้อม token
+                ลงดิสก์แล้ว (ตามลำดับที่เขียน) ใช้บันทึก journal ว่า exam_id นั้นเสร็จ
+        """
+        self.lock = threading.Lock()
+        self.records = 0
+        self.on_durable = on_durable
+        self.pending = []
+
+    def write(self, exam_data, token=None):
+        """
+        บันทึกข้อสอบ 1 ชุด คืนค่าตำแหน่งที่บันทึก (path หรือ path#บรรทัด)
+
+        token (เช่น (exam_id, hash)) จะถูกส่งให้ on_durable เมื่อข้อสอบนี้ลงดิสก์แล้ว
+        """
+        with self.lock:
+            location = self._write(exam_data)
+            self.records += 1
+            self.pending.append((token, location))
+            self._after_write()
+            return location
+
+    def close(self):
+        with self.lock:
+            self._close()
+            # ปิดไฟล์แล้ว ทุกอย่างที่เขียนไปลงดิสก์แล้ว
+            self._release_pending()
+
+    def _write(self, exam_data):
+        raise NotImplementedError
+
+    def _after_write(self):
+        pass
+
+    def _close(self):
+        pass
+
+    def _release_pending(self, entries=None):
+        if entries is None:
+            entries, self.pending = self.pending, []
+        if self.on_durable:
+            for token, location in entries:
+                if token is not None:
+                    self.on_durable(token, location)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class JsonFileSink(ExamSink):
+    """บันทึก 1 ไฟล์ JSON ต่อ 1 ข้อสอบ (พฤติกรรมเดิมของ extractor)"""
+
+    def __init__(self, output_dir, filename_fn, indent=4, on_durable=None):
+        super().__init__(on_durable)
+        self.output_dir = output_dir
+        self.filename_fn = filename_fn
+        self.indent = indent
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _write(self, exam_data):
+        file_path = os.path.join(self.output_dir, self.filename_fn(exam_data))
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(exam_data, f, ensure_ascii=False, indent=self.indent)
+        return file_path
+
+    def _after_write(self):
+        # ไฟล์ถูกปิดทันทีหลังเขียน ไม่มีข้อมูลค้างใน buffer ของโปรแกรม
+        self._release_pending()
+
+class JsonlSink(ExamSink):
+    """เขียนข้อสอบต่อท้ายไฟล์ .jsonl แบบมี buffer หมุนไฟล์เมื่อครบจำนวน/ขนาด และ fsync ทุก fsync_every รายการ"""
+
+    def __init__(self, output_dir, prefix="exams", max_records=50000, max_bytes=256 * 1024 * 1024,
+                 fsync_every=1000, buffer_size=1024 * 1024, on_durable=None):
+        super().__init__(on_durable)
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.fsync_every = fsync_every
+        self.buffer_size = buffer_size
+        self.file = None
+        self.path = None
+        self.file_records = 0
+        self.file_bytes = 0
+        self.unsynced = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _next_path(self):
+        return next_part_path(self.output_dir, self.prefix, ".jsonl")
+
+    def _sync(self):
+        if self.file and self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+            # ทุกบรรทัดที่ write() ไปแล้วอยู่ในไฟล์นี้และ fsync แล้ว
+            self._release_pending()
+
+    def _rotate(self):
+        self._close()
+        self.path = self._next_path()
+        self.file = open(self.path, "w", encoding="utf-8", buffering=self.buffer_size)
+        self.file_records = 0
+        self.file_bytes = 0
+
+    def _write(self, exam_data):
+        line = json.dumps(exam_data, ensure_ascii=False, separators=(",", ":")) + "\n"
+        size = len(line.encode("utf-8"))
+        if self.file is None or self.file_records >= self.max_records or self.file_bytes + size > self.max_bytes:
+            self._rotate()
+
+        self.file.write(line)
+        self.file_records += 1
+        self.file_bytes += size
+        self.unsynced += 1
+        return f"{self.path}#{self.file_records}"
+
+    def _after_write(self):
+        if self.unsynced >= self.fsync_every:
+            self._sync()
+
+    def _close(self):
+        if self.file:
+            self._sync()
+            self.file.close()
+            self.file = None
+
+def flatten_exam(exam_data):
+    """แตกข้อสอบเป็นแถว แถวละ 1 ตัวเลือก (คำถามที่ไม่มีตัวเลือกได้ 1 แถวที่ค่าตัวเลือกเป็น None)"""
+    metadata = exam_data.get("metadata") or {}
+    exam_id = metadata.get("exam_id", exam_data.get("exam_id"))
+    base = {
+        "exam_id": None if exam_id is None else str(exam_id),
+        "exam_name": metadata.get("exam_name") or metadata.get("title"),
+        "level_name": metadata.get("level_name") or metadata.get("grade_level"),
+        "subject_name": metadata.get("subject_name") or metadata.get("subject")
+    }
+    rows = []
+    for question in exam_data.get("questions", []):
+        question_id = question.get("question_id")
+        question_row = dict(base)
+        question_row.update({
+            "question_number": question.get("question_number"),
+            "question_id": None if question_id is None else str(question_id),
+            "question_text": question.get("question_text")
+        })
+        choices = question.get("choices") or [None]
+        for index, choice in enumerate(choices, 1):
+            row = dict(question_row)
+            if isinstance(choice, dict):
+                row.update({
+                    "choice_number": choice.get("choice_number", index),
+                    "choice_text": choice.get("choice_text"),
+                    "is_correct": choice.get("is_correct")
+                })
+            else:
+                # extractor บางตัวเก็บตัวเลือกเป็นข้อความล้วน
+                row.update({
+                    "choice_number": None if choice is None else index,
+                    "choice_text": choice,
+                    "is_correct": None
+                })
+            rows.append(row)
+    return rows
+
+PARQUET_SCHEMA_FIELDS = [
+    ("exam_id", "string"),
+    ("exam_name", "string"),
+    ("level_name", "string"),
+    ("subject_name", "string"),
+    ("question_number", "int32"),
+    ("question_id", "string"),
+    ("question_text", "string"),
+    ("choice_number", "int32"),
+    ("choice_text", "string"),
+    ("is_correct", "bool_")
+]
+
+class ParquetSink(ExamSink):
+    """เขียนข้อสอบเป็น Parquet แบบ columnar เก็บแถวไว้ใน buffer แล้วเขียนเป็น row group ครั้งละ row_group_size แถว"""
+
+    def __init__(self, output_dir, prefix="exams", row_group_size=20000, max_rows_per_file=2000000, on_durable=None):
+        if pa is None:
+            raise ImportError("ParquetSink ต้องติดตั้ง pyarrow ก่อน (pip install pyarrow)")
+        super().__init__(on_durable)
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.row_group_size = row_group_size
+        self.max_rows_per_file = max_rows_per_file
+        self.schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in PARQUET_SCHEMA_FIELDS])
+        self.columns = {name: [] for name, _ in PARQUET_SCHEMA_FIELDS}
+        self.buffered_rows = 0
+        self.writer = None
+        self.file_rows = 0
+        # ข้อสอบที่ row group อยู่ในไฟล์ที่ยังไม่ปิด (Parquet อ่านได้เมื่อเขียน footer ตอนปิดไฟล์แล้วเท่านั้น)
+        self.in_open_file = []
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = self._next_path()
+
+    def _next_path(self):
+        return next_part_path(self.output_dir, self.prefix, ".parquet")
+
+    def _flush_row_group(self):
+        if self.buffered_rows:
+            if self.writer is not None and self.file_rows >= self.max_rows_per_file:
+                self._close_writer()
+            if self.writer is None:
+                self.path = self.path or self._next_path()
+                self.writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+                self.file_rows = 0
+            table = pa.Table.from_pydict(self.columns, schema=self.schema)
+            self.writer.write_table(table)
+            self.file_rows += self.buffered_rows
+            self.columns = {name: [] for name in self.columns}
+            self.buffered_rows = 0
+        # ตำแหน่งจริงคือไฟล์ที่ row group ถูกเขียนลงไป (อาจเป็นไฟล์ใหม่หลังหมุนไฟล์)
+        self.in_open_file.extend((token, self.path) for token, _ in self.pending)
+        self.pending = []
+
+    def _close_writer(self):
+        if self.writer is not None:
+            self.writer.close()
+            # fsync ครั้งเดียวตอนปิดไฟล์แทนทุก row group
+            with open(self.path, "rb") as f:
+                os.fsync(f.fileno())
+            self.writer = None
+            self.path = None
+        entries, self.in_open_file = self.in_open_file, []
+        self._release_pending(entries)
+
+    def _write(self, exam_data):
+        for row in flatten_exam(exam_data):
+            for name in self.columns:
+                self.columns[name].append(row.get(name))
+            self.buffered_rows += 1
+        if self.path is None:
+            self.path = self._next_path()
+        return self.path
+
+    def _after_write(self):
+        if self.buffered_rows >= self.row_group_size:
+            self._flush_row_group()
+
+    def _close(self):
+        self._flush_row_group()
+        self._close_writer()
+
+def next_part_path(output_dir, prefix, suffix):
+    """path ของไฟล์ส่วนถัดไป (prefix-00001.jsonl ...) ต่อจากเลขที่มากที่สุด ไม่เขียนทับไฟล์เดิมแม้เลขจะขาดช่วง"""
+    pattern = re.compile(rf"{re.escape(prefix)}-(\d+){re.escape(suffix)}$")
+    numbers = [int(match.group(1)) for name in os.listdir(output_dir) if (match := pattern.match(name))]
+    return os.path.join(output_dir, f"{prefix}-{max(numbers, default=0) + 1:05d}{suffix}")
+
+def open_sink(kind, output_dir, filename_fn=None, **options):
+    """
+    สร้าง sink ตามชื่อ
+
+    Args:
+        kind (str): "json", "jsonl" หรือ "parquet"
+        output_dir (str): โฟลเดอร์ปลายทาง
+        filename_fn (callable): ฟังก์ชันตั้งชื่อไฟล์จากข้อมูลข้อสอบ (ใช้กับ "json")
+        options: พารามิเตอร์เพิ่มเติมของ sink แต่ละแบบ (ทุกแบบรับ on_durable)
+    """
+    if kind == "json":
+        return JsonFileSink(output_dir, filename_fn or (lambda data: f"exam_{data['exam_id']}.json"), **options)
+    if kind == "jsonl":
+        return JsonlSink(output_dir, **options)
+    if kind == "parquet":
+        return ParquetSink(output_dir, **options)
+    raise ValueError(f"ไม่รู้จัก sink: {kind}")
+
+def iter_jsonl_exams(output_dir, prefix="exams"):
+    """อ่านข้อสอบทั้งหมดจากไฟล์ .jsonl ตามลำดับไฟล์"""
+    for path in sorted(glob.glob(os.path.join(output_dir, f"{prefix}-*.jsonl"))):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
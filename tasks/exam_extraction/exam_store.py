@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+คลังข้อมูลข้อสอบแบบ content-addressed (เก็บตาม hash ของเนื้อหา)
+
+- hash คำนวณจาก metadata + questions หลังทำให้อยู่ในรูปมาตรฐาน (ตัดช่องว่างซ้ำ, Unicode NFC,
+  แปลงตัวเลขเป็นข้อความ, ตัดค่า None) ข้อมูลเดียวกันจาก extractor ต่างตัวจึงได้ hash เดียวกัน
+- เนื้อหาแต่ละแบบถูกเขียนลงดิสก์เพียงครั้งเดียวที่ objects/<2 ตัวแรกของ hash>/<hash>.json
+- index เก็บ exam_id → hash ล่าสุด พร้อม ETag / Last-Modified สำหรับ conditional GET รอบถัดไป
+
+วิธีใช้ (รวมไฟล์ JSON ที่มีอยู่เข้าคลังและดูว่าซ้ำกันกี่ไฟล์):
+    python exam_store.py ../../data/output
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+
+DEFAULT_STORE_DIR = os.path.join("data", "store")
+
+def normalize_value(value):
+    """แปลงค่าให้อยู่ในรูปมาตรฐานก่อนคำนวณ hash"""
+    if isinstance(value, dict):
+        return {key: normalize_value(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(item) for item in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        # API บางตัวส่ง id เป็นตัวเลข บางตัวเป็นข้อความ
+        return str(value)
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFC", value).split())
+    return value
+
+def _hash(payload):
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def content_hash(exam_data):
+    """hash ของ metadata + questions (ไม่รวมฟิลด์อื่น เช่น url หรือ source ที่ต่างกันตาม extractor)"""
+    return _hash(normalize_value({
+        "metadata": exam_data.get("metadata") or {},
+        "questions": exam_data.get("questions") or []
+    }))
+
+def questions_hash(exam_data):
+    """hash ของ questions อย่างเดียว ใช้หาไฟล์ที่คำถามเหมือนกันแต่ metadata ต่างกัน"""
+    return _hash(normalize_value(exam_data.get("questions") or []))
+
+class ExamStore:
+    """คลังข้อสอบที่เขียนเนื้อหาซ้ำเพียงครั้งเดียว และจำ validator ของ HTTP ไว้ต่อ exam_id"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        """
+        Args:
+            root (str): โฟลเดอร์ของคลัง (มี index.json และโฟลเดอร์ objects)
+        """
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self.index = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.stats = {"new": 0, "duplicate": 0, "unchanged": 0, "not_modified": 0, "bytes_skipped": 0}
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.load()
+
+    def load(self):
+        """อ่าน index จากดิสก์ (ถ้ามี)"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"อ่าน index ของคลังข้อสอบไม่สำเร็จ เริ่มใหม่: {e}")
+
+    def save(self):
+        """บันทึก index ลงดิสก์แบบ atomic เฉพาะเมื่อมีการเปลี่ยนแปลง"""
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.json")
+
+    def _entry(self, exam_id):
+        # key ของ JSON เป็นข้อความเสมอ
+        return self.index.get(str(exam_id))
+
+    def conditional_headers(self, exam_id):
+        """สร้าง header สำหรับ conditional GET จาก ETag / Last-Modified ของรอบก่อน (เฉพาะเมื่อยังมีเนื้อหาเดิมในคลัง)"""
+        entry = self._entry(exam_id)
+        headers = {}
+        if entry and os.path.exists(self.object_path(entry["hash"])):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def mark_not_modified(self, exam_id):
+        """
+        เซิร์ฟเวอร์ตอบ 304 คืนค่าข้อสอบเดิมจากคลังโดยไม่ต้องดาวน์โหลดใหม่
+
+        คืนค่า None ถ้าคลังไม่มีฉบับเดิมของ exam_id นี้ (เช่น index ถูกเขียนทับโดยรอบที่เก่ากว่า
+        หรือ ETag ที่ CDN ใช้ร่วมกันหลาย URL) ผู้เรียกต้องดึงใหม่แบบไม่มีเงื่อนไข
+        """
+        exam_data = self.load_exam(exam_id)
+        if exam_data is None:
+            return None
+        with self.lock:
+            self.stats["not_modified"] += 1
+            entry = self._entry(exam_id)
+            if entry is not None:
+                entry["checked_at"] = time.time()
+                self.dirty = True
+        return exam_data
+
+    def load_exam(self, exam_id):
+        """อ่านข้อสอบล่าสุดของ exam_id จากคลัง หรือ None ถ้าไม่มี entry หรือไฟล์เนื้อหา"""
+        entry = self._entry(exam_id)
+        if not entry:
+            return None
+        try:
+            with open(self.object_path(entry["hash"]), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, exam_id, exam_data, etag=None, last_modified=None):
+        """
+        เก็บข้อสอบเข้าคลัง
+
+        Returns:
+            tuple: (hash, changed) โดย changed เป็น False เมื่อ exam_id นี้มีเนื้อหาเดิมอยู่แล้ว
+                   (ผู้เรียกไม่ต้องเขียนไฟล์ output ซ้ำ)
+        """
+        digest = content_hash(exam_data)
+        path = self.object_path(digest)
+        with self.lock:
+            entry = self._entry(exam_id) or {}
+            changed = entry.get("hash") != digest
+            if os.path.exists(path):
+                # เนื้อหาเดียวกันเคยถูกเก็บไว้แล้ว (รอบก่อน หรือจาก extractor ตัวอื่น) ไม่ต้องเขียนซ้ำ
+                self.stats["unchanged" if not changed else "duplicate"] += 1
+                self.stats["bytes_skipped"] += os.path.getsize(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(exam_data, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+                self.stats["new"] += 1
+
+            entry.update({"hash": digest, "questions_hash": questions_hash(exam_data), "checked_at": time.time()})
+            if etag or last_modified:
+                entry.update({"etag": etag, "last_modified": last_modified})
+            self.index[str(exam_id)] = entry
+            self.dirty = True
+        return digest, changed
+
+    def summary(self):
+        """สรุปผล dedup เป็นข้อความ"""
+        s = self.stats
+        return (f"ข้อสอบใหม่ {s['new']} | เนื้อหาซ้ำกับที่มีอยู่ {s['duplicate']} | "
+                f"ไม่เปลี่ยนแปลง {s['unchanged']} | ได้ 304 {s['not_modified']} | "
+                f"ไม่ต้องเขียนซ้ำ {s['bytes_skipped'] / 1024:.1f} KB")
+
+def main():
+    parser = argparse.ArgumentParser(description="รวมไฟล์ข้อสอบ JSON เข้าคลังแบบ content-addressed")
+    parser.add_argument("input_dir", help="โฟลเดอร์ที่มีไฟล์ข้อสอบ .json")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="โฟลเดอร์ของคลัง")
+    args = parser.parse_args()
+
+    store = ExamStore(args.store)
+    groups = {}
+    for path in sorted(glob.glob(os.path.join(args.input_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            exam_data = json.load(f)
+        exam_id = (exam_data.get("metadata") or {}).get("exam_id", exam_data.get("exam_id"))
+        key = f"{exam_id}:{os.path.basename(path)}"
+        digest, _ = store.put(key, exam_data)
+        groups.setdefault(store.index[key]["questions_hash"], []).append(os.path.basename(path))
+        print(f"{digest[:12]} {os.path.basename(path)}")
+    store.save()
+    print(store.summary())
+
+    for files in groups.values():
+        if len(files) > 1:
+            print(f"คำถามเหมือนกัน {len(files)} ไฟล์ (ต่างกันเฉพาะ metadata): {', '.join(files)}")
+
+if __name__ == "__main__":
+    main()
@@ -11,63 +11,105 @@ Looking at the context, I notice:
 <FINAL_ANSWER
 """
 
-import requests
+import argparse
+import asyncio
 import json
 import os
 import re
+import sys
 import time
 from pathlib import Path
 
+import aiohttp
+
+from exam_sinks import open_sink
+from exam_store import DEFAULT_STORE_DIR, ExamStore
+from http_cassette import default_session
+from scrape_journal import NOT_FOUND, ScrapeJournal, hash_exam_data
+
+# rate_limiter.py อยู่ที่ root ของ repo ใช้ร่วมกับ tasks อื่นและสคริปต์ gitlab
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from rate_limiter import AdaptiveRateLimiter, request_async
+
+BASE_URL = "https://www.trueplookpanya.com"
+API_PATH = "/webservice/api/examination/formdoexamination"
+
 def sanitize_filename(filename):
     """แปลงชื่อไฟล์ให้ปลอดภัย โดยแทนที่อักขระพิเศษด้วย underscore"""
     return re.sub(r'[<>:"/\\|?*]', '_', filename)
 
-def extract_exam_data(exam_id):
-    """ดึงข้อมูลข้อสอบจาก API"""
+def build_api_url(exam_id, base_url=BASE_URL):
+    """สร้าง URL ของ API สำหรับ exam_id (เปลี่ยน base_url เพื่อชี้ไปยังเซิร์ฟเวอร์ทดสอบในเครื่องได้)"""
+    return f"{base_url.rstrip('/')}{API_PATH}?exam_id={exam_id}"
+
+def parse_exam_payload(data):
+    """แปลง JSON ที่ได้จาก API ให้อยู่ในรูปแบบ metadata + questions"""
+    # ดึงข้อมูลเมตาเดตา
+    metadata = {
+        "exam_id": data['data']['exam']['exam_id'],
+        "exam_name": data['data']['exam']['exam_name'],
+        "level_name": data['data']['exam']['level_name'],
+        "subject_name": data['data']['exam']['subject_name'],
+        "question_count": data['data']['exam']['question_count']
+    }
+    
+    # ดึงข้อมูลคำถามและตัวเลือก
+    questions_list = []
+    for i, question_data in enumerate(data['data']['formdo'], 1):
+        question_detail = {
+            "question_number": i,
+            "question_id": question_data['question_id'],
+            "question_text": question_data['question_detail'],
+            "choices": []
+        }
+        
+        for j, choice in enumerate(question_data['choice'], 1):
+            choice_detail = {
+                "choice_number": j,
+                "choice_text": choice['detail'],
+                "is_correct": choice['answer'] == "true"
+            }
+            question_detail["choices"].append(choice_detail)
+        
+        questions_list.append(question_detail)
+    
+    # รวมข้อมูลทั้งหมด
+    return {
+        "metadata": metadata,
+        "questions": questions_list
+    }
+
+def extract_exam_data(exam_id, base_url=BASE_URL, store=None, session=None):
+    """
+    ดึงข้อมูลข้อสอบจาก API
+    
+    ถ้าระบุ store (ExamStore) จะส่ง If-None-Match / If-Modified-Since จากรอบก่อน
+    เมื่อได้ 304 จะคืนค่าข้อสอบเดิมจากคลังโดยไม่ต้องดาวน์โหลดใหม่
+    ส่ง session (requests.Session) เข้ามาเพื่อใช้ connection ร่วมกับงานอื่น (ค่าเริ่มต้นคือ session ร่วมที่รองรับ cassette)
+    คืนค่า NOT_FOUND เมื่อ API ตอบ 404 (ไม่มีข้อสอบนี้) และ None เมื่อดึงไม่สำเร็จ
+    """
     try:
         # URL
-        api_url = f"https://www.trueplookpanya.com/webservice/api/examination/formdoexamination?exam_id={exam_id}"
+        api_url = build_api_url(exam_id, base_url)
+        headers = store.conditional_headers(exam_id) if store else {}
         
         # ส่ง request ไปยัง API
-        response = requests.get(api_url, timeout=30)
+        response = (session or default_session()).get(api_url, headers=headers, timeout=30)
         
+        if response.status_code == 304 and store:
+            exam_data = store.mark_not_modified(exam_id)
+            if exam_data is not None:
+                return exam_data
+            # คลังไม่มีฉบับเดิมให้ใช้ ดึงใหม่แบบไม่มีเงื่อนไข
+            response = (session or default_session()).get(api_url, timeout=30)
         if response.status_code == 200:
-            data = response.json()
-            
-            # ดึงข้อมูลเมตาเดตา
-            metadata = {
-                "exam_id": data['data']['exam']['exam_id'],
-                "exam_name": data['data']['exam']['exam_name'],
-                "level_name": data['data']['exam']['level_name'],
-                "subject_name": data['data']['exam']['subject_name'],
-                "question_count": data['data']['exam']['question_count']
-            }
-            
-            # ดึงข้อมูลคำถามและตัวเลือก
-            questions_list = []
-            for i, question_data in enumerate(data['data']['formdo'], 1):
-                question_detail = {
-                    "question_number": i,
-                    "question_id": question_data['question_id'],
-                    "question_text": question_data['question_detail'],
-                    "choices": []
-                }
-                
-                for j, choice in enumerate(question_data['choice'], 1):
-                    choice_detail = {
-                        "choice_number": j,
-                        "choice_text": choice['detail'],
-                        "is_correct": choice['answer'] == "true"
-                    }
-                    question_detail["choices"].append(choice_detail)
-                
-                questions_list.append(question_detail)
-            
-            # รวมข้อมูลทั้งหมด
-            return {
-                "metadata": metadata,
-                "questions": questions_list
-            }
+            exam_data = parse_exam_payload(response.json())
+            if store:
+                store.put(exam_id, exam_data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return exam_data
+        elif response.status_code == 404:
+            print(f"ไม่พบข้อสอบ exam_id {exam_id}")
+            return NOT_FOUND
         else:
             print(f"ไม่สามารถดึงข้อมูล exam_id {exam_id} ได้ (Status: {response.status_code})")
             return None
@@ -75,32 +117,185 @@ def extract_exam_data(exam_id):
         print(f"เกิดข้อผิดพลาดกับ exam_id {exam_id}: {e}")
         return None
 
+def exam_filename(exam_data):
+    """สร้างชื่อไฟล์ JSON จากข้อมูลเมตาเดตา"""
+    metadata = exam_data["metadata"]
+    filename = f"{metadata['exam_id']}_{metadata['exam_name']}_{metadata['level_name']}_{metadata['subject_name']}.json"
+    return sanitize_filename(filename)
+
+async def fetch_exam_async(session, limiter, exam_id, base_url=BASE_URL, store=None):
+    """
+    ดึงข้อมูลข้อสอบ 1 ชุดแบบ async คืนค่า (สถานะ, ข้อมูล)
+    
+    ถ้าระบุ store จะส่ง conditional request และคืนค่าสถานะ "not_modified" พร้อมข้อสอบฉบับในคลังเมื่อเซิร์ฟเวอร์ตอบ 304
+    งานอ่าน/เขียนไฟล์ของ store ทำใน thread เพื่อไม่บล็อก event loop ที่ worker ตัวอื่นใช้ร่วมกัน
+    """
+    api_url = build_api_url(exam_id, base_url)
+    headers = store.conditional_headers(exam_id) if store else {}
+    try:
+        # limiter ปรับอัตราตาม 429/503 และ retry ตาม Retry-After / backoff ให้
+        status, response_headers, body = await request_async(session, "GET", api_url, limiter, headers=headers)
+        if status == 304 and store:
+            exam_data = await asyncio.to_thread(store.mark_not_modified, exam_id)
+            if exam_data is not None:
+                return "not_modified", exam_data
+            # index ของคลังไม่มีฉบับเดิมแล้ว (ถูกเขียนทับ หรือ ETag ร่วมจาก CDN) ดึงใหม่แบบไม่มีเงื่อนไข
+            status, response_headers, body = await request_async(session, "GET", api_url, limiter)
+        if status == 404:
+            return "not_found", None
+        if status != 200:
+            print(f"ไม่สามารถดึงข้อมูล exam_id {exam_id} ได้ (Status: {status})")
+            return "failed", None
+        try:
+            exam_data = parse_exam_payload(json.loads(body))
+        except ValueError as e:
+            # body ไม่ครบหรือไม่ใช่ JSON (เช่นหน้า error ของ proxy) ไม่ได้แปลว่าไม่มีข้อสอบ ต้องลองใหม่
+            print(f"response ของ exam_id {exam_id} ไม่ใช่ JSON ที่สมบูรณ์: {e}")
+            return "failed", None
+        except (KeyError, TypeError) as e:
+            # API ตอบกลับมาแต่ไม่มีข้อมูลข้อสอบ อาจเป็นแค่ชั่วคราว จึงลองใหม่รอบหน้า (ไม่พบจริงคือ 404)
+            print(f"ไม่พบข้อมูลข้อสอบใน response ของ exam_id {exam_id}: {e}")
+            return "empty", None
+        if not exam_data["questions"]:
+            return "empty", None
+        validators = (response_headers.get("ETag"), response_headers.get("Last-Modified"))
+        if store:
+            _, changed = await asyncio.to_thread(store.put, exam_id, exam_data, *validators)
+            if not changed:
+                return "unchanged", exam_data
+        return "ok", exam_data
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"เกิดข้อผิดพลาดกับ exam_id {exam_id}: {e}")
+        return "failed", None
+
+async def harvest_exam_range(start_id, end_id, output_dir, concurrency=16, rate=8.0, base_url=BASE_URL, journal_path=None, sink="json",
+                             store_dir=DEFAULT_STORE_DIR, refresh=False):
+    """
+    ดึงข้อสอบช่วง start_id..end_id พร้อมกันหลายตัว (จำกัดจำนวนงานพร้อมกันด้วย concurrency และอัตราสูงสุดต่อ host ด้วย rate)
+    
+    sink เลือกรูปแบบการบันทึก: "json" (ไฟล์ละข้อสอบ), "jsonl" หรือ "parquet" (รวมเป็นไฟล์ใหญ่ไม่กี่ไฟล์)
+    store_dir คือคลัง content-addressed (None = ไม่ใช้) ข้อสอบที่เนื้อหาไม่เปลี่ยนจะไม่ถูกเขียนซ้ำ
+    เฉพาะเมื่อ journal ของ output นี้มีเนื้อหาเดียวกันอยู่แล้ว (คลังใช้ร่วมกันหลาย output จึงตัดสินจากคลังอย่างเดียวไม่ได้)
+    refresh=True จะตรวจซ้ำทุก id ในช่วง (รวม id ที่เสร็จแล้วใน journal) ด้วย conditional request
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    # ข้าม id ที่เสร็จแล้วจาก journal ของรอบก่อน และลองใหม่เฉพาะ id ที่ล้มเหลว
+    journal = ScrapeJournal(journal_path or os.path.join(output_dir, "scrape_journal.jsonl"))
+    # journal บันทึก "ok" เมื่อ sink เขียนลงดิสก์แล้วเท่านั้น
+    exam_sink = open_sink(sink, output_dir, filename_fn=exam_filename, on_durable=journal.record_durable)
+    pending_ids = list(range(start_id, end_id + 1)) if refresh else journal.pending_ids(start_id, end_id)
+    store = ExamStore(store_dir) if store_dir else None
+    
+    stats = {"ok": 0, "unchanged": 0, "not_modified": 0, "not_found": 0, "empty": 0, "failed": 0,
+             "skipped": (end_id - start_id + 1) - len(pending_ids)}
+    exam_ids = iter(pending_ids)
+    # เริ่มที่ rate แล้วลด/เพิ่มเองตามการตอบของเซิร์ฟเวอร์ (ไม่เกิน rate)
+    limiter = AdaptiveRateLimiter(initial_rate=rate, max_rate=rate)
+    
+    # ใช้ connection pool แบบ keep-alive ร่วมกันทุก worker
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=30)
+    
+    def persist(exam_id, status, exam_data):
+        """บันทึกผลของ exam_id แล้วคืนค่าสถานะที่ใช้นับใน stats"""
+        # sink และ journal มี lock ของตัวเอง เรียกจากหลาย thread พร้อมกันได้
+        if status not in ("ok", "unchanged", "not_modified"):
+            journal.record(exam_id, status)
+            return status
+        content_hash = hash_exam_data(exam_data)
+        if status != "ok" and journal.has_content(exam_id, content_hash):
+            # เนื้อหาเหมือนรอบก่อนและ output นี้มีอยู่แล้ว ไม่ต้องเขียนซ้ำ
+            return status
+        # output ใหม่ (หรือ sink อื่น) ยังไม่มีข้อสอบนี้ เขียนฉบับจากคลังลง sink ตามปกติ
+        exam_sink.write(exam_data, (exam_id, content_hash))
+        return "ok"
+    
+    async def worker(session):
+        # worker แต่ละตัวหยิบ exam_id ถัดไปจาก iterator ร่วมกัน จึงมีงานค้างไม่เกิน concurrency งานเสมอ
+        for exam_id in exam_ids:
+            status, exam_data = await fetch_exam_async(session, limiter, exam_id, base_url, store)
+            # การเขียนไฟล์ (sink / journal) ทำใน thread ระหว่างนั้น worker ตัวอื่นยังดึงข้อมูลต่อได้
+            status = await asyncio.to_thread(persist, exam_id, status, exam_data)
+            stats[status] += 1
+    
+    started_at = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        try:
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        finally:
+            exam_sink.close()
+            journal.close()
+            if store:
+                store.save()
+    elapsed = time.perf_counter() - started_at
+    
+    total = sum(stats[status] for status in ("ok", "unchanged", "not_modified", "not_found", "empty", "failed"))
+    stats["elapsed"] = round(elapsed, 3)
+    stats["ids_per_sec"] = round(total / elapsed, 2) if elapsed > 0 else 0.0
+    
+    print("\nสรุปผลการดึงข้อมูล:")
+    print(f"สำเร็จ: {stats['ok']} | ไม่เปลี่ยนแปลง: {stats['unchanged'] + stats['not_modified']} | "
+          f"ไม่พบ: {stats['not_found']} | ไม่มีคำถาม: {stats['empty']} | ล้มเหลว: {stats['failed']} | ข้าม: {stats['skipped']}")
+    print(f"ใช้เวลา {stats['elapsed']} วินาที ({stats['ids_per_sec']} ids/sec)")
+    stats["rate_limit"] = limiter.report()
+    print(f"rate limit: {limiter.format_report()}")
+    if store:
+        stats["dedup"] = dict(store.stats)
+        print(f"dedup: {store.summary()}")
+    return stats
+
+def parse_args():
+    """อ่านพารามิเตอร์จาก command line"""
+    parser = argparse.ArgumentParser(description="ดึงข้อมูลข้อสอบจาก API ของทรูปลูกปัญญา")
+    parser.add_argument("--start", type=int, default=13500, help="exam_id เริ่มต้น")
+    parser.add_argument("--end", type=int, default=None, help="exam_id สุดท้าย (ถ้าระบุจะดึงทั้งช่วงแบบ async)")
+    parser.add_argument("--concurrency", type=int, default=16, help="จำนวน request ที่ทำงานพร้อมกันสูงสุด")
+    parser.add_argument("--rate", type=float, default=8.0, help="จำนวน request สูงสุดต่อวินาทีต่อ host (ลดลงเองเมื่อโดน 429/503)")
+    parser.add_argument("--base-url", default=BASE_URL, help="เปลี่ยนปลายทาง เช่น http://127.0.0.1:8000 สำหรับทดสอบ")
+    parser.add_argument("--output-dir", default=os.path.join("data", "output"), help="โฟลเดอร์สำหรับบันทึกไฟล์")
+    parser.add_argument("--journal", default=None, help="ไฟล์ journal สำหรับรันต่อจากเดิม (ค่าเริ่มต้นอยู่ในโฟลเดอร์ output)")
+    parser.add_argument("--sink", choices=["json", "jsonl", "parquet"], default="json", help="รูปแบบไฟล์ output (jsonl/parquet รวมหลายข้อสอบในไฟล์เดียว)")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="โฟลเดอร์คลังข้อสอบแบบ content-addressed (ระบุ none เพื่อปิด)")
+    parser.add_argument("--refresh", action="store_true", help="ตรวจซ้ำ id ที่เสร็จแล้วด้วย conditional request (ได้ 304 ถ้าไม่เปลี่ยน)")
+    return parser.parse_args()
+
 def main():
     """ฟังก์ชันหลักสำหรับดึงและบันทึกข้อมูลข้อสอบ"""
+    args = parse_args()
+    
     # สร้างโฟลเดอร์ output
-    output_dir = os.path.join("data", "output")
+    output_dir = args.output_dir
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
+    store_dir = None if args.store.lower() == "none" else args.store
+    
+    # ระบุ --end เมื่อต้องการดึงทั้งช่วงแบบ async
+    if args.end is not None:
+        print(f"เริ่มดึงข้อมูลข้อสอบ ID {args.start} ถึง {args.end} (concurrency={args.concurrency}, rate={args.rate}/วินาที)")
+        asyncio.run(harvest_exam_range(args.start, args.end, output_dir, args.concurrency, args.rate, args.base_url, args.journal, args.sink,
+                                       store_dir, args.refresh))
+        return
+    
     # กำหนด exam ID ที่ต้องการ
-    exam_id = 13500
+    exam_id = args.start
     
     print(f"เริ่มดึงข้อมูลข้อสอบ ID {exam_id}")
     
     # ดึงข้อมูลข้อสอบ
-    exam_data = extract_exam_data(exam_id)
+    store = ExamStore(store_dir) if store_dir else None
+    exam_data = extract_exam_data(exam_id, args.base_url, store)
     
     if exam_data:
-        # สร้างชื่อไฟล์จากข้อมูลเมตาเดตา
-        metadata = exam_data["metadata"]
-        filename = f"{metadata['exam_id']}_{metadata['exam_name']}_{metadata['level_name']}_{metadata['subject_name']}.json"
-        filename = sanitize_filename(filename)
-        
-        # บันทึกไฟล์
-        file_path = os.path.join(output_dir, filename)
-        with open(file_path, "w", encoding="utf-8") as json_file:
-            json.dump(exam_data, json_file, ensure_ascii=False, indent=4)
+        # ไม่มี journal ในโหมดนี้ จึงบอกไม่ได้ว่า output_dir / sink นี้มีข้อสอบอยู่แล้วหรือไม่ บันทึกทุกครั้ง
+        # (ข้อสอบที่ไม่เปลี่ยนยังประหยัดการดาวน์โหลดด้วย 304 จากคลัง)
+        if store:
+            store.save()
+            print(f"dedup: {store.summary()}")
+        with open_sink(args.sink, output_dir, filename_fn=exam_filename) as exam_sink:
+            location = exam_sink.write(exam_data)
         
-        print(f"บันทึกข้อมูลสำเร็จ: {filename}")
+        print(f"บันทึกข้อมูลสำเร็จ: {os.path.basename(location)}")
         print("เสร็จสิ้น!")
     else:
         print(f"ไม่สามารถดึงข้อมูล exam_id {exam_id} ได้")
@@ -4,47 +4,61 @@
 วิธีที่ 2: Web Scraping แทนการเรียก API
 """
 
-import requests
+import argparse
+import asyncio
+import functools
 import json
 import os
 import re
+import sys
 from pathlib import Path
-from bs4 import BeautifulSoup
+
+import aiohttp
+
+from exam_sinks import open_sink
+from html_parsers import DEFAULT_BACKEND, parse_html
+from http_cassette import default_session
+from parse_pipeline import ExamPipeline
+from scrape_journal import NOT_FOUND, ScrapeJournal, hash_exam_data
+from selector_plan import SelectorPlan
+
+# rate_limiter.py อยู่ที่ root ของ repo ใช้ร่วมกับ tasks อื่นและสคริปต์ gitlab
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from rate_limiter import AdaptiveRateLimiter, request_async
+
+WEB_URL = "https://www.trueplookpanya.com/examination2/examPreview?id={exam_id}"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# จำ selector/pattern ที่ใช้ได้กับ template ของหน้า examPreview ข้ามหน้าและข้ามการรัน
+selector_plan = SelectorPlan(layout="examPreview_bs4")
 
 def sanitize_filename(filename):
     """แปลงชื่อไฟล์ให้ปลอดภัย โดยแทนที่อักขระพิเศษด้วย underscore"""
     return re.sub(r'[<>:"/\\|?*]', '_', filename)
 
-def extract_exam_data_from_web(exam_id):
-    """ดึงข้อมูลข้อสอบจากหน้าเว็บโดยใช้ BeautifulSoup"""
+def extract_exam_data_from_web(exam_id, parser_backend=DEFAULT_BACKEND, session=None):
+    """
+    ดึงข้อมูลข้อสอบจากหน้าเว็บโดยใช้ BeautifulSoup (เลือก parser ได้ด้วย parser_backend และใช้ session ร่วมได้)
+    
+    คืนค่า NOT_FOUND เมื่อหน้าเว็บตอบ 404 และ None เมื่อดึงหรือแปลงข้อมูลไม่สำเร็จ
+    """
     try:
         # URL ของหน้าเว็บ
-        web_url = f"https://www.trueplookpanya.com/examination2/examPreview?id={exam_id}"
+        web_url = WEB_URL.format(exam_id=exam_id)
         
         # ส่ง request ไปยังหน้าเว็บ
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(web_url, headers=headers, timeout=30)
+        response = (session or default_session()).get(web_url, headers=HEADERS, timeout=30)
         
         if response.status_code == 200:
-            # แปลง HTML ด้วย BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # ดึงข้อมูลเมตาเดตา
-            metadata = extract_metadata(soup, exam_id)
-            
-            # ดึงข้อมูลคำถาม
-            questions = extract_questions(soup)
-            
-            if metadata and questions:
-                return {
-                    "metadata": metadata,
-                    "questions": questions
-                }
-            else:
+            exam_data = parse_exam_page(exam_id, response.content, parser_backend)
+            if exam_data is None:
                 print(f"ไม่พบข้อมูลข้อสอบในหน้าเว็บ exam_id {exam_id}")
-                return None
+            return exam_data
+        elif response.status_code == 404:
+            print(f"ไม่พบหน้าข้อสอบ exam_id {exam_id}")
+            return NOT_FOUND
         else:
             print(f"ไม่สามารถเข้าถึงหน้าเว็บ exam_id {exam_id} ได้ (Status: {response.status_code})")
             return None
@@ -52,6 +66,113 @@ def extract_exam_data_from_web(exam_id):
         print(f"เกิดข้อผิดพลาดกับ exam_id {exam_id}: {e}")
         return None
 
+def parse_exam_page(exam_id, markup, parser_backend=DEFAULT_BACKEND):
+    """แปลง HTML ของหน้าข้อสอบเป็น metadata + questions (เป็นฟังก์ชันระดับ module จึงส่งไปรันใน process อื่นได้)"""
+    # แปลง HTML ด้วย BeautifulSoup ผ่าน parser ที่เลือก
+    soup = parse_html(markup, parser_backend)
+    
+    # ดึงข้อมูลเมตาเดตา
+    metadata = extract_metadata(soup, exam_id)
+    
+    # ดึงข้อมูลคำถาม
+    questions = extract_questions(soup)
+    
+    if metadata and questions:
+        return {
+            "metadata": metadata,
+            "questions": questions
+        }
+    return None
+
+def parse_exam_page_in_worker(exam_id, markup, parser_backend=DEFAULT_BACKEND):
+    """
+    parse_exam_page สำหรับ process pool คืนค่า (exam_data, ผลของ selector plan)
+    
+    process ลูกแต่ละตัวมี selector_plan ของตัวเอง จึงไม่บันทึกไฟล์แผนเอง แต่ส่ง selector ที่ชนะ
+    และตัวนับ hit/miss กลับไปให้ process หลักรวมและบันทึกที่เดียว
+    """
+    selector_plan.autosave = False
+    exam_data = parse_exam_page(exam_id, markup, parser_backend)
+    return exam_data, selector_plan.drain()
+
+def extract_exam_range_from_web(start_id, end_id, output_dir, parser_backend=DEFAULT_BACKEND, fetch_concurrency=8,
+                                parse_workers=None, rate=8.0, sink="json", journal_path=None, url_template=WEB_URL):
+    """
+    ดึงข้อสอบช่วง start_id..end_id แบบ pipeline: ดึงหน้าเว็บแบบ async → parse ใน process pool → writer ตัวเดียว
+    
+    Args:
+        fetch_concurrency (int): จำนวน request ที่ทำงานพร้อมกัน
+        parse_workers (int): จำนวน process สำหรับ parse (ค่าเริ่มต้น = จำนวน CPU)
+        rate (float): จำนวน request สูงสุดต่อวินาทีต่อ host (ลดลงเองเมื่อโดน 429/503)
+        url_template (str): URL ของหน้าข้อสอบ (เปลี่ยนเพื่อชี้ไปยังเซิร์ฟเวอร์ทดสอบได้)
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    journal = ScrapeJournal(journal_path or os.path.join(output_dir, "scrape_journal.jsonl"))
+    pending_ids = journal.pending_ids(start_id, end_id)
+    exam_sink = open_sink(sink, output_dir, filename_fn=lambda data: exam_filename(data["metadata"]),
+                          on_durable=journal.record_durable)
+    stats = {"ok": 0, "failed": 0, "skipped": (end_id - start_id + 1) - len(pending_ids)}
+    
+    def write(exam_id, result):
+        exam_data = None
+        if result is not None:
+            exam_data, plan_report = result
+            selector_plan.merge(plan_report)
+        if exam_data is None:
+            journal.record(exam_id, "failed")
+            stats["failed"] += 1
+            return
+        exam_data["metadata"]["question_count"] = len(exam_data["questions"])
+        exam_sink.write(exam_data, (exam_id, hash_exam_data(exam_data)))
+        stats["ok"] += 1
+    
+    async def run():
+        limiter = AdaptiveRateLimiter(initial_rate=rate, max_rate=rate)
+        connector = aiohttp.TCPConnector(limit=fetch_concurrency, keepalive_timeout=60)
+        async with aiohttp.ClientSession(connector=connector, headers=HEADERS,
+                                         timeout=aiohttp.ClientTimeout(total=30)) as session:
+            async def fetch(exam_id):
+                url = url_template.format(exam_id=exam_id)
+                status, _, body = await request_async(session, "GET", url, limiter)
+                if status != 200:
+                    print(f"ไม่สามารถเข้าถึงหน้าเว็บ exam_id {exam_id} ได้ (Status: {status})")
+                    return None
+                return body
+            
+            pipeline = ExamPipeline(fetch, functools.partial(parse_exam_page_in_worker, parser_backend=parser_backend), write,
+                                    fetch_concurrency=fetch_concurrency, parse_workers=parse_workers, report_every=5)
+            metrics = await pipeline.run(pending_ids)
+            metrics["rate_limit"] = limiter.report()
+            return metrics
+    
+    try:
+        metrics = asyncio.run(run())
+    finally:
+        exam_sink.close()
+        journal.close()
+    # ข้อสอบที่เขียนไม่สำเร็จไม่ถูกบันทึกใน journal รอบหน้าจึงดึงใหม่
+    stats["failed"] += metrics["errors"]["write"]
+    
+    print("\nสรุปผลการดึงข้อมูล:")
+    print(f"สำเร็จ: {stats['ok']} | ล้มเหลว: {stats['failed']} | ข้าม: {stats['skipped']} | ใช้เวลา {metrics['elapsed']} วินาที")
+    for name, stage in metrics["stages"].items():
+        print(f"  {name:<6} {stage['items']:>6} งาน | {stage['items_per_sec']:>8}/วินาที | เฉลี่ย {stage['avg_ms']} ms")
+    for name, queue in metrics["queues"].items():
+        print(f"  queue {name:<6} สูงสุด {queue['max']} | เฉลี่ย {queue['mean']}")
+    for host, entry in metrics["rate_limit"].items():
+        print(f"  rate limit {host}: อัตราจริง {entry['effective_rate']}/วินาที | throttled {entry['throttled']} | retry {entry['retries']}")
+    # ตัวนับของทุก process ลูกถูกรวมไว้ที่ selector_plan ของ process หลักแล้ว
+    plan_stats = selector_plan.stats()
+    print(f"  selector plan: hit {plan_stats['hits']} / miss {plan_stats['misses']} (hit rate {plan_stats['hit_rate']})")
+    stats["pipeline"] = metrics
+    stats["selector_plan"] = plan_stats
+    return stats
+
+def exam_filename(metadata, suffix="_bs4"):
+    """สร้างชื่อไฟล์จากข้อมูลเมตาเดตา"""
+    filename = f"{metadata['exam_id']}_{metadata['exam_name']}_{metadata['level_name']}_{metadata['subject_name']}{suffix}.json"
+    return sanitize_filename(filename)
+
 def extract_metadata(soup, exam_id):
     """ดึงข้อมูลเมตาเดตาจาก HTML"""
     try:
@@ -65,11 +186,9 @@ def extract_metadata(soup, exam_id):
             '[class*="title"]', '[class*="exam"]'
         ]
         
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem and title_elem.get_text().strip():
-                metadata["exam_name"] = title_elem.get_text().strip()
-                break
+        title_elem = selector_plan.select_one(soup, "title", title_selectors)
+        if title_elem:
+            metadata["exam_name"] = title_elem.get_text().strip()
         
         # หาข้อมูลระดับและวิชา
         info_text = soup.get_text()
@@ -81,11 +200,9 @@ def extract_metadata(soup, exam_id):
             r'Level\s*([^\n\r]+)'
         ]
         
-        for pattern in level_patterns:
-            match = re.search(pattern, info_text)
-            if match:
-                metadata["level_name"] = match.group(1).strip()
-                break
+        match = selector_plan.search(info_text, "level", level_patterns)
+        if match:
+            metadata["level_name"] = match.group(1).strip()
         
         # ลองหาคำที่บ่งบอกวิชา
         subject_patterns = [
@@ -94,11 +211,9 @@ def extract_metadata(soup, exam_id):
             r'เรื่อง\s*([^\n\r]+)'
         ]
         
-        for pattern in subject_patterns:
-            match = re.search(pattern, info_text)
-            if match:
-                metadata["subject_name"] = match.group(1).strip()
-                break
+        match = selector_plan.search(info_text, "subject", subject_patterns)
+        if match:
+            metadata["subject_name"] = match.group(1).strip()
         
         # ถ้าไม่พบข้อมูล ให้ใส่ค่าเริ่มต้น
         if "exam_name" not in metadata:
@@ -124,11 +239,7 @@ def extract_questions(soup):
             'div[id*="question"]', 'li[class*="question"]'
         ]
         
-        questions_found = []
-        for selector in question_selectors:
-            questions_found = soup.select(selector)
-            if questions_found:
-                break
+        questions_found = selector_plan.select(soup, "question", question_selectors)
         
         # ถ้าไม่เจอ ลองหาจาก pattern อื่น
         if not questions_found:
@@ -140,18 +251,15 @@ def extract_questions(soup):
                 r'Question\s*(\d+)\s*[.:]?\s*([^\n\r]+)'
             ]
             
-            for pattern in question_patterns:
-                matches = re.findall(pattern, text_content)
-                if matches:
-                    for i, (num, text) in enumerate(matches, 1):
-                        question_detail = {
-                            "question_number": i,
-                            "question_id": f"q_{i}",
-                            "question_text": text.strip(),
-                            "choices": []
-                        }
-                        questions_list.append(question_detail)
-                    break
+            matches = selector_plan.findall(text_content, "question_text", question_patterns)
+            for i, (num, text) in enumerate(matches, 1):
+                question_detail = {
+                    "question_number": i,
+                    "question_id": f"q_{i}",
+                    "question_text": text.strip(),
+                    "choices": []
+                }
+                questions_list.append(question_detail)
         else:
             # ถ้าเจอ element ของคำถาม
             for i, question_elem in enumerate(questions_found, 1):
@@ -169,11 +277,7 @@ def extract_questions(soup):
                     '.choice', '.option', '[class*="choice"]', '[class*="option"]'
                 ]
                 
-                choices_found = []
-                for selector in choice_selectors:
-                    choices_found = question_elem.select(selector)
-                    if choices_found:
-                        break
+                choices_found = selector_plan.select(question_elem, "choice", choice_selectors)
                 
                 # ถ้าไม่เจอตัวเลือก ลองหาจาก pattern
                 if not choices_found:
@@ -184,17 +288,14 @@ def extract_questions(soup):
                     ]
                     
                     question_text_full = question_elem.get_text()
-                    for pattern in choice_patterns:
-                        choice_matches = re.findall(pattern, question_text_full)
-                        if choice_matches:
-                            for j, choice_text in enumerate(choice_matches, 1):
-                                choice_detail = {
-                                    "choice_number": j,
-                                    "choice_text": choice_text.strip(),
-                                    "is_correct": False  # ไม่สามารถระบุคำตอบที่ถูกจาก HTML ได้
-                                }
-                                question_detail["choices"].append(choice_detail)
-                            break
+                    choice_matches = selector_plan.findall(question_text_full, "choice_text", choice_patterns)
+                    for j, choice_text in enumerate(choice_matches, 1):
+                        choice_detail = {
+                            "choice_number": j,
+                            "choice_text": choice_text.strip(),
+                            "is_correct": False  # ไม่สามารถระบุคำตอบที่ถูกจาก HTML ได้
+                        }
+                        question_detail["choices"].append(choice_detail)
                 else:
                     # ถ้าเจอ element ของตัวเลือก
                     for j, choice_elem in enumerate(choices_found, 1):
@@ -219,12 +320,27 @@ def extract_questions(soup):
 
 def main():
     """ฟังก์ชันหลักสำหรับดึงและบันทึกข้อมูลข้อสอบ"""
+    parser = argparse.ArgumentParser(description="ดึงข้อมูลข้อสอบจากหน้าเว็บด้วย BeautifulSoup")
+    parser.add_argument("--start", type=int, default=13500, help="exam_id เริ่มต้น")
+    parser.add_argument("--end", type=int, default=None, help="exam_id สุดท้าย (ถ้าระบุจะดึงทั้งช่วงแบบ pipeline)")
+    parser.add_argument("--concurrency", type=int, default=8, help="จำนวน request ที่ทำงานพร้อมกัน")
+    parser.add_argument("--parse-workers", type=int, default=None, help="จำนวน process สำหรับ parse")
+    parser.add_argument("--rate", type=float, default=8.0, help="จำนวน request สูงสุดต่อวินาทีต่อ host (ลดลงเองเมื่อโดน 429/503)")
+    parser.add_argument("--sink", choices=["json", "jsonl", "parquet"], default="json", help="รูปแบบไฟล์ output")
+    args = parser.parse_args()
+    
     # สร้างโฟลเดอร์ output
     output_dir = os.path.join("data", "output")
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
+    if args.end is not None:
+        print(f"เริ่มดึงข้อมูลข้อสอบ ID {args.start} ถึง {args.end} จากหน้าเว็บ (pipeline)")
+        extract_exam_range_from_web(args.start, args.end, output_dir, fetch_concurrency=args.concurrency,
+                                    parse_workers=args.parse_workers, rate=args.rate, sink=args.sink)
+        return
+    
     # กำหนด exam ID ที่ต้องการ
-    exam_id = 13500
+    exam_id = args.start
     
     print(f"เริ่มดึงข้อมูลข้อสอบ ID {exam_id} จากหน้าเว็บ (BeautifulSoup)")
     
@@ -236,9 +352,7 @@ def main():
         exam_data["metadata"]["question_count"] = len(exam_data["questions"])
         
         # สร้างชื่อไฟล์จากข้อมูลเมตาเดตา
-        metadata = exam_data["metadata"]
-        filename = f"{metadata['exam_id']}_{metadata['exam_name']}_{metadata['level_name']}_{metadata['subject_name']}_bs4.json"
-        filename = sanitize_filename(filename)
+        filename = exam_filename(exam_data["metadata"])
         
         # บันทึกไฟล์
         file_path = os.path.join(output_dir, filename)
@@ -247,6 +361,8 @@ def main():
         
         print(f"บันทึกข้อมูลสำเร็จ: {filename}")
         print(f"พบคำถาม {len(exam_data['questions'])} ข้อ")
+        plan_stats = selector_plan.stats()
+        print(f"selector plan: hit {plan_stats['hits']} / miss {plan_stats['misses']} (hit rate {plan_stats['hit_rate']})")
         print("เสร็จสิ้น!")
     else:
         print(f"ไม่สามารถดึงข้อมูล exam_id {exam_id} ได้")
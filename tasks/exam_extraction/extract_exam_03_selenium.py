@@ -6,22 +6,32 @@
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+
+from scrape_journal import NOT_FOUND
+from webdriver_pool import WebDriverPool, create_chrome_driver
+
+# pattern ของข้อความในหน้า compile ครั้งเดียวตอน import
+LEVEL_PATTERN = re.compile(r'ม\.\s*(\d+)')
+SUBJECT_PATTERN = re.compile(r'(คณิตศาสตร์|ภาษาไทย|ภาษาอังกฤษ|วิทยาศาสตร์|สังคมศึกษา)')
+QUESTION_PATTERN = re.compile(r'(\d+)\.\s*([^\n\r]{10,})')
 
 def sanitize_filename(filename):
     return re.sub(r'[<>:"/\\|?*]', '_', filename)
 
-def extract_exam_data_selenium(exam_id):
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
+def extract_exam_data_selenium(exam_id, driver=None):
+    # ส่ง driver เข้ามาเพื่อใช้เบราว์เซอร์เดิมซ้ำ ถ้าไม่ส่งจะเปิดใหม่แล้วปิดเมื่อเสร็จ
+    # คืนค่า NOT_FOUND เมื่อได้หน้า 404 และ None เมื่อดึงไม่สำเร็จ
+    owns_driver = driver is None
     
     try:
-        driver = webdriver.Chrome(options=chrome_options)
+        if owns_driver:
+            driver = create_chrome_driver(headless=True)
         driver.get(f"https://www.trueplookpanya.com/examination2/examPreview?id={exam_id}")
+        if "404" in driver.title or "Not Found" in driver.title:
+            return NOT_FOUND
         driver.implicitly_wait(5)
         
         page_text = driver.find_element(By.TAG_NAME, "body").text
@@ -37,15 +47,15 @@ def extract_exam_data_selenium(exam_id):
             metadata["exam_name"] = f"Exam_{exam_id}"
         
         # หาระดับและวิชา
-        level_match = re.search(r'ม\.\s*(\d+)', page_text)
-        subject_match = re.search(r'(คณิตศาสตร์|ภาษาไทย|ภาษาอังกฤษ|วิทยาศาสตร์|สังคมศึกษา)', page_text)
+        level_match = LEVEL_PATTERN.search(page_text)
+        subject_match = SUBJECT_PATTERN.search(page_text)
         
         metadata["level_name"] = f"ม.{level_match.group(1)}" if level_match else "Unknown"
         metadata["subject_name"] = subject_match.group(1) if subject_match else "Unknown"
         
         # หาคำถาม
         questions_list = []
-        matches = re.findall(r'(\d+)\.\s*([^\n\r]{10,})', page_text)
+        matches = QUESTION_PATTERN.findall(page_text)
         
         for i, (num, text) in enumerate(matches, 1):
             questions_list.append({
@@ -55,8 +65,6 @@ def extract_exam_data_selenium(exam_id):
                 "choices": []
             })
         
-        driver.quit()
-        
         if questions_list:
             metadata["question_count"] = len(questions_list)
             return {"metadata": metadata, "questions": questions_list}
@@ -65,6 +73,23 @@ def extract_exam_data_selenium(exam_id):
     except Exception as e:
         print(f"Error: {e}")
         return None
+    finally:
+        if owns_driver and driver is not None:
+            driver.quit()
+
+def extract_exam_range_selenium(exam_ids, pool_size=2, max_pages_per_driver=50):
+    """ดึงข้อสอบหลาย id โดยกระจายงานให้ worker ละ 1 เบราว์เซอร์จาก pool"""
+    pool = WebDriverPool(size=pool_size, headless=True, max_pages=max_pages_per_driver)
+    
+    def worker(exam_id):
+        with pool.driver() as driver:
+            return exam_id, extract_exam_data_selenium(exam_id, driver)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            return dict(executor.map(worker, exam_ids))
+    finally:
+        pool.close()
 
 def main():
     output_dir = os.path.join("data", "output")
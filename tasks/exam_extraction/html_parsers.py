@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+ตัวเลือก parser สำหรับแปลง HTML ของหน้าข้อสอบเป็น BeautifulSoup
+
+- "html.parser" : parser มาตรฐานของ Python (ช้าที่สุด ไม่ต้องติดตั้งเพิ่ม)
+- "lxml"        : ใช้ lxml (เขียนด้วย C) เป็นตัวสร้าง tree ของ BeautifulSoup
+- "lxml-stream" : ป้อน HTML ให้ lxml ทีละ chunk ขณะสร้าง soup แล้วหยุดทันทีที่ container
+                  ของคำถามปิด ส่วนท้ายหน้า (footer, script) จะไม่ถูก parse เลย
+
+ทุกตัวเลือกคืนค่าเป็น BeautifulSoup โค้ดที่ใช้ soup.select / get_text เดิมจึงไม่ต้องแก้
+"""
+
+from bs4 import BeautifulSoup
+from bs4.builder import ParserRejectedMarkup
+
+try:
+    from lxml import etree
+    from bs4.builder import LXMLTreeBuilder
+except ImportError:  # lxml เป็น dependency เสริม
+    etree = None
+    LXMLTreeBuilder = object
+
+DEFAULT_BACKEND = "lxml" if etree is not None else "html.parser"
+STREAM_CHUNK_SIZE = 16 * 1024
+
+class _QuestionContainerClosed(Exception):
+    """ยกขึ้นจาก tree builder เพื่อหยุด lxml เมื่อ container ของคำถามปิดแล้ว"""
+
+class StreamingLXMLTreeBuilder(LXMLTreeBuilder):
+    """
+    tree builder ของ BeautifulSoup ที่ป้อน HTML ให้ lxml ทีละ chunk และหยุดทันทีที่ container ของคำถามปิด
+
+    container คือ parent ของ element แรกที่ class มีคำว่า question_class (element แรกตามลำดับเปิดแท็ก
+    คือชั้นนอกสุดเสมอ) สร้าง soup ไปพร้อมกับการอ่านในรอบเดียว ส่วนท้ายหน้าหลัง container จึงไม่ถูก parse เลย
+    ถ้าไม่พบคำถามหรือ container ไม่ปิด จะได้ทั้งหน้าเหมือน backend "lxml"
+    """
+
+    def __init__(self, question_class="question", chunk_size=STREAM_CHUNK_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.question_class = question_class
+        self.chunk_size = chunk_size
+        self.container = None
+
+    def feed(self, markup):
+        self.container = None
+        try:
+            self.parser = self.parser_for(self.soup.original_encoding)
+            for offset in range(0, len(markup), self.chunk_size):
+                self.parser.feed(markup[offset:offset + self.chunk_size])
+            self.parser.close()
+        except _QuestionContainerClosed:
+            # แท็กที่ยังเปิดอยู่ (body, html) BeautifulSoup ปิดให้เองหลัง feed
+            pass
+        except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
+            raise ParserRejectedMarkup(e)
+
+    def start(self, tag, attrib, nsmap={}):
+        super().start(tag, attrib, nsmap)
+        if self.container is None and self.question_class in (attrib.get("class") or "").lower():
+            self.container = self.soup.currentTag.parent
+
+    def end(self, tag):
+        closing = self.soup.currentTag
+        super().end(tag)
+        if closing is self.container:
+            raise _QuestionContainerClosed()
+
+def parse_html(markup, backend=DEFAULT_BACKEND, question_class="question"):
+    """
+    แปลง HTML เป็น BeautifulSoup ด้วย backend ที่เลือก
+
+    Args:
+        markup (str|bytes): HTML ของหน้าเว็บ
+        backend (str): "html.parser", "lxml" หรือ "lxml-stream"
+        question_class (str): คำใน class ของ element คำถาม (ใช้กับ lxml-stream)
+    """
+    if backend in ("lxml", "lxml-stream") and etree is None:
+        backend = "html.parser"
+
+    if backend == "lxml-stream":
+        return BeautifulSoup(markup, builder=StreamingLXMLTreeBuilder(question_class))
+    if backend == "lxml":
+        return BeautifulSoup(markup, "lxml")
+    if backend == "html.parser":
+        return BeautifulSoup(markup, "html.parser")
+    raise ValueError(f"ไม่รู้จัก parser backend: {backend}")
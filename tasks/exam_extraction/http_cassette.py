@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+บันทึกและเล่นซ้ำ (record/replay) HTTP response สำหรับ extractor ที่ใช้ requests
+
+cassette เป็นไฟล์เดียวแบบ append-only คล้าย WARC แต่ละ record มี
+    บรรทัด header เป็น JSON (method, url, status, headers, length) + "\\n" + body ดิบ length ไบต์ + "\\n"
+ตอนเปิดไฟล์จะสร้าง index จาก header อย่างเดียว body อ่านจากดิสก์เมื่อถูกขอ จึงเปิด cassette ขนาดใหญ่ได้เร็ว
+
+โหมด:
+- "record" : ส่ง request จริงทุกครั้งแล้วบันทึก response ต่อท้าย cassette
+- "replay" : ตอบจาก cassette เท่านั้น (ไม่ออก network) URL ที่ไม่มีใน cassette ได้ 404
+- "once"   : ตอบจาก cassette ถ้ามี ถ้าไม่มีจึงส่ง request จริงแล้วบันทึก
+
+เปิดใช้กับ extractor ทุกตัวโดยไม่ต้องแก้โค้ดด้วย environment variable:
+    EXAM_CASSETTE=data/cassettes/exams.warc EXAM_CASSETTE_MODE=replay python extract_exam_01.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# rate_limiter.py อยู่ที่ root ของ repo ใช้ร่วมกับ tasks อื่นและสคริปต์ gitlab
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from rate_limiter import install_rate_limiter
+
+CASSETTE_ENV = "EXAM_CASSETTE"
+CASSETTE_MODE_ENV = "EXAM_CASSETTE_MODE"
+MODES = ("record", "replay", "once")
+
+# header ที่ไม่ตรงกับ body ที่บันทึก (requests คลาย gzip ให้แล้ว)
+DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+
+def request_key(method, url):
+    """key ของ request: method + URL ที่เรียง query parameter แล้ว"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ''))}"
+
+class Cassette:
+    """ไฟล์ cassette ที่เก็บ response หลายรายการ (record หลังสุดของ URL เดียวกันมีผล)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a+b")
+        self._load_index()
+
+    def _load_index(self):
+        self.file.seek(0)
+        while True:
+            header_line = self.file.readline()
+            if not header_line:
+                break
+            try:
+                header = json.loads(header_line)
+            except json.JSONDecodeError:
+                # record สุดท้ายเขียนไม่ครบ ตัดทิ้งแล้วเขียนต่อจากตรงนี้
+                self.file.truncate(self.file.tell() - len(header_line))
+                break
+            offset = self.file.tell()
+            self.file.seek(header["length"] + 1, os.SEEK_CUR)
+            if self.file.tell() > os.fstat(self.file.fileno()).st_size:
+                self.file.truncate(offset - len(header_line))
+                break
+            self.index[request_key(header["method"], header["url"])] = (header, offset)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, method, url):
+        """คืนค่า (header, body) ของ request หรือ None"""
+        entry = self.index.get(request_key(method, url))
+        with self.lock:
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            header, offset = entry
+            self.file.seek(offset)
+            return header, self.file.read(header["length"])
+
+    def append(self, method, url, status, headers, body):
+        """บันทึก response ต่อท้าย cassette"""
+        header = {
+            "method": method.upper(),
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            "length": len(body),
+            "recorded_at": time.time()
+        }
+        with self.lock:
+            self.file.seek(0, os.SEEK_END)
+            self.file.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+            offset = self.file.tell()
+            self.file.write(body + b"\n")
+            self.file.flush()
+            self.index[request_key(method, url)] = (header, offset)
+            self.stats["recorded"] += 1
+
+    def keys(self):
+        return list(self.index)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    transport adapter ของ requests ที่อ่าน/เขียน response ผ่าน Cassette
+
+    request ที่ต้องออก network จะส่งผ่าน upstream (adapter เดิมของ session เช่น RateLimitedAdapter) ถ้ามี
+    response ที่เล่นซ้ำจาก cassette จึงไม่ถูกจำกัดอัตรา
+    """
+
+    def __init__(self, cassette, mode="once", upstream=None, **kwargs):
+        if mode not in MODES:
+            raise ValueError(f"ไม่รู้จักโหมด cassette: {mode}")
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.mode = mode
+        self.upstream = upstream
+
+    def _build_response(self, request, status, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.reason = "OK" if status < 400 else "Not Found"
+        return response
+
+    def send(self, request, **kwargs):
+        if self.mode != "record":
+            record = self.cassette.get(request.method, request.url)
+            if record is not None:
+                header, body = record
+                return self._build_response(request, header["status"], header["headers"], body)
+            if self.mode == "replay":
+                return self._build_response(request, 404, {}, b"")
+
+        if self.upstream is not None:
+            response = self.upstream.send(request, **kwargs)
+        else:
+            response = super().send(request, **kwargs)
+        self.cassette.append(request.method, request.url, response.status_code, response.headers, response.content)
+        return response
+
+def install_cassette(session, cassette, mode="once"):
+    """ติดตั้ง cassette ให้ session (รับ Cassette หรือ path ของไฟล์) คืนค่า Cassette ที่ใช้"""
+    if not isinstance(cassette, Cassette):
+        cassette = Cassette(cassette)
+    for prefix in ("http://", "https://"):
+        session.mount(prefix, CassetteAdapter(cassette, mode, upstream=session.adapters.get(prefix)))
+    return cassette
+
+def install_from_env(session):
+    """ติดตั้ง cassette ตาม EXAM_CASSETTE / EXAM_CASSETTE_MODE ถ้ามีการตั้งค่าไว้ คืนค่า Cassette หรือ None"""
+    path = os.environ.get(CASSETTE_ENV)
+    if not path:
+        return None
+    return install_cassette(session, path, os.environ.get(CASSETTE_MODE_ENV, "once"))
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+def default_session():
+    """session ร่วมของ extractor แบบฟังก์ชัน (จำกัดอัตราด้วย limiter ร่วม และติดตั้ง cassette จาก environment ถ้ามี)"""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = requests.Session()
+            install_rate_limiter(_default_session)
+            install_from_env(_default_session)
+        return _default_session
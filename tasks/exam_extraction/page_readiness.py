@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+กลยุทธ์รอให้หน้าเว็บพร้อม (readiness) สำหรับ Selenium แทนการ time.sleep แบบตายตัว
+แต่ละกลยุทธ์จะ poll สถานะของหน้าเว็บและคืนค่าทันทีที่พร้อม พร้อมเก็บ latency ของแต่ละหน้า
+"""
+
+import json
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+POLL_INTERVAL = 0.1
+
+class ReadinessStrategy:
+    """คลาสแม่ของกลยุทธ์รอหน้าเว็บ คลาสลูกต้อง implement is_ready(driver)"""
+
+    name = "base"
+    # ต้องเปิด performance log ของ Chrome ตอนสร้าง driver หรือไม่
+    needs_performance_log = False
+
+    def reset(self, driver):
+        """เรียกก่อนเริ่มรอของแต่ละหน้า สำหรับล้างสถานะภายใน"""
+
+    def is_ready(self, driver):
+        raise NotImplementedError
+
+    def wait(self, driver, timeout):
+        """รอจนพร้อมหรือหมดเวลา คืนค่า True ถ้าพร้อม"""
+        self.reset(driver)
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(lambda d: self.is_ready(d))
+            return True
+        except TimeoutException:
+            return False
+
+class DomMarkerReady(ReadinessStrategy):
+    """พร้อมเมื่อพบ element ที่ตรงกับ CSS selector อย่างน้อย 1 ตัว"""
+
+    name = "dom_marker"
+
+    def __init__(self, css_selector):
+        self.css_selector = css_selector
+
+    def is_ready(self, driver):
+        return len(driver.find_elements(By.CSS_SELECTOR, self.css_selector)) > 0
+
+class QuestionCountStableReady(ReadinessStrategy):
+    """พร้อมเมื่อจำนวนคำถามบนหน้ามากกว่า 0 และไม่เปลี่ยนแปลงต่อเนื่องนาน stable_seconds"""
+
+    name = "question_count_stable"
+
+    def __init__(self, css_selector, stable_seconds=0.5):
+        self.css_selector = css_selector
+        self.stable_seconds = stable_seconds
+        self.last_count = None
+        self.stable_since = None
+
+    def reset(self, driver):
+        self.last_count = None
+        self.stable_since = None
+
+    def is_ready(self, driver):
+        count = len(driver.find_elements(By.CSS_SELECTOR, self.css_selector))
+        now = time.monotonic()
+        if count != self.last_count:
+            self.last_count = count
+            self.stable_since = now
+            return False
+        return count > 0 and now - self.stable_since >= self.stable_seconds
+
+class NetworkIdleReady(ReadinessStrategy):
+    """
+    พร้อมเมื่อไม่มี request ค้างอยู่นาน idle_seconds โดยอ่านจาก performance log ของ Chrome
+    (ต้องสร้าง driver ด้วย create_chrome_driver(performance_log=True))
+    ถ้าอ่าน log ไม่ได้ จะใช้จำนวน resource จาก Resource Timing API แทน
+    ซึ่งเห็นเฉพาะ request ที่โหลดเสร็จแล้ว XHR ที่ยังค้างอยู่จึงไม่นับ (ใช้เป็นทางสำรองเท่านั้น)
+    """
+
+    name = "network_idle"
+    needs_performance_log = True
+
+    def __init__(self, idle_seconds=0.5):
+        self.idle_seconds = idle_seconds
+        self.inflight = set()
+        self.idle_since = None
+        self.resource_count = None
+        self.use_logs = True
+
+    def reset(self, driver):
+        self.inflight = set()
+        self.idle_since = None
+        self.resource_count = None
+
+    def _update_from_logs(self, driver):
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method = message.get("method")
+            request_id = message.get("params", {}).get("requestId")
+            if method == "Network.requestWillBeSent":
+                self.inflight.add(request_id)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                self.inflight.discard(request_id)
+        return len(self.inflight) == 0
+
+    def _update_from_resource_timing(self, driver):
+        count = driver.execute_script("return performance.getEntriesByType('resource').length")
+        idle = count == self.resource_count
+        self.resource_count = count
+        return idle
+
+    def is_ready(self, driver):
+        if self.use_logs:
+            try:
+                idle = self._update_from_logs(driver)
+            except WebDriverException:
+                self.use_logs = False
+                idle = self._update_from_resource_timing(driver)
+        else:
+            idle = self._update_from_resource_timing(driver)
+
+        now = time.monotonic()
+        if not idle:
+            self.idle_since = None
+            return False
+        if self.idle_since is None:
+            self.idle_since = now
+        return now - self.idle_since >= self.idle_seconds
+
+class AnyReady(ReadinessStrategy):
+    """poll หลายกลยุทธ์พร้อมกัน พร้อมเมื่อกลยุทธ์ใดกลยุทธ์หนึ่งพร้อม"""
+
+    def __init__(self, *strategies):
+        self.strategies = strategies
+        self.name = "|".join(strategy.name for strategy in strategies)
+        self.needs_performance_log = any(strategy.needs_performance_log for strategy in strategies)
+
+    def reset(self, driver):
+        for strategy in self.strategies:
+            strategy.reset(driver)
+
+    def is_ready(self, driver):
+        # ประเมินทุกกลยุทธ์ทุกรอบเพื่อให้สถานะภายใน (เช่นเวลาที่เริ่มนิ่ง) อัปเดตต่อเนื่อง
+        results = [strategy.is_ready(driver) for strategy in self.strategies]
+        return any(results)
+
+class PageLatencyMetrics:
+    """เก็บเวลาโหลดและเวลารอจนพร้อมของแต่ละหน้า (ใช้ร่วมกันได้หลาย thread)"""
+
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+
+    def record(self, exam_id, navigate_seconds, ready_seconds, ready, strategy):
+        with self.lock:
+            self.records.append({
+                "exam_id": exam_id,
+                "navigate_ms": round(navigate_seconds * 1000, 1),
+                "ready_ms": round(ready_seconds * 1000, 1),
+                "ready": ready,
+                "strategy": strategy
+            })
+
+    def summary(self):
+        """สรุป p50/p95 ของเวลารวมต่อหน้า และจำนวนหน้าที่รอจนหมดเวลา"""
+        with self.lock:
+            totals = sorted(r["navigate_ms"] + r["ready_ms"] for r in self.records)
+            timeouts = sum(1 for r in self.records if not r["ready"])
+        if not totals:
+            return {"pages": 0}
+
+        def percentile(p):
+            return totals[min(len(totals) - 1, int(round(p / 100 * (len(totals) - 1))))]
+
+        return {
+            "pages": len(totals),
+            "timeouts": timeouts,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "max_ms": totals[-1]
+        }
+
+def build_readiness(mode, question_selector):
+    """
+    สร้างกลยุทธ์จากชื่อ
+
+    Args:
+        mode (str): "dom_marker", "question_count", "network_idle" หรือ "default"
+            (default = พร้อมเมื่อจำนวนคำถามนิ่ง หรือเมื่อ network เงียบ สำหรับหน้าที่ไม่มีคำถาม)
+        question_selector (str): CSS selector ของ element คำถาม
+    """
+    if mode == "dom_marker":
+        return DomMarkerReady(question_selector)
+    if mode == "question_count":
+        return QuestionCountStableReady(question_selector)
+    if mode == "network_idle":
+        return NetworkIdleReady()
+    return AnyReady(QuestionCountStableReady(question_selector), NetworkIdleReady(idle_seconds=1.0))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+pipeline สำหรับดึงข้อสอบหลาย id โดยแยกงาน network ออกจากงาน CPU
+
+    fetchers (async) ──► raw queue (จำกัดขนาด) ──► parsers (ProcessPoolExecutor) ──► result queue ──► writer (1 ตัว)
+
+- fetcher หลายตัวดึง HTML/JSON ดิบพร้อมกัน ถ้า parser ตามไม่ทัน queue จะเต็มและ fetcher จะรอ (backpressure)
+- การ parse (BeautifulSoup + regex) ทำใน process แยก จึงไม่ไปบล็อก event loop ของ fetcher
+- ข้อมูลดิบที่ไม่ต้อง parse (เช่น JSON จาก API) ส่งตรงจาก fetcher ไป writer ไม่ต้องข้าม process
+- writer มีตัวเดียว เขียน sink/journal ตามลำดับที่ได้ผล ไม่ต้องแย่งไฟล์กัน
+- งานที่ error ในขั้นใดขั้นหนึ่งถูกบันทึกต่อ exam_id แล้วทำงานถัดไปต่อ pipeline จึงไม่ค้างเพราะงานเดียว
+- PipelineMetrics เก็บความลึกของ queue และ throughput ของแต่ละขั้น
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+STAGES = ("fetch", "parse", "write")
+
+class PipelineMetrics:
+    """สถิติของ pipeline: จำนวนงานและเวลาที่ใช้ของแต่ละขั้น และความลึกของ queue ที่สุ่มวัดเป็นระยะ"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {stage: {"items": 0, "busy_seconds": 0.0} for stage in STAGES}
+        self.depths = {"raw": [], "result": []}
+        self.errors = {stage: {} for stage in STAGES}
+        self.started_at = None
+        self.finished_at = None
+
+    def record(self, stage, seconds):
+        with self.lock:
+            entry = self.stages[stage]
+            entry["items"] += 1
+            entry["busy_seconds"] += seconds
+
+    def record_error(self, stage, exam_id, error):
+        with self.lock:
+            self.errors[stage][exam_id] = str(error)
+
+    def sample(self, raw_depth, result_depth):
+        with self.lock:
+            self.depths["raw"].append(raw_depth)
+            self.depths["result"].append(result_depth)
+
+    def snapshot(self):
+        """สถานะปัจจุบัน: งานที่เสร็จต่อขั้น, items/sec ต่อขั้น และความลึกล่าสุด/สูงสุด/เฉลี่ยของ queue"""
+        with self.lock:
+            end = self.finished_at or time.perf_counter()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            stages = {}
+            for stage, entry in self.stages.items():
+                stages[stage] = {
+                    "items": entry["items"],
+                    "items_per_sec": round(entry["items"] / elapsed, 2) if elapsed > 0 else 0.0,
+                    "avg_ms": round(entry["busy_seconds"] / entry["items"] * 1000, 1) if entry["items"] else 0.0
+                }
+            queues = {}
+            for name, samples in self.depths.items():
+                queues[name] = {
+                    "current": samples[-1] if samples else 0,
+                    "max": max(samples) if samples else 0,
+                    "mean": round(sum(samples) / len(samples), 2) if samples else 0.0
+                }
+            errors = {stage: len(failed) for stage, failed in self.errors.items()}
+            return {"elapsed": round(elapsed, 3), "stages": stages, "queues": queues, "errors": errors}
+
+    def format_line(self):
+        """สรุปสั้น ๆ 1 บรรทัดสำหรับพิมพ์ความคืบหน้า"""
+        snap = self.snapshot()
+        stages = " | ".join(f"{name} {s['items']} ({s['items_per_sec']}/s)" for name, s in snap["stages"].items())
+        queues = " | ".join(f"{name} {q['current']} (max {q['max']})" for name, q in snap["queues"].items())
+        return f"{stages} || queue: {queues}"
+
+class ExamPipeline:
+    """pipeline fetch → parse → write ของข้อสอบหลาย id"""
+
+    def __init__(self, fetch, parse, write, fetch_concurrency=8, parse_workers=None,
+                 queue_size=32, sample_interval=0.1, report_every=None, preparsed=None):
+        """
+        Args:
+            fetch (coroutine function): fetch(exam_id) คืนค่าข้อมูลดิบ หรือ None ถ้าดึงไม่สำเร็จ
+            parse (callable): ฟังก์ชันระดับ module (ส่งข้าม process ได้) parse(exam_id, raw) คืนค่า exam_data หรือ None
+            write (callable): write(exam_id, exam_data) ถูกเรียกจาก writer ตัวเดียว (exam_data เป็น None เมื่อล้มเหลว)
+                ถ้า write โยน exception จะถูกบันทึกใน metrics.errors["write"] แล้วเขียนงานถัดไปต่อ
+            fetch_concurrency (int): จำนวน fetcher ที่ทำงานพร้อมกัน
+            parse_workers (int): จำนวน process ของ parser (ค่าเริ่มต้น = จำนวน CPU)
+            queue_size (int): ขนาดสูงสุดของแต่ละ queue
+            sample_interval (float): ระยะเวลา (วินาที) ระหว่างการวัดความลึกของ queue
+            report_every (float): พิมพ์ความคืบหน้าทุกกี่วินาที (None = ไม่พิมพ์)
+            preparsed (callable): preparsed(raw) คืนค่า exam_data เมื่อข้อมูลดิบไม่ต้อง parse (ส่งตรงไป writer
+                โดยไม่ผ่าน process pool) หรือ None เมื่อต้อง parse ตามปกติ
+        """
+        self.fetch = fetch
+        self.parse = parse
+        self.write = write
+        self.fetch_concurrency = fetch_concurrency
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.sample_interval = sample_interval
+        self.report_every = report_every
+        self.preparsed = preparsed
+        self.metrics = PipelineMetrics()
+
+    async def _fetcher(self, exam_ids, raw_queue, result_queue):
+        for exam_id in exam_ids:
+            started_at = time.perf_counter()
+            try:
+                raw = await self.fetch(exam_id)
+            except Exception as e:
+                print(f"ดึงข้อมูล exam_id {exam_id} ไม่สำเร็จ: {e}")
+                self.metrics.record_error("fetch", exam_id, e)
+                raw = None
+            self.metrics.record("fetch", time.perf_counter() - started_at)
+            exam_data = self.preparsed(raw) if raw is not None and self.preparsed else None
+            if exam_data is not None:
+                await result_queue.put((exam_id, exam_data))
+            else:
+                await raw_queue.put((exam_id, raw))
+
+    async def _parser(self, loop, executor, raw_queue, result_queue):
+        while True:
+            item = await raw_queue.get()
+            if item is None:
+                return
+            exam_id, raw = item
+            exam_data = None
+            if raw is not None:
+                started_at = time.perf_counter()
+                try:
+                    exam_data = await loop.run_in_executor(executor, self.parse, exam_id, raw)
+                except Exception as e:
+                    print(f"parse exam_id {exam_id} ไม่สำเร็จ: {e}")
+                    self.metrics.record_error("parse", exam_id, e)
+                self.metrics.record("parse", time.perf_counter() - started_at)
+            await result_queue.put((exam_id, exam_data))
+
+    async def _writer(self, result_queue):
+        while True:
+            item = await result_queue.get()
+            if item is None:
+                return
+            started_at = time.perf_counter()
+            # เขียนไฟล์ใน thread เพื่อไม่บล็อก event loop แต่ยังคงมี writer เพียงตัวเดียว
+            try:
+                await asyncio.to_thread(self.write, *item)
+            except Exception as e:
+                # ถ้า writer หยุด result queue จะเต็มและ parser/fetcher รอกันค้าง จึงบันทึกแล้วเขียนงานถัดไปต่อ
+                print(f"บันทึก exam_id {item[0]} ไม่สำเร็จ: {e}")
+                self.metrics.record_error("write", item[0], e)
+            self.metrics.record("write", time.perf_counter() - started_at)
+
+    async def _monitor(self, raw_queue, result_queue):
+        last_report = time.perf_counter()
+        while True:
+            self.metrics.sample(raw_queue.qsize(), result_queue.qsize())
+            if self.report_every and time.perf_counter() - last_report >= self.report_every:
+                print(self.metrics.format_line())
+                last_report = time.perf_counter()
+            await asyncio.sleep(self.sample_interval)
+
+    async def run(self, exam_ids):
+        """ประมวลผล exam_ids ทั้งหมด คืนค่า snapshot ของ metrics เมื่อเสร็จ"""
+        loop = asyncio.get_running_loop()
+        raw_queue = asyncio.Queue(maxsize=self.queue_size)
+        result_queue = asyncio.Queue(maxsize=self.queue_size)
+        shared_ids = iter(exam_ids)
+
+        self.metrics.started_at = time.perf_counter()
+        monitor = asyncio.create_task(self._monitor(raw_queue, result_queue))
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as executor:
+            writer = asyncio.create_task(self._writer(result_queue))
+            parsers = [asyncio.create_task(self._parser(loop, executor, raw_queue, result_queue))
+                       for _ in range(self.parse_workers)]
+            await asyncio.gather(*(self._fetcher(shared_ids, raw_queue, result_queue) for _ in range(self.fetch_concurrency)))
+
+            # ส่งสัญญาณหยุดต่อกันเป็นทอด ๆ: fetcher เสร็จ → parser หยุด → writer หยุด
+            for _ in parsers:
+                await raw_queue.put(None)
+            await asyncio.gather(*parsers)
+            await result_queue.put(None)
+            await writer
+        monitor.cancel()
+        self.metrics.sample(raw_queue.qsize(), result_queue.qsize())
+        self.metrics.finished_at = time.perf_counter()
+        return self.metrics.snapshot()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+บันทึกความคืบหน้าการดึงข้อสอบแบบ append-only (checkpoint journal)
+ใช้ให้การรันซ้ำข้าม exam_id ที่ทำเสร็จแล้ว และลองใหม่เฉพาะ id ที่ล้มเหลว
+"""
+
+import json
+import os
+import threading
+import time
+
+from exam_store import content_hash
+
+# สถานะที่ถือว่าเสร็จแล้ว ไม่ต้องดึงซ้ำ
+DONE_STATUSES = ("ok", "not_found")
+# สถานะที่ต้องลองใหม่รอบหน้า ("empty" = เซิร์ฟเวอร์ตอบแต่ไม่มีคำถาม ซึ่งอาจเป็นแค่ชั่วคราว)
+RETRY_STATUSES = ("failed", "empty")
+
+class _NotFound:
+    """
+    ค่าที่ฟังก์ชันดึงข้อสอบคืนเมื่อเซิร์ฟเวอร์ยืนยันว่าไม่มี exam_id นี้ (เช่น 404) แยกจาก None ที่แปลว่าล้มเหลว
+
+    มีค่าความจริงเป็นเท็จเหมือน None โค้ดที่ตรวจแค่ `if exam_data:` จึงทำงานเหมือนเดิม
+    ส่วนผู้เรียกที่ต้องบันทึก "not_found" ตรวจด้วย `exam_data is NOT_FOUND`
+    """
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "NOT_FOUND"
+
+    def __reduce__(self):
+        # ส่งข้าม process (เช่นผลจาก process pool) แล้วยังเป็นออบเจ็กต์เดียวกัน
+        return "NOT_FOUND"
+
+NOT_FOUND = _NotFound()
+
+def hash_exam_data(data):
+    """คำนวณ hash ของข้อมูลข้อสอบ ใช้ content_hash ตัวเดียวกับ ExamStore ให้ journal และคลังตัดสินว่า "ไม่เปลี่ยนแปลง" ตรงกัน"""
+    return content_hash(data)
+
+class ScrapeJournal:
+    """journal ของการดึงข้อสอบ 1 บรรทัดต่อ 1 เหตุการณ์ (exam_id → สถานะ, hash, path ของไฟล์)"""
+
+    def __init__(self, path, compact_ratio=2.0):
+        """
+        Args:
+            path (str): path ของไฟล์ journal (.jsonl)
+            compact_ratio (float): compact อัตโนมัติเมื่อจำนวนบรรทัดเกินจำนวน id × ค่านี้
+        """
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.entries = {}
+        self.line_count = 0
+        self.truncated = False
+        # worker หลาย thread อาจบันทึกพร้อมกัน
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.load()
+        if self.truncated or self.line_count > max(len(self.entries), 1) * compact_ratio:
+            self.compact()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def load(self):
+        """อ่าน journal เดิม (บรรทัดหลังสุดของแต่ละ id มีผล)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # บรรทัดสุดท้ายอาจเขียนไม่ครบถ้าโปรแกรมหยุดกลางคัน ต้อง compact ก่อนเขียนต่อท้าย
+                    self.truncated = True
+                    continue
+                self.entries[entry["exam_id"]] = entry
+                self.line_count += 1
+
+    def record(self, exam_id, status, content_hash=None, output_path=None):
+        """เพิ่มผลการดึงของ exam_id ต่อท้าย journal"""
+        entry = {
+            "exam_id": exam_id,
+            "status": status,
+            "content_hash": content_hash,
+            "output_path": output_path,
+            "timestamp": time.time()
+        }
+        with self.lock:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.file.flush()
+            self.entries[exam_id] = entry
+            self.line_count += 1
+        return entry
+
+    def record_durable(self, token, output_path):
+        """
+        callback on_durable ของ exam_sinks: บันทึก "ok" เมื่อ sink เขียนข้อสอบลงดิสก์แล้วจริง
+
+        token คือ (exam_id, content_hash) ที่ส่งให้ sink.write() การบันทึกตอนนี้แทนทันทีหลัง write()
+        ทำให้ข้อสอบที่ยังค้างใน buffer ของ sink ตอนโปรแกรมล้มไม่ถูกนับว่าเสร็จ และถูกดึงใหม่รอบหน้า
+        """
+        exam_id, content_hash = token
+        return self.record(exam_id, "ok", content_hash, output_path)
+
+    def get(self, exam_id):
+        """คืนค่า entry ล่าสุดของ exam_id หรือ None"""
+        return self.entries.get(exam_id)
+
+    def is_done(self, exam_id):
+        """ตรวจว่า exam_id นี้ดึงเสร็จแล้ว (สำเร็จหรือไม่พบข้อสอบ) หรือยัง"""
+        entry = self.entries.get(exam_id)
+        return entry is not None and entry["status"] in DONE_STATUSES
+
+    def has_content(self, exam_id, content_hash):
+        """ตรวจว่า output ของ journal นี้มีข้อสอบ exam_id ที่เนื้อหาตรงกับ content_hash บันทึกไว้แล้วหรือไม่"""
+        entry = self.entries.get(exam_id)
+        return entry is not None and entry["status"] == "ok" and entry["content_hash"] == content_hash
+
+    def pending_ids(self, start_id, end_id):
+        """คืนค่า exam_id ในช่วงที่ยังต้องดึง (ยังไม่เคยดึงหรือเคยล้มเหลว)"""
+        return [exam_id for exam_id in range(start_id, end_id + 1) if not self.is_done(exam_id)]
+
+    def failed_ids(self):
+        """คืนค่า exam_id ที่สถานะล่าสุดต้องลองใหม่ (failed หรือ empty)"""
+        return sorted(exam_id for exam_id, entry in self.entries.items() if entry["status"] in RETRY_STATUSES)
+
+    def compact(self):
+        """เขียน journal ใหม่ให้เหลือ 1 บรรทัดต่อ id แล้วแทนที่ไฟล์เดิมแบบ atomic"""
+        reopen = hasattr(self, "file") and not self.file.closed
+        if reopen:
+            self.file.close()
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for exam_id in sorted(self.entries):
+                f.write(json.dumps(self.entries[exam_id], ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.line_count = len(self.entries)
+        self.truncated = False
+
+        if reopen:
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def summary(self):
+        """นับจำนวน id ตามสถานะ"""
+        counts = {}
+        for entry in self.entries.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+    def close(self):
+        """ปิดไฟล์ journal"""
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
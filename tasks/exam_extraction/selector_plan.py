@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+แผน selector ที่เรียนรู้ได้ (selector plan) สำหรับการดึงข้อมูลจาก HTML
+ทุกหน้าของเว็บไซต์ใช้ template เดียวกัน จึงจำว่า CSS selector / regex ตัวไหนใช้ได้
+แล้วลองตัวนั้นก่อนในหน้าถัดไป ค้นหาทั้งรายการใหม่เฉพาะเมื่อตัวที่จำไว้ใช้ไม่ได้ (miss)
+"""
+
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+DEFAULT_PLAN_PATH = os.path.join("data", "cache", "selector_plan.json")
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern):
+    """compile regex ครั้งเดียวแล้วใช้ซ้ำ"""
+    return re.compile(pattern)
+
+class SelectorPlan:
+    """เก็บ selector/pattern ที่ชนะของแต่ละช่องข้อมูล (slot) แยกตาม layout ของหน้าเว็บ และบันทึกลงดิสก์"""
+
+    def __init__(self, path=DEFAULT_PLAN_PATH, layout="default", autosave=True):
+        """
+        Args:
+            path (str): ไฟล์ JSON สำหรับเก็บแผน (None = ไม่บันทึกลงดิสก์)
+            layout (str): ชื่อ layout ของหน้าเว็บ ใช้แยกแผนของ extractor แต่ละแบบ
+            autosave (bool): บันทึกลงดิสก์ทันทีที่ได้ selector ใหม่ (process ลูกของ pool ปิดไว้
+                แล้วส่งผลกลับด้วย drain() ให้ process หลักรวมด้วย merge())
+        """
+        self.path = path
+        self.layout = layout
+        self.autosave = autosave
+        self.plans = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    @property
+    def winners(self):
+        return self.plans.setdefault(self.layout, {})
+
+    def load(self):
+        """อ่านแผนที่เคยบันทึกไว้ (ถ้ามี)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.plans = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"อ่านไฟล์ selector plan ไม่สำเร็จ เริ่มเรียนรู้ใหม่: {e}")
+            self.plans = {}
+
+    def save(self):
+        """บันทึกแผนลงดิสก์แบบ atomic"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # ไฟล์ชั่วคราวแยกตาม process เผื่อมีหลาย process บันทึกแผนเดียวกันพร้อมกัน
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.plans, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _count(self, slot, key):
+        with self.lock:
+            counter = self.counters.setdefault(slot, {"hits": 0, "misses": 0})
+            counter[key] += 1
+
+    def _remember(self, slot, candidate):
+        with self.lock:
+            if self.winners.get(slot) == candidate:
+                return
+            self.winners[slot] = candidate
+            if self.autosave:
+                self.save()
+
+    def first(self, slot, candidates, probe, default=None):
+        """
+        คืนผลลัพธ์แรกที่ใช้ได้จาก candidates โดยลองตัวที่จำไว้ก่อน
+
+        Args:
+            slot (str): ชื่อช่องข้อมูล เช่น "title", "question"
+            candidates (list): รายการ selector/pattern ตามลำดับเดิม
+            probe (callable): ฟังก์ชันรับ candidate แล้วคืนผลลัพธ์ (ค่า falsy = ใช้ไม่ได้)
+            default: ค่าที่คืนเมื่อไม่มี candidate ใดใช้ได้
+        """
+        cached = self.winners.get(slot)
+        if cached in candidates:
+            result = probe(cached)
+            if result:
+                self._count(slot, "hits")
+                return result
+
+        self._count(slot, "misses")
+        for candidate in candidates:
+            if candidate == cached:
+                continue
+            result = probe(candidate)
+            if result:
+                self._remember(slot, candidate)
+                return result
+        return default
+
+    def select_one(self, node, slot, selectors):
+        """หา element แรกที่มีข้อความจาก CSS selector"""
+        def probe(selector):
+            element = node.select_one(selector)
+            return element if element and element.get_text().strip() else None
+        return self.first(slot, selectors, probe)
+
+    def select(self, node, slot, selectors):
+        """หา element ทั้งหมดจาก CSS selector ตัวแรกที่เจอ"""
+        return self.first(slot, selectors, node.select, default=[])
+
+    def search(self, text, slot, patterns):
+        """re.search ด้วย pattern ตัวแรกที่เจอ"""
+        return self.first(slot, patterns, lambda pattern: compile_pattern(pattern).search(text))
+
+    def findall(self, text, slot, patterns):
+        """re.findall ด้วย pattern ตัวแรกที่เจอ"""
+        return self.first(slot, patterns, lambda pattern: compile_pattern(pattern).findall(text), default=[])
+
+    def drain(self):
+        """คืนค่า selector ที่ชนะของ layout นี้และตัวนับ hit/miss ที่สะสมตั้งแต่ครั้งก่อน แล้วล้างตัวนับ"""
+        with self.lock:
+            report = {"winners": dict(self.winners), "counters": self.counters}
+            self.counters = {}
+        return report
+
+    def merge(self, report):
+        """รวมผลจาก drain() ของ process อื่น: บวกตัวนับ และใช้ selector ที่ชนะตามนั้น (บันทึกเมื่อมีการเปลี่ยนแปลง)"""
+        with self.lock:
+            for slot, counter in report["counters"].items():
+                total = self.counters.setdefault(slot, {"hits": 0, "misses": 0})
+                for key, value in counter.items():
+                    total[key] += value
+            changed = False
+            for slot, candidate in report["winners"].items():
+                if self.winners.get(slot) != candidate:
+                    self.winners[slot] = candidate
+                    changed = True
+            if changed and self.autosave:
+                self.save()
+
+    def stats(self):
+        """คืนค่าจำนวน hit/miss ของแต่ละ slot และอัตรา hit รวม"""
+        with self.lock:
+            slots = {slot: dict(counter) for slot, counter in self.counters.items()}
+        hits = sum(counter["hits"] for counter in slots.values())
+        misses = sum(counter["misses"] for counter in slots.values())
+        total = hits + misses
+        return {
+            "slots": slots,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0
+        }
@@ -0,0 +1,106 @@
+"""
+fixture ร่วมของชุดทดสอบ exam_extraction
+
+- สคริปต์ใน tasks/exam_extraction import กันด้วยชื่อ module ตรง ๆ จึงเพิ่มโฟลเดอร์นั้นเข้า sys.path
+  (และ root ของ repo สำหรับ rate_limiter.py ที่ใช้ร่วมกับ tasks อื่น)
+- stub_server เปิด HTTP server ในเครื่อง (thread แยก) ให้ทั้ง requests และ aiohttp ยิงมาได้โดยไม่ต้องออกเน็ต
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+API_PATH = "/webservice/api/examination/formdoexamination"
+
+def exam_payload(exam_id, question_count=3):
+    """payload แบบเดียวกับ formdoexamination ของทรูปลูกปัญญา"""
+    return {
+        "data": {
+            "exam": {
+                "exam_id": exam_id,
+                "exam_name": f"ข้อสอบชุด {exam_id}",
+                "level_name": "ม.6",
+                "subject_name": "คณิตศาสตร์",
+                "question_count": question_count
+            },
+            "formdo": [
+                {
+                    "question_id": exam_id * 100 + number,
+                    "question_detail": f"ข้อใดถูกต้อง {exam_id}-{number}",
+                    "choice": [{"detail": f"ตัวเลือก {letter}", "answer": "true" if letter == "ก" else "false"}
+                               for letter in ("ก", "ข", "ค", "ง")]
+                }
+                for number in range(1, question_count + 1)
+            ]
+        }
+    }
+
+class StubServer:
+    """HTTP server ในเครื่อง ตอบตาม handler(method, path, query, headers) → (status, headers, body)"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                with stub.lock:
+                    stub.requests.append((url.path, query))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    status, headers, body = stub.handler("GET", url.path, query, dict(self.headers))
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body, ensure_ascii=False)
+                    headers = {"Content-Type": "application/json", **(headers or {})}
+                body = body.encode("utf-8") if isinstance(body, str) else (body or b"")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub_server():
+    """สร้าง StubServer จาก handler ที่ส่งเข้ามา ปิดให้เองเมื่อจบการทดสอบ"""
+    servers = []
+
+    def start(handler):
+        server = StubServer(handler)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
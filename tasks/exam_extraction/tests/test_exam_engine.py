@@ -0,0 +1,41 @@
+"""ทดสอบลำดับการลองวิธีของ ExamExtractionEngine กับ stub server ในเครื่อง"""
+
+from conftest import exam_payload
+from exam_engine import ExamExtractionEngine, ExtractionStrategy
+from scrape_journal import ScrapeJournal
+
+class RecordingStrategy(ExtractionStrategy):
+    """วิธีที่แพงกว่าแทน html/browser จดว่าถูกเรียกด้วย exam_id ใดบ้าง"""
+
+    name = "browser"
+
+    def __init__(self):
+        self.calls = []
+
+    def extract(self, exam_id):
+        self.calls.append(exam_id)
+        return None
+
+def test_missing_exam_stops_escalation_and_is_not_retried(stub_server, tmp_path):
+    def handler(method, path, query, headers):
+        exam_id = int(query["exam_id"])
+        if exam_id == 2:
+            return 404, {}, "not found"
+        if exam_id == 3:
+            return 403, {}, "forbidden"
+        return 200, {}, exam_payload(exam_id)
+    server = stub_server(handler)
+    fallback = RecordingStrategy()
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    with ExamExtractionEngine(("api",), workers=2, base_url=server.url) as engine:
+        engine.strategies.append(fallback)
+        engine.metrics[fallback.name] = {"attempts": 0, "successes": 0, "seconds": 0.0}
+        stats = engine.run_range(1, 3, str(tmp_path / "output"), journal_path=journal_path)
+
+    assert (stats["ok"], stats["not_found"], stats["failed"]) == (1, 1, 1)
+    # 404 จาก API ไม่ต้องเปิดเบราว์เซอร์ ส่วน 403 ยังลองวิธีถัดไปตามปกติ
+    assert fallback.calls == [3]
+    with ScrapeJournal(journal_path) as journal:
+        assert journal.get(2)["status"] == "not_found"
+        assert journal.pending_ids(1, 3) == [3]
@@ -0,0 +1,78 @@
+"""ทดสอบ endpoint discovery / race ของ APIExamScraper กับ stub server ในเครื่อง"""
+
+import time
+
+from endpoint_cache import EndpointDiscoveryCache
+from endpoint_ranking import EndpointRanker
+from exam_scraper_api import APIExamScraper
+from rate_limiter import AdaptiveRateLimiter
+
+def make_scraper(server, **options):
+    # limiter ของตัวเอง ไม่ใช้ limiter ร่วมของ process ที่เริ่มช้า 2 request/วินาที
+    options.setdefault("limiter", AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0))
+    scraper = APIExamScraper(endpoint_cache=EndpointDiscoveryCache(path=None), ranker=EndpointRanker(path=None), **options)
+    scraper.base_url = server.url
+    return scraper
+
+def preview_page(exam_id):
+    return (f'<html><body><script src="/js/app.js"></script>'
+            f'<script>fetch("/examination/detail/{exam_id}")</script></body></html>')
+
+def test_inline_endpoints_are_not_reused_for_other_exams(stub_server):
+    def handler(method, path, query, headers):
+        if path == "/examination2/examPreview":
+            return 200, {"Content-Type": "text/html"}, preview_page(query["id"])
+        if path == "/js/app.js":
+            return 200, {"Content-Type": "application/javascript"}, '$.get("/api/exam/questions")'
+        return 404, {}, ""
+    server = stub_server(handler)
+    scraper = make_scraper(server)
+
+    first = scraper.discover_api_endpoints(1)
+    second = scraper.discover_api_endpoints(2)
+
+    assert f"{server.url}/examination/detail/1" in first
+    assert second == [f"{server.url}/api/exam/questions"]
+    # หน้า examPreview ถูกโหลดครั้งเดียว ครั้งที่สองใช้รายชื่อ script จาก cache
+    assert [path for path, _ in server.requests].count("/examination2/examPreview") == 1
+
+def test_race_ignores_fast_empty_payload(stub_server):
+    def handler(method, path, query, headers):
+        if path == "/api/exam/empty":
+            return 200, {}, {"data": []}
+        if path == "/api/exam/questions" and "id" in query:
+            time.sleep(0.2)
+            return 200, {}, {"questions": [{"question": "ข้อใดถูกต้อง", "choices": ["ก", "ข"]}]}
+        return 404, {}, ""
+    server = stub_server(handler)
+    endpoints = [f"{server.url}/api/exam/empty", f"{server.url}/api/exam/questions"]
+
+    with make_scraper(server, race_width=8) as scraper:
+        exam_data = scraper.try_api_endpoints(1, endpoints)
+
+        assert exam_data["questions"][0]["question_text"] == "ข้อใดถูกต้อง"
+        stats = scraper.ranker.stats
+        assert all(entry["successes"] == 0 for key, entry in stats.items() if key.endswith("/api/exam/empty"))
+        assert stats[EndpointRanker.key(endpoints[1], "id")]["successes"] == 1
+    # close() รอ probe ที่ยังค้างให้จบก่อน จำนวน request จึงนับครบ
+    assert scraper.race_executor._shutdown
+    assert scraper.api_requests == len(server.requests) == 8
+
+def test_pipelined_range_writes_api_data_without_parse_workers(stub_server, tmp_path):
+    def handler(method, path, query, headers):
+        if path == "/examination2/examPreview":
+            return 200, {"Content-Type": "text/html"}, '<html><body><script src="/js/app.js"></script></body></html>'
+        if path == "/js/app.js":
+            return 200, {"Content-Type": "application/javascript"}, '$.get("/api/exam/questions")'
+        if path == "/api/exam/questions" and "id" in query:
+            return 200, {}, {"questions": [{"question": f"ข้อสอบ {query['id']}", "choices": ["ก", "ข"]}]}
+        return 404, {}, ""
+    server = stub_server(handler)
+
+    with make_scraper(server) as scraper:
+        stats = scraper.scrape_exam_range_pipelined(1, 4, str(tmp_path / "output"), sink="jsonl",
+                                                    fetch_concurrency=2, parse_workers=1)
+
+    assert (stats["ok"], stats["failed"]) == (4, 0)
+    assert stats["pipeline"]["stages"]["parse"]["items"] == 0
+    assert stats["pipeline"]["stages"]["write"]["items"] == 4
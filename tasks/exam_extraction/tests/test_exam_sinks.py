@@ -0,0 +1,88 @@
+"""ทดสอบ output sink: บันทึก journal เมื่อข้อมูลลงดิสก์แล้วเท่านั้น และการตั้งชื่อไฟล์ส่วนถัดไป"""
+
+import json
+import os
+
+import pytest
+
+from exam_sinks import JsonlSink, ParquetSink, iter_jsonl_exams, next_part_path, open_sink
+from scrape_journal import ScrapeJournal
+
+def exam(exam_id, question_count=2):
+    return {
+        "metadata": {"exam_id": exam_id, "exam_name": f"ชุด {exam_id}"},
+        "questions": [{"question_number": n, "question_text": f"ข้อ {n}",
+                       "choices": [{"choice_number": 1, "choice_text": "ก", "is_correct": True}]}
+                      for n in range(1, question_count + 1)]
+    }
+
+def test_jsonl_journals_only_after_fsync(tmp_path):
+    journal = ScrapeJournal(str(tmp_path / "journal.jsonl"))
+    sink = JsonlSink(str(tmp_path / "out"), fsync_every=3, on_durable=journal.record_durable)
+
+    for exam_id in range(1, 6):
+        sink.write(exam(exam_id), (exam_id, f"hash-{exam_id}"))
+
+    # fsync ไปแล้ว 1 ชุด (3 รายการ) ที่เหลือยังอยู่ใน buffer
+    assert sorted(journal.entries) == [1, 2, 3]
+    assert journal.get(3)["output_path"].endswith("exams-00001.jsonl#3")
+
+    # จำลองโปรแกรมล้มตอนนี้: รอบถัดไปต้องดึง 4 และ 5 ใหม่
+    journal.close()
+    with ScrapeJournal(str(tmp_path / "journal.jsonl")) as reopened:
+        assert reopened.pending_ids(1, 5) == [4, 5]
+
+def test_jsonl_close_releases_remaining_records(tmp_path):
+    released = []
+    sink = JsonlSink(str(tmp_path), fsync_every=1000, max_records=2,
+                     on_durable=lambda token, location: released.append((token, location)))
+    for exam_id in range(1, 4):
+        sink.write(exam(exam_id), exam_id)
+    # หมุนไฟล์ตอนรายการที่ 3 ทำให้ 2 รายการแรก fsync แล้ว
+    assert [token for token, _ in released] == [1, 2]
+    sink.close()
+
+    assert released[-1] == (3, os.path.join(str(tmp_path), "exams-00002.jsonl#1"))
+    assert [data["metadata"]["exam_id"] for data in iter_jsonl_exams(str(tmp_path))] == [1, 2, 3]
+
+def test_parquet_journals_when_file_is_closed(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    released = []
+    # ข้อสอบละ 2 แถว: row group ละ 2 ข้อสอบ ไฟล์ละ 4 ข้อสอบ
+    sink = ParquetSink(str(tmp_path), row_group_size=4, max_rows_per_file=8,
+                       on_durable=lambda token, location: released.append((token, location)))
+    for exam_id in range(1, 5):
+        sink.write(exam(exam_id), exam_id)
+    # row group ของ exam 1-4 อยู่ในไฟล์ที่ยังไม่มี footer จึงยังไม่นับว่าเสร็จ
+    assert released == []
+
+    first, second = (os.path.join(str(tmp_path), f"exams-0000{n}.parquet") for n in (1, 2))
+    for exam_id in (5, 6):
+        sink.write(exam(exam_id), exam_id)
+    assert released == [(exam_id, first) for exam_id in range(1, 5)]
+
+    sink.close()
+    assert released[4:] == [(5, second), (6, second)]
+    assert pq.read_table(first).num_rows == 8 and pq.read_table(second).num_rows == 4
+
+def test_json_sink_is_durable_per_write(tmp_path):
+    released = []
+    sink = open_sink("json", str(tmp_path), filename_fn=lambda data: f"{data['metadata']['exam_id']}.json",
+                     on_durable=lambda token, location: released.append(token))
+    sink.write(exam(7), 7)
+    assert released == [7]
+    sink.close()
+
+def test_next_part_path_skips_past_gaps(tmp_path):
+    for name in ("exams-00001.jsonl", "exams-00003.jsonl", "other-00009.jsonl", "exams-00005.parquet"):
+        (tmp_path / name).write_text("{}\n", encoding="utf-8")
+
+    assert next_part_path(str(tmp_path), "exams", ".jsonl").endswith("exams-00004.jsonl")
+
+    sink = JsonlSink(str(tmp_path))
+    sink.write(exam(1))
+    sink.close()
+    assert json.loads((tmp_path / "exams-00003.jsonl").read_text(encoding="utf-8")) == {}
+    assert (tmp_path / "exams-00004.jsonl").exists()
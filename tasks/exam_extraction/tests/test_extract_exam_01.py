@@ -0,0 +1,145 @@
+"""ทดสอบ harvest_exam_range ของ extract_exam_01 กับ stub server ในเครื่อง"""
+
+import asyncio
+import os
+import threading
+import time
+
+import extract_exam_01
+from conftest import API_PATH, exam_payload
+from exam_sinks import JsonFileSink, iter_jsonl_exams
+
+def exam_handler(missing=(), delay=0.05):
+    def handler(method, path, query, headers):
+        assert path == API_PATH
+        time.sleep(delay)
+        exam_id = int(query["exam_id"])
+        if exam_id in missing:
+            return 404, {}, "not found"
+        return 200, {}, exam_payload(exam_id)
+    return handler
+
+def harvest(server, tmp_path, start_id, end_id, **options):
+    options.setdefault("concurrency", 4)
+    options.setdefault("rate", 1000.0)
+    options.setdefault("store_dir", None)
+    return asyncio.run(extract_exam_01.harvest_exam_range(
+        start_id, end_id, str(tmp_path / "output"), base_url=server.url, **options))
+
+def test_harvest_fetches_range_concurrently(stub_server, tmp_path):
+    server = stub_server(exam_handler(missing={7}))
+
+    stats = harvest(server, tmp_path, 1, 20)
+
+    assert stats["ok"] == 19
+    assert stats["not_found"] == 1
+    assert 1 < server.max_in_flight <= 4
+    saved = [name for name in os.listdir(tmp_path / "output") if name.endswith(".json")]
+    assert len(saved) == 19
+
+def test_harvest_writes_off_the_event_loop(stub_server, tmp_path, monkeypatch):
+    """sink ที่เขียนช้าต้องไม่บล็อก event loop ที่ worker ตัวอื่นใช้ดึงข้อมูล"""
+    server = stub_server(exam_handler(delay=0.0))
+    write_threads = set()
+
+    class SlowSink(JsonFileSink):
+        def _write(self, exam_data):
+            write_threads.add(threading.get_ident())
+            time.sleep(0.2)
+            return super()._write(exam_data)
+
+    monkeypatch.setattr(extract_exam_01, "open_sink",
+                        lambda kind, output_dir, filename_fn=None, **options: SlowSink(output_dir, filename_fn, **options))
+
+    async def run():
+        max_gap = 0.0
+        harvest_task = asyncio.create_task(extract_exam_01.harvest_exam_range(
+            1, 4, str(tmp_path / "output"), concurrency=4, rate=1000.0, base_url=server.url, store_dir=None))
+        last_tick = time.perf_counter()
+        while not harvest_task.done():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            max_gap = max(max_gap, now - last_tick)
+            last_tick = now
+        return await harvest_task, max_gap
+
+    stats, max_gap = asyncio.run(run())
+
+    assert stats["ok"] == 4
+    assert threading.main_thread().ident not in write_threads
+    assert max_gap < 0.15
+
+def test_harvest_journals_jsonl_exams_once_synced(stub_server, tmp_path):
+    server = stub_server(exam_handler(missing={3}, delay=0.0))
+
+    stats = harvest(server, tmp_path, 1, 5, sink="jsonl")
+
+    assert stats["ok"] == 4
+    with extract_exam_01.ScrapeJournal(str(tmp_path / "output" / "scrape_journal.jsonl")) as journal:
+        assert journal.pending_ids(1, 5) == []
+        assert journal.get(3)["status"] == "not_found"
+        assert all(journal.get(exam_id)["output_path"].startswith(str(tmp_path / "output" / "exams-00001.jsonl#"))
+                   for exam_id in (1, 2, 4, 5))
+
+def test_shared_store_still_fills_a_fresh_output(stub_server, tmp_path):
+    """คลังใช้ร่วมกันทุก output: ข้อสอบที่ไม่เปลี่ยน/ได้ 304 ต้องถูกเขียนลง output ที่ยังไม่มี"""
+    def handler(method, path, query, headers):
+        exam_id = int(query["exam_id"])
+        etag = f'"exam-{exam_id}"'
+        if headers.get("If-None-Match") == etag and exam_id % 2:
+            return 304, {"ETag": etag}, ""
+        return 200, {"ETag": etag}, exam_payload(exam_id)
+    server = stub_server(handler)
+    store_dir = str(tmp_path / "store")
+
+    first = harvest(server, tmp_path, 1, 4, store_dir=store_dir)
+    second = asyncio.run(extract_exam_01.harvest_exam_range(
+        1, 4, str(tmp_path / "other"), concurrency=4, rate=1000.0, base_url=server.url, sink="jsonl", store_dir=store_dir))
+
+    assert first["ok"] == second["ok"] == 4
+    other_ids = sorted(data["metadata"]["exam_id"] for data in iter_jsonl_exams(str(tmp_path / "other")))
+    assert other_ids == [1, 2, 3, 4]
+
+    # output เดิมมีเนื้อหาเดียวกันอยู่แล้ว ตรวจซ้ำแล้วไม่ต้องเขียนใหม่
+    again = harvest(server, tmp_path, 1, 4, store_dir=store_dir, refresh=True)
+    assert (again["ok"], again["unchanged"], again["not_modified"]) == (0, 2, 2)
+
+def test_broken_or_questionless_responses_stay_retryable(stub_server, tmp_path):
+    def handler(method, path, query, headers):
+        exam_id = int(query["exam_id"])
+        if exam_id == 1:
+            return 200, {}, '{"data": {"exam": '
+        if exam_id == 2:
+            return 200, {"Content-Type": "text/html"}, "<html>502 Bad Gateway</html>"
+        if exam_id == 3:
+            return 200, {}, exam_payload(exam_id, question_count=0)
+        return 404, {}, "not found"
+    server = stub_server(handler)
+
+    stats = harvest(server, tmp_path, 1, 4)
+
+    assert (stats["failed"], stats["empty"], stats["not_found"]) == (2, 1, 1)
+    with extract_exam_01.ScrapeJournal(str(tmp_path / "output" / "scrape_journal.jsonl")) as journal:
+        assert journal.pending_ids(1, 4) == [1, 2, 3]
+
+def test_not_modified_without_stored_copy_refetches(stub_server, tmp_path):
+    """304 ที่คลังไม่มีฉบับเดิม (เช่น ETag ร่วมจาก CDN) ต้องดึงใหม่แบบไม่มีเงื่อนไข ไม่ทำให้ทั้งช่วงล้ม"""
+    def handler(method, path, query, headers):
+        if "If-None-Match" not in headers and not any(q == query for _, q in server.requests[:-1]):
+            # cache ระหว่างทางตอบ 304 ให้ request แรกของแต่ละ id ทั้งที่ไม่ได้ส่งเงื่อนไขมา
+            return 304, {"ETag": '"shared"'}, ""
+        return 200, {"ETag": '"shared"'}, exam_payload(int(query["exam_id"]))
+    server = stub_server(handler)
+
+    stats = harvest(server, tmp_path, 1, 3, store_dir=str(tmp_path / "store"))
+
+    assert stats["ok"] == 3
+    assert len(server.requests) == 6
+
+def test_journal_and_store_share_one_content_hash(tmp_path):
+    store = extract_exam_01.ExamStore(str(tmp_path / "store"))
+    exam_data = extract_exam_01.parse_exam_payload(exam_payload(1))
+    digest, _ = store.put(1, exam_data)
+
+    assert extract_exam_01.hash_exam_data(exam_data) == digest
+    assert store.mark_not_modified(2) is None
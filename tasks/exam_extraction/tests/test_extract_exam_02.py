@@ -0,0 +1,37 @@
+"""ทดสอบ pipeline ของ extract_exam_02_beautifulsoup กับ stub server ในเครื่อง"""
+
+import json
+import os
+
+import extract_exam_02_beautifulsoup as bs4_extractor
+
+def exam_page(exam_id, question_count=3):
+    questions = "".join(
+        f'<div class="question">ข้อ {number} ข้อใดถูกต้อง'
+        f'<span class="choice">ตัวเลือก ก</span><span class="choice">ตัวเลือก ข</span></div>\n'
+        for number in range(1, question_count + 1)
+    )
+    return (f"<html><head><title>exam {exam_id}</title></head><body>"
+            f"<h1>ข้อสอบชุด {exam_id}</h1>\n<p>ระดับ ม.6</p>\n<p>วิชา คณิตศาสตร์</p>\n{questions}</body></html>")
+
+def test_pipeline_merges_selector_plan_from_parse_workers(stub_server, tmp_path, monkeypatch):
+    server = stub_server(lambda method, path, query, headers: (200, {"Content-Type": "text/html; charset=utf-8"},
+                                                               exam_page(int(query["id"]))))
+    plan_path = tmp_path / "cache" / "selector_plan.json"
+    monkeypatch.setattr(bs4_extractor.selector_plan, "path", str(plan_path))
+    monkeypatch.setattr(bs4_extractor.selector_plan, "plans", {})
+    monkeypatch.setattr(bs4_extractor.selector_plan, "counters", {})
+
+    stats = bs4_extractor.extract_exam_range_from_web(
+        1, 6, str(tmp_path / "output"), fetch_concurrency=3, parse_workers=2, rate=1000.0,
+        url_template=server.url + "/examination2/examPreview?id={exam_id}")
+
+    assert stats["ok"] == 6
+    # 6 หน้า × (title, level, subject, question) + 18 คำถาม × choice = ทุกครั้งที่ลอง selector
+    plan_stats = stats["selector_plan"]
+    assert plan_stats["hits"] + plan_stats["misses"] == 6 * 4 + 18
+    assert plan_stats["hits"] > plan_stats["misses"]
+
+    saved = json.loads(plan_path.read_text(encoding="utf-8"))
+    assert saved["examPreview_bs4"]["question"] == ".question"
+    assert not [name for name in os.listdir(plan_path.parent) if name.endswith(".tmp")]
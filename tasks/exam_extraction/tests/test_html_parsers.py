@@ -0,0 +1,36 @@
+"""ทดสอบ backend ของ html_parsers"""
+
+import pytest
+
+from html_parsers import StreamingLXMLTreeBuilder, parse_html
+
+pytest.importorskip("lxml")
+
+PAGE = ("<html><body><div class='header'>ชุดที่ 1</div><div class='exam-content'>"
+        + "".join(f"<div class='question-item'><div class='question-text'>ข้อ {n}</div>"
+                  f"<li class='choice'>ก</li></div>" for n in range(1, 4))
+        + "</div><div class='footer'>" + "<a href='/x'>ลิงก์</a>" * 50 + "<script>var x;</script></div></body></html>")
+
+def test_stream_stops_after_question_container():
+    lxml_soup = parse_html(PAGE.encode("utf-8"), "lxml")
+    stream_soup = parse_html(PAGE.encode("utf-8"), "lxml-stream")
+
+    assert ([q.get_text() for q in stream_soup.select(".question-item")]
+            == [q.get_text() for q in lxml_soup.select(".question-item")])
+    assert stream_soup.select_one(".header").get_text() == "ชุดที่ 1"
+    assert stream_soup.select_one(".footer") is None and stream_soup.find("script") is None
+
+def test_stream_builds_the_soup_in_one_pass(monkeypatch):
+    fed = []
+    original = StreamingLXMLTreeBuilder.feed
+    monkeypatch.setattr(StreamingLXMLTreeBuilder, "feed", lambda self, markup: fed.append(markup) or original(self, markup))
+
+    soup = parse_html(PAGE, "lxml-stream")
+
+    # ป้อน markup ทั้งหน้าครั้งเดียว ไม่มีรอบหาตำแหน่งแยกก่อน parse ซ้ำ
+    assert fed == [PAGE]
+    assert len(soup.select(".question-item")) == 3
+
+def test_stream_without_questions_keeps_whole_page():
+    soup = parse_html("<html><body><p>ไม่มีข้อสอบ</p><div class='footer'>ท้าย</div></body></html>", "lxml-stream")
+    assert soup.select_one(".footer").get_text() == "ท้าย"
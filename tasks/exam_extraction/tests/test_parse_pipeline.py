@@ -0,0 +1,53 @@
+"""ทดสอบ ExamPipeline: writer ที่ error ต้องไม่ทำให้ pipeline ค้าง และข้อมูลที่ parse แล้วไม่ต้องผ่าน process pool"""
+
+import asyncio
+
+from parse_pipeline import ExamPipeline
+
+def parse_upper(exam_id, raw):
+    # ต้องอยู่ระดับ module เพื่อส่งไป process ของ parser ได้
+    kind, payload = raw
+    return {"exam_id": exam_id, "text": payload.upper()}
+
+def run_pipeline(pipeline, exam_ids):
+    # ถ้า pipeline ค้างให้ล้มด้วย timeout แทนที่จะรอไปเรื่อย ๆ
+    return asyncio.run(asyncio.wait_for(pipeline.run(exam_ids), timeout=30))
+
+def test_raising_writer_does_not_stall_pipeline():
+    written = []
+
+    async def fetch(exam_id):
+        return "html", f"exam {exam_id}"
+
+    def write(exam_id, exam_data):
+        if exam_id % 5 == 0:
+            raise OSError("disk full")
+        written.append(exam_id)
+
+    # queue เล็กทำให้ถ้า writer หยุดไป parser และ fetcher จะรอ queue ที่เต็มค้างทันที
+    pipeline = ExamPipeline(fetch, parse_upper, write, fetch_concurrency=2, parse_workers=1, queue_size=1)
+    metrics = run_pipeline(pipeline, range(1, 21))
+
+    assert sorted(written) == [exam_id for exam_id in range(1, 21) if exam_id % 5]
+    assert metrics["errors"]["write"] == 4
+    assert sorted(pipeline.metrics.errors["write"]) == [5, 10, 15, 20]
+    assert pipeline.metrics.errors["write"][5] == "disk full"
+
+def test_preparsed_data_skips_parse_workers():
+    results = {}
+
+    async def fetch(exam_id):
+        if exam_id % 2:
+            return "html", f"exam {exam_id}"
+        return "data", {"exam_id": exam_id, "text": "from api"}
+
+    def write(exam_id, exam_data):
+        results[exam_id] = exam_data["text"]
+
+    pipeline = ExamPipeline(fetch, parse_upper, write, fetch_concurrency=3, parse_workers=1,
+                            preparsed=lambda raw: raw[1] if raw[0] == "data" else None)
+    metrics = run_pipeline(pipeline, range(1, 11))
+
+    assert results == {exam_id: "from api" if exam_id % 2 == 0 else f"EXAM {exam_id}" for exam_id in range(1, 11)}
+    assert metrics["stages"]["parse"]["items"] == 5
+    assert metrics["stages"]["write"]["items"] == 10
@@ -0,0 +1,95 @@
+"""ทดสอบ rate_limiter: AIMD ต่อ host, Retry-After และ retry ของ requests / aiohttp กับ stub server ในเครื่อง"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import aiohttp
+import pytest
+import requests
+
+from rate_limiter import AdaptiveRateLimiter, install_rate_limiter, is_retryable, parse_retry_after, request_async
+
+def fast_limiter(**options):
+    # เริ่มเร็วพอที่การทดสอบไม่ต้องรอช่องเวลา และ backoff สั้นมาก
+    options = {"initial_rate": 1000.0, "max_rate": 1000.0, "backoff_base": 0.001, "backoff_cap": 0.01, **options}
+    return AdaptiveRateLimiter(**options)
+
+def test_parse_retry_after_accepts_seconds_and_http_date():
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(format_datetime(now + timedelta(seconds=30), usegmt=True), now=now) == 30.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+@pytest.mark.parametrize("method, status, expected", [
+    ("GET", None, True),
+    ("GET", 502, True),
+    ("GET", 404, False),
+    ("POST", 500, False),
+    ("POST", None, False),
+    ("POST", 429, True),
+])
+def test_only_safe_failures_are_retried(method, status, expected):
+    assert is_retryable(method, status) is expected
+
+def test_rate_grows_additively_and_drops_multiplicatively_per_host():
+    limiter = AdaptiveRateLimiter(initial_rate=2.0, min_rate=0.5, max_rate=2.5, increase=0.2, decrease=0.5)
+
+    for _ in range(5):
+        limiter.on_success("https://a.example/x")
+    limiter.on_throttle("https://b.example/x")
+    limiter.on_throttle("https://b.example/y")
+    limiter.on_throttle("https://b.example/z")
+
+    assert limiter.hosts["a.example"].rate == 2.5
+    assert limiter.hosts["b.example"].rate == 0.5
+    assert limiter.hosts["b.example"].throttled == 3
+
+def test_reserve_spaces_requests_and_honours_retry_after():
+    limiter = AdaptiveRateLimiter(initial_rate=10.0, max_rate=10.0)
+
+    assert limiter.reserve("https://a.example/") == 0
+    assert limiter.reserve("https://a.example/") == pytest.approx(0.1, abs=0.01)
+    # host อื่นไม่ต้องรอช่องเวลาของ a.example
+    assert limiter.reserve("https://b.example/") == 0
+
+    assert limiter.on_retry("https://b.example/", 0, 429, "5") == 0.0
+    assert limiter.reserve("https://b.example/") == pytest.approx(5.0, abs=0.05)
+
+def test_session_retries_throttled_response_then_succeeds(stub_server):
+    responses = iter([(503, {"Retry-After": "0"}, "busy"), (429, {}, "slow down"), (200, {}, "ok")])
+    server = stub_server(lambda method, path, query, headers: next(responses))
+    session = requests.Session()
+    limiter = install_rate_limiter(session, fast_limiter())
+
+    response = session.get(f"{server.url}/page")
+
+    assert response.status_code == 200 and response.text == "ok"
+    assert len(server.requests) == 3
+    report = limiter.report()[server.url.split("//")[1]]
+    assert report["retries"] == 2 and report["throttled"] == 2
+
+def test_session_gives_up_after_retries_and_returns_last_response(stub_server):
+    server = stub_server(lambda method, path, query, headers: (500, {}, "error"))
+    session = requests.Session()
+    install_rate_limiter(session, fast_limiter(), retries=2)
+
+    assert session.get(f"{server.url}/page").status_code == 500
+    assert len(server.requests) == 3
+
+def test_request_async_retries_and_returns_body(stub_server):
+    responses = iter([(502, {}, "bad gateway"), (200, {}, "ok")])
+    server = stub_server(lambda method, path, query, headers: next(responses))
+    limiter = fast_limiter()
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await request_async(session, "GET", f"{server.url}/page", limiter)
+
+    status, _, body = asyncio.run(run())
+
+    assert (status, body) == (200, b"ok")
+    assert len(server.requests) == 2
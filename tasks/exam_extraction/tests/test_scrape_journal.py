@@ -0,0 +1,107 @@
+"""ทดสอบ ScrapeJournal และการรันต่อจากเดิมของ scraper"""
+
+import json
+
+from endpoint_cache import EndpointDiscoveryCache
+from endpoint_ranking import EndpointRanker
+from exam_scraper_api import APIExamScraper
+from exam_scraper_selenium import ExamScraper
+from exam_sinks import open_sink
+from scrape_journal import NOT_FOUND, ScrapeJournal
+
+def test_pending_ids_skip_done_and_retry_failed(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with ScrapeJournal(str(path)) as journal:
+        journal.record(1, "ok", "hash-1", "exam_1.json")
+        journal.record(2, "not_found")
+        journal.record(3, "failed")
+        journal.record(4, "empty")
+
+    with ScrapeJournal(str(path)) as journal:
+        assert journal.pending_ids(1, 5) == [3, 4, 5]
+        assert journal.failed_ids() == [3, 4]
+        assert journal.get(1)["content_hash"] == "hash-1"
+
+def test_latest_entry_wins_and_truncated_line_is_compacted(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with ScrapeJournal(str(path)) as journal:
+        journal.record(1, "failed")
+        journal.record(1, "ok", "hash-1")
+    # จำลองโปรแกรมหยุดกลางการเขียนบรรทัดสุดท้าย
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"exam_id": 2, "sta')
+
+    with ScrapeJournal(str(path)) as journal:
+        assert journal.is_done(1)
+        assert journal.pending_ids(1, 2) == [2]
+        journal.record(2, "ok", "hash-2")
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(entry["exam_id"], entry["status"]) for entry in lines] == [(1, "ok"), (2, "ok")]
+
+def make_scraper():
+    return APIExamScraper(endpoint_cache=EndpointDiscoveryCache(path=None), ranker=EndpointRanker(path=None))
+
+def test_empty_response_is_retried_on_next_run(tmp_path):
+    output_dir = tmp_path / "output"
+    journal_path = str(output_dir / "scrape_journal.jsonl")
+    calls = []
+    responses = {
+        1: {"exam_id": 1, "metadata": {}, "questions": [{"question_number": 1, "question_text": "ข้อใดถูก"}]},
+        2: {"exam_id": 2, "metadata": {}, "questions": []},
+        3: None
+    }
+
+    scraper = make_scraper()
+    scraper.scrape_exam = lambda exam_id: calls.append(exam_id) or responses[exam_id]
+    scraper.scrape_exam_range(1, 3, str(output_dir), journal_path=journal_path)
+
+    with ScrapeJournal(journal_path) as journal:
+        assert journal.get(2)["status"] == "empty"
+        assert journal.pending_ids(1, 3) == [2, 3]
+
+    calls.clear()
+    responses[2] = responses[1] | {"exam_id": 2}
+    scraper.scrape_exam_range(1, 3, str(output_dir), journal_path=journal_path)
+
+    assert calls == [2, 3]
+    with ScrapeJournal(journal_path) as journal:
+        assert journal.is_done(2)
+
+def test_missing_exam_page_is_journaled_not_found(stub_server, tmp_path):
+    def handler(method, path, query, headers):
+        if path == "/examination2/examPreview" and query["id"] == "1":
+            return 200, {"Content-Type": "text/html"}, '<html><body><div class="question">ข้อใดถูกต้อง</div></body></html>'
+        return 404, {}, "not found"
+    server = stub_server(handler)
+    journal_path = str(tmp_path / "scrape_journal.jsonl")
+
+    scraper = make_scraper()
+    scraper.base_url = server.url
+    scraper.scrape_exam_range(1, 2, str(tmp_path / "output"), journal_path=journal_path)
+    stats = scraper.scrape_exam_range_pipelined(3, 3, str(tmp_path / "output"), journal_path=journal_path, parse_workers=1)
+    scraper.close()
+
+    assert stats["not_found"] == 1
+    with ScrapeJournal(journal_path) as journal:
+        assert [journal.get(exam_id)["status"] for exam_id in (2, 3)] == ["not_found", "not_found"]
+        assert journal.pending_ids(2, 3) == []
+
+def test_selenium_scraper_separates_404_and_empty_pages(tmp_path):
+    class FakeDriver:
+        title = "404 Not Found"
+
+        def get(self, url):
+            pass
+
+    scraper = ExamScraper.__new__(ExamScraper)
+    scraper.readiness = "default"
+    assert scraper.scrape_exam_with_driver(FakeDriver(), 1) is NOT_FOUND
+
+    responses = {1: NOT_FOUND, 2: {"metadata": {}, "questions": []}, 3: None}
+    scraper.scrape_exam = responses.get
+    with ScrapeJournal(str(tmp_path / "journal.jsonl")) as journal, \
+            open_sink("jsonl", str(tmp_path / "output"), on_durable=journal.record_durable) as exam_sink:
+        assert not any(scraper.scrape_and_save(exam_id, exam_sink, journal) for exam_id in (1, 2, 3))
+        assert [journal.get(exam_id)["status"] for exam_id in (1, 2, 3)] == ["not_found", "empty", "failed"]
+        assert journal.pending_ids(1, 3) == [2, 3]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+pool ของ Chrome WebDriver แบบ headless ที่ใช้ซ้ำได้
+เปิดเบราว์เซอร์ครั้งเดียวต่อ worker แทนการเปิด/ปิดใหม่ทุก exam_id
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+def create_chrome_driver(headless=True, performance_log=False):
+    """สร้าง Chrome WebDriver พร้อม option มาตรฐานของโปรเจกต์ (performance_log=True เพื่อให้อ่าน network event ได้)"""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+
+    # Add user agent to avoid detection
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+
+    if performance_log:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    return webdriver.Chrome(options=chrome_options)
+
+class PooledDriver:
+    """WebDriver 1 ตัวใน pool พร้อมตัวนับจำนวนหน้าที่เปิดไปแล้ว"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+    def is_healthy(self):
+        """ตรวจว่าเบราว์เซอร์ยังตอบสนองอยู่หรือไม่"""
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
+
+class WebDriverPool:
+    """pool ขนาดจำกัดของ WebDriver ที่ตรวจสุขภาพก่อนใช้และสร้างใหม่หลังใช้ครบ max_pages หน้า"""
+
+    def __init__(self, size=2, headless=True, max_pages=50, factory=None, performance_log=False):
+        """
+        Args:
+            size (int): จำนวน WebDriver สูงสุดที่เปิดพร้อมกัน
+            headless (bool): เปิดเบราว์เซอร์แบบ headless
+            max_pages (int): จำนวนหน้าที่ให้ driver หนึ่งตัวเปิดก่อนปิดแล้วสร้างใหม่ (กัน memory leak ของ Chrome)
+            factory (callable): ฟังก์ชันสร้าง driver (ค่าเริ่มต้นคือ create_chrome_driver)
+            performance_log (bool): เปิด performance log ของ Chrome (ใช้กับ NetworkIdleReady)
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.factory = factory or (lambda: create_chrome_driver(headless, performance_log))
+        self.idle = queue.Queue()
+        # semaphore คุมจำนวน driver ที่ถูกยืมพร้อมกันไม่ให้เกิน size
+        self.slots = threading.Semaphore(size)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.stats = {"created": 0, "recycled": 0, "unhealthy": 0}
+
+    def _new_driver(self):
+        pooled = PooledDriver(self.factory())
+        with self.lock:
+            self.stats["created"] += 1
+        return pooled
+
+    def _checkout(self):
+        self.slots.acquire()
+        try:
+            # ใช้ driver ที่ว่างอยู่ก่อน ถ้าไม่มีจึงสร้างใหม่
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                return self._new_driver()
+
+            if not pooled.is_healthy():
+                print("พบ WebDriver ที่ไม่ตอบสนอง กำลังสร้างใหม่...")
+                pooled.quit()
+                with self.lock:
+                    self.stats["unhealthy"] += 1
+                pooled = self._new_driver()
+            return pooled
+        except Exception:
+            self.slots.release()
+            raise
+
+    def _checkin(self, pooled, broken=False):
+        pooled.pages += 1
+        try:
+            if broken or self.closed or pooled.pages >= self.max_pages:
+                pooled.quit()
+                if not broken and not self.closed:
+                    with self.lock:
+                        self.stats["recycled"] += 1
+            else:
+                self.idle.put(pooled)
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def driver(self):
+        """ยืม WebDriver จาก pool ใช้ผ่าน `with pool.driver() as driver:`"""
+        pooled = self._checkout()
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            # เบราว์เซอร์อาจ crash ระหว่างใช้งาน ปิดทิ้งแล้วให้รอบถัดไปสร้างใหม่
+            broken = True
+            raise
+        finally:
+            self._checkin(pooled, broken)
+
+    def close(self):
+        """ปิด WebDriver ทุกตัวที่ว่างอยู่ใน pool"""
+        self.closed = True
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            pooled.quit()